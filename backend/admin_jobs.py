@@ -0,0 +1,434 @@
+"""
+Admin Jobs - Background runner for admin-triggered airdrop processes
+One active job at a time, rotating per-job logs, progress and cancellation shared across API workers
+"""
+import os
+import asyncio
+import fcntl
+import json
+import logging
+import shutil
+import signal
+import subprocess
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+ACTIVE = (QUEUED, RUNNING)
+
+# Lines the job prints as ``PROGRESS {json}`` (see outputs/airdrop_orchestrator.py --progress-interval)
+PROGRESS_PREFIX = 'PROGRESS '
+
+# Runs the job and records its exit status for whichever API worker settles it
+_EXIT_WRAPPER = '"$@"; rc=$?; echo $rc > "$0.tmp" && mv "$0.tmp" "$0"; exit $rc'
+
+
+class JobConflict(Exception):
+    """Raised when a job is submitted while another one is active"""
+
+    def __init__(self, job_id: str):
+        super().__init__(f'job {job_id} is still active')
+        self.job_id = job_id
+
+
+def _group_alive(pgid: Optional[int]) -> bool:
+    """True while any process of the job's process group is left"""
+    if not pgid:
+        return False
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _last_progress(lines: List[str]) -> Optional[Dict]:
+    for line in reversed(lines):
+        if line.startswith(PROGRESS_PREFIX):
+            try:
+                return json.loads(line[len(PROGRESS_PREFIX):])
+            except ValueError:
+                continue
+    return None
+
+
+class JobManager:
+    """Runs admin jobs as child processes without tying up request handlers
+
+    ``submit`` starts the command in its own process group and returns at
+    once. The child writes straight into its log file (opened by the
+    parent, never a pipe), so it keeps running whatever happens to the API
+    process. A follower thread tails the log for progress lines and rotates
+    it (copy, then truncate); a watcher enforces ``timeout`` and
+    cancellation (SIGTERM, then SIGKILL after ``kill_grace``).
+
+    Each job's state lives in ``<jobs_dir>/<id>.json``, rewritten atomically
+    at most once per ``flush_interval``, so every API worker process can
+    report on and cancel any job. Submission is serialized across processes
+    with a lock file, and a job stays active while any process of its group
+    is left, cancelled or timed out or not: a new run never overlaps one
+    still stopping. A job orphaned by an API restart is followed through
+    its log, timed out, and settled from the exit status its wrapper
+    records.
+    """
+
+    def __init__(self, jobs_dir: str, timeout: float = 3600.0, kill_grace: float = 10.0,
+                 log_max_bytes: int = 5 * 1024 * 1024, log_backups: int = 3, keep: int = 50,
+                 flush_interval: float = 1.0):
+        """Initialize job manager
+
+        Args:
+            jobs_dir: Directory for job state, logs and the submit lock
+            timeout: Seconds a job may run before it is killed (0: no limit)
+            kill_grace: Seconds between SIGTERM and SIGKILL
+            log_max_bytes: Size at which a job log rotates
+            log_backups: Rotated log files kept per job
+            keep: Finished jobs kept on disk
+            flush_interval: Minimum seconds between state file writes for progress
+        """
+        self.jobs_dir = jobs_dir
+        self.timeout = timeout
+        self.kill_grace = kill_grace
+        self.log_max_bytes = log_max_bytes
+        self.log_backups = log_backups
+        self.keep = keep
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}  # jobs started by this process
+        self._procs: Dict[str, subprocess.Popen] = {}
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    # Paths and state files --------------------------------------------------
+
+    def _state_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f'{job_id}.json')
+
+    def log_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f'{job_id}.log')
+
+    def _cancel_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f'{job_id}.cancel')
+
+    def _exit_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f'{job_id}.exit')
+
+    @contextmanager
+    def _submit_lock(self):
+        with open(os.path.join(self.jobs_dir, 'submit.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _save(self, job: Dict):
+        path = self._state_path(job['id'])
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp, path)
+
+    def _load(self, job_id: str) -> Optional[Dict]:
+        try:
+            with open(self._state_path(job_id)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _on_disk(self) -> List[Dict]:
+        jobs = []
+        for name in os.listdir(self.jobs_dir):
+            if name.endswith('.json'):
+                job = self._load(name[:-5])
+                if job is not None:
+                    jobs.append(job)
+        return sorted(jobs, key=lambda j: j['created'], reverse=True)
+
+    def _settle_orphan(self, job: Dict) -> Dict:
+        """Follow an active job no process of ours watches (its API worker restarted)
+
+        While it runs its progress is read from the log and the timeout is
+        enforced; once its process group is gone it is settled from the exit
+        status file (failed if there is none).
+        """
+        if job['state'] not in ACTIVE or job['id'] in self._procs:
+            return job
+        job_id = job['id']
+        if _group_alive(job.get('pid')):
+            progress = _last_progress(self.log_tail(job_id, 50))
+            if progress is not None:
+                job = dict(job, progress=progress)
+            overdue = self.timeout and job.get('started') and time.time() - job['started'] > self.timeout
+            if overdue:
+                job['error'] = job.get('error') or f'timed out after {self.timeout:.0f}s'
+                late = time.time() - job['started'] - self.timeout > self.kill_grace
+                self._signal_group(job['pid'], signal.SIGKILL if late else signal.SIGTERM)
+                self._save(job)
+            return job
+
+        try:
+            with open(self._exit_path(job_id)) as f:
+                returncode = int(f.read().strip())
+        except (OSError, ValueError):
+            returncode = None
+        cancelled = os.path.exists(self._cancel_path(job_id))
+        if cancelled:
+            state, error = CANCELLED, 'cancelled'
+        elif returncode == 0 and not job.get('error'):
+            state, error = SUCCEEDED, None
+        else:
+            state = FAILED
+            error = job.get('error') or ('process exited while no API worker watched it' if returncode is None
+                                         else f'exited with code {returncode}')
+        job = dict(job, state=state, finished=time.time(), returncode=returncode, error=error)
+        progress = _last_progress(self.log_tail(job_id, 50))
+        if progress is not None:
+            job['progress'] = progress
+        self._save(job)
+        return job
+
+    # Queries ----------------------------------------------------------------
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        job = self._load(job_id)
+        return self._settle_orphan(job) if job is not None else None
+
+    def list(self, limit: int = 20) -> List[Dict]:
+        return [self._settle_orphan(job) for job in self._on_disk()[:limit]]
+
+    def active(self) -> Optional[Dict]:
+        for job in self._on_disk():
+            if job['state'] in ACTIVE and (job['id'] in self._procs or
+                                           self._settle_orphan(job)['state'] in ACTIVE):
+                return job
+        return None
+
+    def log_tail(self, job_id: str, lines: int = 200) -> List[str]:
+        """Last ``lines`` lines of the job's (current) log file"""
+        try:
+            with open(self.log_path(job_id), 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                f.seek(max(0, size - 256 * lines))
+                data = f.read()
+        except OSError:
+            return []
+        return data.decode('utf-8', 'replace').splitlines()[-lines:]
+
+    # Submission and control -------------------------------------------------
+
+    def submit(self, cmd: List[str], env: Optional[Dict[str, str]] = None, cwd: Optional[str] = None,
+               name: str = 'airdrop') -> Dict:
+        """Start ``cmd`` as the active job and return its state
+
+        Raises:
+            JobConflict: If another job is still active
+        """
+        with self._lock, self._submit_lock():
+            running = self.active()
+            if running is not None:
+                raise JobConflict(running['id'])
+            job_id = uuid.uuid4().hex[:12]
+            job = {
+                'id': job_id,
+                'name': name,
+                'state': QUEUED,
+                'created': time.time(),
+                'started': None,
+                'finished': None,
+                'pid': None,
+                'returncode': None,
+                'error': None,
+                'progress': {},
+            }
+            self._save(job)
+            # O_APPEND, so the child keeps writing at the end after a copy-truncate rotation
+            with open(self.log_path(job_id), 'ab') as log_f:
+                proc = subprocess.Popen(
+                    ['/bin/sh', '-c', _EXIT_WRAPPER, self._exit_path(job_id)] + list(cmd),
+                    cwd=cwd, env=dict(os.environ, **(env or {}), PYTHONUNBUFFERED='1'),
+                    stdin=subprocess.DEVNULL, stdout=log_f, stderr=subprocess.STDOUT,
+                    start_new_session=True,
+                )
+            job.update(state=RUNNING, started=time.time(), pid=proc.pid)
+            self._jobs[job_id] = job
+            self._procs[job_id] = proc
+            self._save(job)
+        logger.info(f"Admin job {job_id} started (pid {proc.pid}): {' '.join(cmd)}")
+        threading.Thread(target=self._follow, args=(job_id, proc), name=f'job-{job_id}', daemon=True).start()
+        self._prune()
+        return dict(job)
+
+    def cancel(self, job_id: str) -> Optional[Dict]:
+        """Ask a job to stop; returns its state (None if unknown)"""
+        job = self.get(job_id)
+        if job is None or job['state'] not in ACTIVE:
+            return job
+        # The watching process (maybe another API worker) sees the marker; the job
+        # stays active, blocking new runs, until every process of its group is gone
+        open(self._cancel_path(job_id), 'a').close()
+        self._signal_group(job.get('pid'), signal.SIGTERM)
+        logger.info(f"Admin job {job_id} cancellation requested")
+        return self.get(job_id)
+
+    def shutdown(self):
+        """Stop watching; running jobs keep going (they write to their log file,
+        not to this process) and are followed by state and log file afterwards"""
+        with self._lock:
+            for job in self._jobs.values():
+                self._save(job)
+
+    # Watching ---------------------------------------------------------------
+
+    def _running(self, proc: subprocess.Popen) -> bool:
+        # poll() reaps the wrapper, so a zombie does not count as alive
+        return proc.poll() is None or _group_alive(proc.pid)
+
+    def _rotate(self, job_id: str):
+        """Copy the log to ``.1`` (shifting older backups) and truncate it
+
+        Lines the child writes between the copy and the truncate are lost,
+        as with logrotate's copytruncate.
+        """
+        base = self.log_path(job_id)
+        for i in range(self.log_backups - 1, 0, -1):
+            if os.path.exists(f'{base}.{i}'):
+                os.replace(f'{base}.{i}', f'{base}.{i + 1}')
+        if self.log_backups:
+            shutil.copyfile(base, f'{base}.1')
+        with open(base, 'r+b') as f:
+            f.truncate(0)
+
+    def _follow(self, job_id: str, proc: subprocess.Popen, poll_interval: float = 0.5):
+        """Tail the job's log for progress lines until its process group is gone"""
+        watcher = threading.Thread(target=self._watch, args=(job_id, proc), daemon=True)
+        watcher.start()
+        flushed = 0.0
+        offset = 0
+        partial = b''
+        try:
+            while True:
+                running = self._running(proc)
+                try:
+                    with open(self.log_path(job_id), 'rb') as f:
+                        if os.fstat(f.fileno()).st_size < offset:
+                            offset, partial = 0, b''  # rotated
+                        f.seek(offset)
+                        data = f.read()
+                        offset = f.tell()
+                except OSError:
+                    data = b''
+                *lines, partial = (partial + data).split(b'\n')
+                progress = _last_progress([raw.decode('utf-8', 'replace') for raw in lines])
+                if progress is not None:
+                    with self._lock:
+                        self._jobs[job_id]['progress'] = progress
+                        if time.monotonic() - flushed >= self.flush_interval:
+                            flushed = time.monotonic()
+                            self._save(self._jobs[job_id])
+                if not running:
+                    break
+                if self.log_max_bytes and offset > self.log_max_bytes:
+                    self._rotate(job_id)
+                    offset, partial = 0, b''
+                time.sleep(poll_interval)
+        finally:
+            returncode = proc.wait()
+            watcher.join()
+            self._finish(job_id, returncode)
+
+    def _watch(self, job_id: str, proc: subprocess.Popen):
+        """Enforce the timeout and cross-process cancellation while the job runs"""
+        deadline = time.monotonic() + self.timeout if self.timeout else None
+        term_sent = None
+        while self._running(proc):
+            cancelled = os.path.exists(self._cancel_path(job_id))
+            timed_out = deadline is not None and time.monotonic() > deadline
+            if (cancelled or timed_out) and term_sent is None:
+                with self._lock:
+                    self._jobs[job_id]['error'] = 'cancelled' if cancelled else f'timed out after {self.timeout:.0f}s'
+                term_sent = time.monotonic()
+                self._signal(proc, signal.SIGTERM)
+            elif term_sent is not None and time.monotonic() - term_sent > self.kill_grace:
+                self._signal(proc, signal.SIGKILL)
+            time.sleep(0.5)
+
+    @classmethod
+    def _signal(cls, proc: subprocess.Popen, sig: int):
+        cls._signal_group(proc.pid, sig)
+
+    @staticmethod
+    def _signal_group(pgid: Optional[int], sig: int):
+        if not pgid:
+            return
+        try:
+            os.killpg(pgid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _finish(self, job_id: str, returncode: int):
+        cancelled = os.path.exists(self._cancel_path(job_id))
+        with self._lock:
+            job = self._jobs.pop(job_id)
+            self._procs.pop(job_id, None)
+            if cancelled:
+                state = CANCELLED
+            elif returncode == 0 and not job['error']:
+                state = SUCCEEDED
+            else:
+                state = FAILED
+                job['error'] = job['error'] or f'exited with code {returncode}'
+            job.update(state=state, finished=time.time(), returncode=returncode)
+            self._save(job)
+        logger.info(f"Admin job {job_id} {state} (exit code {returncode})")
+
+    def _prune(self):
+        """Delete state and logs of finished jobs beyond ``keep``"""
+        finished = [j for j in self._on_disk() if j['state'] not in ACTIVE]
+        for job in finished[self.keep:]:
+            base = self.log_path(job['id'])
+            extra = [self._cancel_path(job['id']), self._exit_path(job['id'])]
+            for path in [self._state_path(job['id']), base] + [f'{base}.{i}' for i in range(1, self.log_backups + 1)] + extra:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+
+    async def events(self, job_id: str, interval: float = 1.0,
+                     disconnected: Optional[Callable[[], Awaitable[bool]]] = None) -> AsyncIterator[Optional[Dict]]:
+        """Job state each time it changes, until it finishes; None between changes (keep-alive)
+
+        Sleeps on the event loop rather than holding a threadpool worker per
+        open stream, and stops once ``disconnected()`` returns true.
+        """
+        last = None
+        while True:
+            if disconnected is not None and await disconnected():
+                return
+            job = self.get(job_id)
+            if job is None:
+                return
+            if job != last:
+                last = job
+                yield job
+            else:
+                yield None
+            if job['state'] not in ACTIVE:
+                return
+            await asyncio.sleep(interval)
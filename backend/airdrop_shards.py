@@ -0,0 +1,219 @@
+"""
+Airdrop Shards - Deterministic partitioning of an airdrop across worker processes or hosts
+Wallet-hash shards, SQLite shard leases with expiry, and the merge of per-shard journals
+"""
+import os
+import hashlib
+import logging
+import sqlite3
+import time
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS shards (
+    shard INTEGER PRIMARY KEY,
+    state TEXT NOT NULL,
+    worker TEXT,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    recipients INTEGER,
+    ok INTEGER,
+    errors INTEGER,
+    error TEXT,
+    updated REAL NOT NULL
+);
+"""
+
+
+class ShardMismatch(Exception):
+    """Raised when a shard directory was set up for a different run"""
+
+
+class Lease(NamedTuple):
+    shard: int
+    worker: str
+    lease_until: float
+    attempt: int
+
+
+def shard_of(wallet: str, shards: int) -> int:
+    """Shard a wallet belongs to: stable across processes, hosts and runs"""
+    digest = hashlib.sha256(wallet.encode()).digest()
+    return int.from_bytes(digest[:8], 'big') % shards
+
+
+def shard_rows(indexed_rows: Iterable[Tuple[int, tuple]], shard: int, shards: int) -> Iterator[Tuple[int, tuple]]:
+    """(row index, planned row) pairs of one shard; rows keep their global index"""
+    for idx, row in indexed_rows:
+        if shard_of(row[0], shards) == shard:
+            yield idx, row
+
+
+def journal_path(shard_dir: str, shard: int) -> str:
+    return os.path.join(shard_dir, f'shard-{shard:04d}.journal.sqlite')
+
+
+class ShardLeases:
+    """Shard table shared by a coordinator and its workers
+
+    The coordinator creates one row per shard. A worker leases a pending
+    shard (or one whose lease expired because its worker died) for ``ttl``
+    seconds, renews the lease while it works and marks the shard done at
+    the end. Leasing is a single ``BEGIN IMMEDIATE`` transaction, so two
+    workers never lease the same shard at once; a worker that stalls past
+    its lease is fenced off by the shard's journal (TransferJournal.claim),
+    not by this table.
+
+    Workers on other hosts need the directory on a filesystem with working
+    POSIX locks and clocks that agree to well within ``ttl``.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        """Initialize shard leases
+
+        Args:
+            path: SQLite database file (created if missing)
+            timeout: Seconds to wait for another process's write lock
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=FULL')
+        self._conn.executescript(_SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def _write(self, sql: str, params: tuple = ()) -> int:
+        return self._conn.execute(sql, params).rowcount
+
+    def create(self, shards: int, meta: Dict[str, str]):
+        """Set up ``shards`` pending shards, or check an existing setup matches
+
+        Raises:
+            ShardMismatch: If the directory holds a run with other parameters
+        """
+        meta = dict(meta, shards=shards)
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            recorded = dict(self._conn.execute('SELECT key, value FROM meta'))
+            for key, value in meta.items():
+                if key in recorded and recorded[key] != str(value):
+                    raise ShardMismatch(f"shard {key} is {recorded[key]!r}, this run has {value!r}")
+            self._conn.executemany('INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)',
+                                   [(k, str(v)) for k, v in meta.items()])
+            now = time.time()
+            self._conn.executemany('INSERT OR IGNORE INTO shards (shard, state, updated) VALUES (?, ?, ?)',
+                                   [(shard, PENDING, now) for shard in range(shards)])
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def meta(self) -> Dict[str, str]:
+        return dict(self._conn.execute('SELECT key, value FROM meta'))
+
+    def acquire(self, worker: str, ttl: float) -> Optional[Lease]:
+        """Lease the next pending (or abandoned) shard; None when none is left"""
+        now = time.time()
+        self._conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self._conn.execute(
+                'SELECT shard, state, worker, attempts FROM shards '
+                'WHERE state = ? OR (state = ? AND lease_until < ?) ORDER BY attempts, shard LIMIT 1',
+                (PENDING, LEASED, now)).fetchone()
+            if row is None:
+                self._conn.execute('COMMIT')
+                return None
+            shard, state, previous, attempts = row
+            self._write('UPDATE shards SET state = ?, worker = ?, lease_until = ?, attempts = ?, updated = ? '
+                        'WHERE shard = ?', (LEASED, worker, now + ttl, attempts + 1, now, shard))
+            self._conn.execute('COMMIT')
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+        if state == LEASED:
+            logger.warning(f"Shard {shard}: lease of {previous} expired, taken over by {worker}")
+        return Lease(shard, worker, now + ttl, attempts + 1)
+
+    def renew(self, lease: Lease, ttl: float) -> bool:
+        """Extend a lease; False if it was lost (expired and taken over)"""
+        now = time.time()
+        return self._write('UPDATE shards SET lease_until = ?, updated = ? '
+                           'WHERE shard = ? AND worker = ? AND state = ?',
+                           (now + ttl, now, lease.shard, lease.worker, LEASED)) == 1
+
+    def complete(self, lease: Lease, recipients: int, ok: int, errors: int) -> bool:
+        """Mark a leased shard done; False if the lease was lost"""
+        return self._write('UPDATE shards SET state = ?, lease_until = NULL, recipients = ?, ok = ?, errors = ?, '
+                           'error = NULL, updated = ? WHERE shard = ? AND worker = ? AND state = ?',
+                           (DONE, recipients, ok, errors, time.time(), lease.shard, lease.worker, LEASED)) == 1
+
+    def release(self, lease: Lease, error: str):
+        """Hand a shard back after a failure, for this or another worker to retry"""
+        self._write('UPDATE shards SET state = ?, lease_until = NULL, error = ?, updated = ? '
+                    'WHERE shard = ? AND worker = ? AND state = ?',
+                    (PENDING, error, time.time(), lease.shard, lease.worker, LEASED))
+
+    def reopen(self) -> int:
+        """Make done shards with errors pending again (their journals skip what landed)"""
+        return self._write('UPDATE shards SET state = ?, updated = ? WHERE state = ? AND errors > 0',
+                           (PENDING, time.time(), DONE))
+
+    def status(self) -> List[Dict]:
+        cols = ('shard', 'state', 'worker', 'lease_until', 'attempts', 'recipients', 'ok', 'errors', 'error')
+        return [dict(zip(cols, row)) for row in
+                self._conn.execute(f'SELECT {", ".join(cols)} FROM shards ORDER BY shard')]
+
+
+def merged_rows(indexed_rows: Iterable[Tuple[int, tuple]], journals: Dict[int, object],
+                shards: int) -> Iterator[Dict]:
+    """Output rows for every planned recipient, with status from its shard's journal
+
+    A recipient is 'processed' when each of its transfers is confirmed in
+    the journal of the one shard its wallet hashes to; otherwise the status
+    lists each transfer's journal state, as a single-process run would.
+
+    Args:
+        indexed_rows: (row index, (wallet, gross, referral_amount, net, referrer)) in file order
+        journals: TransferJournal per shard
+        shards: Shard count
+    """
+    from backend.tx_pipeline import split_invalid, transfers_for_allocation
+
+    for idx, (wallet, gross, referral_amount, net, ref) in indexed_rows:
+        journal = journals[shard_of(wallet, shards)]
+        transfers, errors = split_invalid(transfers_for_allocation(wallet, net, ref, referral_amount,
+                                                                   row_key=str(idx)))
+        for t in transfers:
+            recorded = journal.transfer_state(t.key)
+            if recorded is None:
+                errors.append(f"{t.kind} not_sent")
+            elif recorded[0] != 'confirmed':
+                errors.append(f"{t.kind} {recorded[0]}: {(recorded[1] or '')[:50]}")
+        yield {
+            'wallet': wallet,
+            'gross': gross,
+            'net': net,
+            'referrer': ref or '',
+            'referral_amount': referral_amount,
+            'status': 'error: ' + '; '.join(errors) if errors else 'processed',
+        }
+
+
+def describe(status: List[Dict]) -> str:
+    """One-line progress summary of ShardLeases.status()"""
+    by_state: Dict[str, int] = {}
+    for s in status:
+        by_state[s['state']] = by_state.get(s['state'], 0) + 1
+    workers = sorted({s['worker'] for s in status if s['state'] == LEASED})
+    return (f"{by_state.get(DONE, 0)}/{len(status)} shards done, {by_state.get(LEASED, 0)} leased, "
+            f"{by_state.get(PENDING, 0)} pending" + (f" (workers: {', '.join(workers)})" if workers else ''))
@@ -0,0 +1,132 @@
+"""
+Allocation Engine - Streaming, constant-memory airdrop allocation
+Shared by the backend, the orchestrators and the allocation scripts.
+
+Two passes over the recipients CSV: pass one sums fixed-point weights,
+pass two emits each allocation as floor(AIRDROP_POOL * weight / total)
+using exact integer arithmetic. Memory use is O(1) in the number of rows.
+"""
+import csv
+import logging
+from decimal import Decimal, InvalidOperation, ROUND_HALF_EVEN
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Tokenomics
+TOTAL_SUPPLY = 850_000_000
+AIRDROP_PERCENT = 60
+AIRDROP_POOL = TOTAL_SUPPLY * AIRDROP_PERCENT // 100
+REFERRAL_BPS = 2400  # 24%
+
+# Weights are fixed-point integers with this many decimal places
+WEIGHT_DECIMALS = 9
+WEIGHT_SCALE = 10 ** WEIGHT_DECIMALS
+_QUANTUM = Decimal(1).scaleb(-WEIGHT_DECIMALS)
+
+
+class Allocation(NamedTuple):
+    wallet: str
+    amount: int
+    referrer: Optional[str]
+
+
+def parse_weight(raw: Optional[str]) -> int:
+    """Parse a CSV weight into fixed-point units; invalid values count as 1"""
+    s = (raw or '').strip() or '1'
+    # str.isdigit() and Decimal() also accept non-ASCII digits ('²', '٣'); weights are ASCII only
+    if s.isascii() and s.isdigit():
+        return int(s) * WEIGHT_SCALE
+    try:
+        d = Decimal(s)
+        if not (s.isascii() and d.is_finite()):
+            raise InvalidOperation
+    except InvalidOperation:
+        logger.warning(f"Invalid weight value '{s}', using default 1")
+        return WEIGHT_SCALE
+    if d < 0:
+        logger.warning(f"Negative weight '{s}', using 0")
+        return 0
+    return int(d.quantize(_QUANTUM, rounding=ROUND_HALF_EVEN).scaleb(WEIGHT_DECIMALS))
+
+
+def iter_recipients(path: str) -> Iterator[Tuple[str, int, Optional[str]]]:
+    """Stream (wallet, weight_fp, referrer) rows, skipping empty wallets"""
+    with open(path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if not header:
+            return
+        cols = {name.strip(): i for i, name in enumerate(header)}
+        if 'wallet' not in cols:
+            raise ValueError(f"Recipients CSV has no 'wallet' column: {path}")
+        wi = cols['wallet']
+        gi = cols.get('weight')
+        ri = cols.get('referrer')
+        for row in reader:
+            if len(row) <= wi:
+                continue
+            wallet = row[wi].strip()
+            if not wallet:
+                continue
+            weight = parse_weight(row[gi] if gi is not None and gi < len(row) else None)
+            ref = (row[ri].strip() or None) if ri is not None and ri < len(row) else None
+            yield wallet, weight, ref
+
+
+def sum_weights(rows: Iterable[Tuple[str, int, Optional[str]]]) -> Tuple[int, int]:
+    """Pass one: (total_weight_fp, row_count)"""
+    total = count = 0
+    for _, weight, _ in rows:
+        total += weight
+        count += 1
+    return total, count
+
+
+def allocate(weight: int, total: int, pool: int = AIRDROP_POOL) -> int:
+    """floor(pool * weight / total) in exact integer arithmetic"""
+    return pool * weight // total if total > 0 else 0
+
+
+def split_referral(gross: int, has_referrer: bool) -> Tuple[int, int]:
+    """Return (referral_amount, net) for a gross allocation"""
+    referral = (gross * REFERRAL_BPS) // 10000 if has_referrer else 0
+    return referral, gross - referral
+
+
+def iter_allocations(path: str, pool: int = AIRDROP_POOL,
+                     total: Optional[int] = None) -> Iterator[Allocation]:
+    """Pass two: stream allocations for a recipients CSV
+
+    Args:
+        path: Recipients CSV (wallet, weight, referrer)
+        pool: Token pool to distribute
+        total: Precomputed total weight; pass one runs first when omitted
+    """
+    if total is None:
+        total, _ = sum_weights(iter_recipients(path))
+    if total <= 0:
+        logger.error("Total weight is zero or negative")
+        return
+    for wallet, weight, ref in iter_recipients(path):
+        yield Allocation(wallet, pool * weight // total, ref)
+
+
+def compute_allocations(rows: List[Dict], pool: int = AIRDROP_POOL) -> List[Dict]:
+    """In-memory variant for callers that already hold rows
+
+    Rows carry a fixed-point ``weight`` (see parse_weight).
+    """
+    total = sum(r['weight'] for r in rows)
+    if total <= 0:
+        logger.error("Total weight is zero or negative")
+        return []
+    return [
+        {'wallet': r['wallet'], 'amount': pool * r['weight'] // total, 'referrer': r.get('referrer')}
+        for r in rows
+    ]
+
+
+def allocation_map(path: str, pool: int = AIRDROP_POOL) -> Dict[str, int]:
+    """{wallet: amount} for a recipients CSV (used by the backend index)"""
+    return {a.wallet: a.amount for a in iter_allocations(path, pool)}
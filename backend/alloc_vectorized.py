@@ -0,0 +1,184 @@
+"""
+Vectorized Allocation - NumPy implementation of the allocation engine
+Computes gross, referral and net for all recipients in a few array operations.
+
+Amounts are exact: each gross is floor(pool * weight / total), as in
+backend.alloc_engine. Weights are reduced by their gcd; when the total then
+fits, a float64 estimate is corrected with exact int64 residuals, otherwise
+rows whose float quotient is near an integer are recomputed exactly. With
+``distribute_dust`` the floor remainders are handed out one unit at a time
+by largest remainder (ties to the earlier row), so the grosses sum to the
+pool exactly.
+
+Requires numpy (optional dependency; only imported by --vectorized callers).
+"""
+import logging
+from decimal import Decimal
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from backend.alloc_engine import AIRDROP_POOL, REFERRAL_BPS, WEIGHT_DECIMALS, iter_recipients
+
+logger = logging.getLogger(__name__)
+
+# Residuals are exact in wrapping int64 math while |residual| < 2**63,
+# which holds when the (gcd-reduced) total weight is below 2**62;
+# larger totals take the float path with exact fix-ups
+MAX_TOTAL = 1 << 62
+# ...and the float64 estimate they correct is within one unit of the floor:
+# its relative error is under 3 * 2**-53, i.e. under one unit of a pool
+# below 2**51 (larger pools take the float path too)
+MAX_INT64_POOL = 1 << 51
+# Largest fixed-point weight an int64 column holds (~9.22e9 at 9 decimals);
+# files with larger weights must use the streaming engine (backend.alloc_engine)
+MAX_WEIGHT = (1 << 63) - 1
+
+
+class RecipientColumns(NamedTuple):
+    wallets: List[str]
+    referrers: List[Optional[str]]
+    weights: np.ndarray  # int64 fixed-point (alloc_engine.WEIGHT_DECIMALS)
+
+
+class VectorAllocations(NamedTuple):
+    gross: np.ndarray
+    referral: np.ndarray
+    net: np.ndarray
+    dust: int  # units added by largest-remainder distribution (0 when disabled)
+
+
+def load_columns(path: str) -> RecipientColumns:
+    """Load a recipients CSV into columns (weights parsed by alloc_engine)
+
+    Raises:
+        ValueError: If a weight does not fit int64 (above MAX_WEIGHT)
+    """
+    wallets, referrers, weights = [], [], []
+    for wallet, weight, ref in iter_recipients(path):
+        if weight > MAX_WEIGHT:
+            raise ValueError(f"weight of {wallet} ({Decimal(weight).scaleb(-WEIGHT_DECIMALS)}) exceeds the vectorized "
+                             f"limit of {Decimal(MAX_WEIGHT).scaleb(-WEIGHT_DECIMALS)}; "
+                             f"use the streaming allocation engine")
+        wallets.append(wallet)
+        referrers.append(ref)
+        weights.append(weight)
+    return RecipientColumns(wallets, referrers, np.array(weights, dtype=np.int64))
+
+
+def exact_total(weights: np.ndarray) -> int:
+    """Exact sum of a non-negative int64 array as a Python int (no overflow)"""
+    hi = int((weights >> 32).sum())
+    lo = int((weights & 0xFFFFFFFF).sum())
+    return (hi << 32) + lo
+
+
+def _floor_int64(weights: np.ndarray, pool: int, total: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact floors and remainders via int64 residual correction (total < 2**62, pool < 2**51)"""
+    est = np.floor(weights.astype(np.float64) * (pool / total)).astype(np.int64)
+    # True residual lies in [-total, 2 * total), so wrapping int64 math is exact
+    with np.errstate(over='ignore'):
+        rem = weights * np.int64(pool) - est * np.int64(total)
+    low = rem < 0
+    est[low] -= 1
+    rem[low] += total
+    high = rem >= total
+    est[high] += 1
+    rem[high] -= total
+    return est, rem
+
+
+def _floor_float(weights: np.ndarray, pool: int, total: int, eps: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact floors for large totals; returns (floors, remainder / total as float64)
+
+    The float64 quotient is within ``eps`` of the true value, so its floor is
+    exact unless the fraction is within ``eps`` of an integer; those rows are
+    recomputed with Python integers.
+    """
+    q = weights.astype(np.float64) * (pool / total)
+    est = np.floor(q)
+    frac = q - est
+    est = est.astype(np.int64)
+    near = np.flatnonzero((frac < eps) | (frac > 1.0 - eps))
+    for i, w in zip(near.tolist(), weights[near].tolist()):
+        quot, rem = divmod(pool * w, total)
+        est[i] = quot
+        frac[i] = rem / total
+    return est, frac
+
+
+def _largest_remainder_float(weights: np.ndarray, frac: np.ndarray, dust: int,
+                             pool: int, total: int, eps: float) -> np.ndarray:
+    """Indices of the ``dust`` largest exact remainders (ties to the earlier row)
+
+    Float fractions decide every row clearly above or below the cutoff; rows
+    within 2 * eps of it are ranked by their exact integer remainders.
+    """
+    order = np.argsort(-frac, kind='stable')
+    cutoff = frac[order[dust - 1]]
+    sure = np.flatnonzero(frac > cutoff + 2 * eps)
+    band = np.flatnonzero(np.abs(frac - cutoff) <= 2 * eps)
+    ranked = sorted(zip(band.tolist(), weights[band].tolist()),
+                    key=lambda t: (-((pool * t[1]) % total), t[0]))
+    picked = [i for i, _ in ranked[:dust - len(sure)]]
+    return np.concatenate([sure, np.array(picked, dtype=np.int64)])
+
+
+def floor_shares(weights: np.ndarray, pool: int, total: int,
+                 distribute_dust: bool = False) -> Tuple[np.ndarray, int]:
+    """floor(pool * w / total) for every weight, optionally plus largest-remainder dust
+
+    Returns:
+        (gross amounts, dust units distributed)
+    """
+    if total <= 0:
+        raise ValueError('total weight must be positive')
+    g = int(np.gcd.reduce(weights)) if len(weights) else 1
+    if g > 1:
+        weights = weights // g
+        total //= g
+
+    if total < MAX_TOTAL and pool < MAX_INT64_POOL:
+        gross, rem = _floor_int64(weights, pool, total)
+        dust = pool - int(gross.sum()) if distribute_dust else 0
+        if dust > 0:
+            gross[np.argsort(-rem, kind='stable')[:dust]] += 1
+        return gross, dust
+
+    # Float64 quotient error is a few ulps of pool; leave a wide margin
+    eps = max(1e-6, pool * 2.0 ** -40)
+    gross, frac = _floor_float(weights, pool, total, eps)
+    dust = pool - int(gross.sum()) if distribute_dust else 0
+    if dust > 0:
+        gross[_largest_remainder_float(weights, frac, dust, pool, total, eps)] += 1
+    return gross, dust
+
+
+def compute(weights: np.ndarray, has_referrer: np.ndarray, pool: int = AIRDROP_POOL,
+            distribute_dust: bool = False) -> VectorAllocations:
+    """Vectorized gross/referral/net for all recipients
+
+    Args:
+        weights: int64 fixed-point weights
+        has_referrer: bool array, True where the row has a referrer
+        pool: Token pool to distribute
+        distribute_dust: Hand the floor remainder out by largest remainder
+    """
+    total = exact_total(weights)
+    if total <= 0:
+        logger.error("Total weight is zero or negative")
+        empty = np.zeros(len(weights), dtype=np.int64)
+        return VectorAllocations(empty, empty.copy(), empty.copy(), 0)
+
+    gross, dust = floor_shares(weights, pool, total, distribute_dust)
+
+    referral = np.where(has_referrer, gross * REFERRAL_BPS // 10000, 0)
+    return VectorAllocations(gross, referral, gross - referral, dust)
+
+
+def compute_csv(path: str, pool: int = AIRDROP_POOL,
+                distribute_dust: bool = False) -> Tuple[RecipientColumns, VectorAllocations]:
+    """Load a recipients CSV and compute all allocations in one shot"""
+    cols = load_columns(path)
+    has_ref = np.fromiter((r is not None for r in cols.referrers), dtype=bool, count=len(cols.referrers))
+    return cols, compute(cols.weights, has_ref, pool, distribute_dust)
@@ -0,0 +1,188 @@
+"""
+Allocation Index - Process-wide in-memory view of airdrop allocations
+Parses the allocation source once and rebuilds only when the file changes
+"""
+import os
+import csv
+import hashlib
+import logging
+import threading
+import time
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AllocationSnapshot(NamedTuple):
+    """Immutable view of the allocation set with precomputed totals"""
+    allocations: Dict[str, int]
+    total_allocated: int
+    recipients: int
+    source: Optional[str]
+    digest: Optional[str]
+
+
+EMPTY_SNAPSHOT = AllocationSnapshot({}, 0, 0, None, None)
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """Return the sha256 hex digest of a file, read in chunks"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def parse_allocations_csv(path: str) -> Dict[str, int]:
+    """Parse a precomputed allocations CSV (wallet, gross, net, ...)"""
+    allocs = {}
+    with open(path, 'r', newline='') as f:
+        r = csv.DictReader(f)
+        for row in r:
+            wallet = (row.get('wallet') or '').strip()
+            if not wallet:
+                continue
+            try:
+                allocs[wallet] = int(row.get('net', row.get('gross', 0)))
+            except (ValueError, TypeError):
+                logger.warning(f"Invalid allocation for {wallet}")
+    return allocs
+
+
+class AllocationIndex:
+    """Wallet -> allocation map held in memory and rebuilt on source change
+
+    The precomputed allocations file is preferred; when it is missing the
+    allocations are computed from the recipients CSV. Each lookup does at
+    most one ``stat`` call (throttled by ``check_interval``); the file is
+    only re-parsed when its mtime/size change *and* its content hash differs.
+    """
+
+    def __init__(self, alloc_file: str, recipients_csv: str,
+                 compute_fn: Callable[[str], Dict[str, int]],
+                 check_interval: float = 1.0):
+        """Initialize allocation index
+
+        Args:
+            alloc_file: Precomputed allocations CSV (preferred source)
+            recipients_csv: Recipients CSV used when alloc_file is missing
+            compute_fn: Callable computing {wallet: amount} from recipients_csv
+            check_interval: Minimum seconds between source change checks
+        """
+        self.alloc_file = alloc_file
+        self.recipients_csv = recipients_csv
+        self.compute_fn = compute_fn
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._snapshot = EMPTY_SNAPSHOT
+        self._stat_key: Optional[Tuple] = None
+        self._next_check = 0.0
+
+        self.rebuild_count = 0
+        self.last_rebuild_seconds = 0.0
+        self.total_rebuild_seconds = 0.0
+        self.last_rebuild_at: Optional[float] = None
+
+    def _current_source(self) -> Tuple[Optional[str], Optional[Tuple]]:
+        """Pick the active source file and return it with its stat key"""
+        for path in (self.alloc_file, self.recipients_csv):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            return path, (path, st.st_mtime_ns, st.st_size)
+        return None, None
+
+    def _build(self, path: str, digest: str) -> AllocationSnapshot:
+        """Parse the source file into a new snapshot"""
+        if path == self.alloc_file:
+            allocs = parse_allocations_csv(path)
+        else:
+            allocs = self.compute_fn(path)
+        return AllocationSnapshot(
+            allocations=allocs,
+            total_allocated=sum(allocs.values()),
+            recipients=len(allocs),
+            source=path,
+            digest=digest,
+        )
+
+    def snapshot(self) -> AllocationSnapshot:
+        """Return the current snapshot, rebuilding it if the source changed"""
+        now = time.monotonic()
+        if now < self._next_check:
+            return self._snapshot
+
+        with self._lock:
+            if now < self._next_check:
+                return self._snapshot
+            self._next_check = now + self.check_interval
+
+            path, stat_key = self._current_source()
+            if stat_key == self._stat_key:
+                return self._snapshot
+
+            if path is None:
+                logger.warning("No allocation source found; serving empty allocations")
+                self._snapshot = EMPTY_SNAPSHOT
+                self._stat_key = None
+                return self._snapshot
+
+            try:
+                digest = file_digest(path)
+                if digest == self._snapshot.digest and path == self._snapshot.source:
+                    # Touched but unchanged: keep the parsed snapshot
+                    self._stat_key = stat_key
+                    return self._snapshot
+
+                started = time.perf_counter()
+                snap = self._build(path, digest)
+                elapsed = time.perf_counter() - started
+            except Exception as e:
+                logger.error(f"Error rebuilding allocation index from {path}: {e}")
+                return self._snapshot
+
+            self._snapshot = snap
+            self._stat_key = stat_key
+            self.rebuild_count += 1
+            self.last_rebuild_seconds = elapsed
+            self.total_rebuild_seconds += elapsed
+            self.last_rebuild_at = time.time()
+            logger.info(
+                f"Allocation index rebuilt from {path}: {snap.recipients} recipients "
+                f"in {elapsed * 1000:.1f}ms"
+            )
+            return snap
+
+    def check_due(self) -> bool:
+        """True when the next snapshot() call would stat (and maybe re-parse) the source"""
+        return time.monotonic() >= self._next_check
+
+    def current(self) -> AllocationSnapshot:
+        """Last built snapshot without checking the source"""
+        return self._snapshot
+
+    def get(self, wallet: str) -> Optional[int]:
+        """O(1) allocation lookup for a wallet"""
+        return self.snapshot().allocations.get(wallet)
+
+    def invalidate(self):
+        """Force a source check on the next lookup"""
+        with self._lock:
+            self._stat_key = None
+            self._next_check = 0.0
+
+    def metrics(self) -> Dict:
+        """Rebuild counters for the metrics endpoint"""
+        snap = self._snapshot
+        return {
+            'source': snap.source,
+            'recipients': snap.recipients,
+            'total_allocated': snap.total_allocated,
+            'rebuild_count': self.rebuild_count,
+            'last_rebuild_ms': round(self.last_rebuild_seconds * 1000, 3),
+            'total_rebuild_ms': round(self.total_rebuild_seconds * 1000, 3),
+            'last_rebuild_at': self.last_rebuild_at,
+        }
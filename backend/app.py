@@ -1,5 +1,5 @@
 import os
-import csv
+import sys
 import json
 import hmac
 import hashlib
@@ -7,14 +7,14 @@ import base64
 import logging
 import time
 from decimal import Decimal
-from typing import Optional
-from functools import wraps
+from typing import Dict, List, Optional
 from pathlib import Path
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-import requests
-from solana.rpc.api import Client
+from starlette.concurrency import run_in_threadpool
+import anyio
 from solana.rpc.core import RPCException
 from pydantic import BaseModel, validator
 
@@ -26,6 +26,18 @@ from nacl.exceptions import BadSignatureError
 # Import site generator
 # Use package-qualified import so uvicorn started from repo root finds the module
 from backend.site_generator import SiteGenerator
+from backend.allocation_index import AllocationIndex
+from backend.alloc_engine import AIRDROP_POOL, allocation_map
+from backend.claims_store import ClaimsStore, AlreadyClaimed
+from backend.onchain import Holdings, HoldingsFetcher
+from backend.holdings_cache import HoldingsCache
+from backend.price_oracle import PriceOracle, DEFAULT_API_URL
+from backend.config_registry import ConfigRegistry, parse_monitored, parse_price_map
+from backend.rate_limiter import build_rate_limiter
+from backend.rpc_pool import RpcPool, rpc_endpoints
+from backend.merkle import MerkleTreeFile, verify_proof as verify_merkle_proof
+from backend.admin_jobs import JobConflict, JobManager
+from backend.site_store import BadCursor, SiteExists, SiteForbidden, SiteNotFound, SiteStore
 
 # Setup logging
 logging.basicConfig(
@@ -51,16 +63,19 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 BASE_PATH = Path(BASE_DIR).parent
 RECIPIENTS_CSV = os.path.join(BASE_DIR, '..', 'outputs', 'recipients_full_sample.csv')
 ALLOC_FILE = os.path.join(BASE_DIR, '..', 'outputs', 'allocations_live.csv')
-CLAIMS_FILE = os.path.join(BASE_DIR, '..', 'outputs', 'claims.json')
+CLAIMS_FILE = os.path.join(BASE_DIR, '..', 'outputs', 'claims.json')  # legacy, imported once
+CLAIMS_LOG = os.path.join(BASE_DIR, '..', 'outputs', 'claims.jsonl')
+MERKLE_FILE = os.environ.get('MERKLE_FILE', os.path.join(BASE_DIR, '..', 'outputs', 'allocations_merkle.bin'))
 
 # Sites configuration
 SITES_DIR = BASE_PATH / 'public' / 'sites'
 SITES_DB_FILE = BASE_PATH / 'config' / 'sites_db.json'
+SITE_MANIFEST = os.environ.get('SITE_MANIFEST', str(BASE_PATH / 'outputs' / 'site_manifest.sqlite'))
 SITES_DIR.mkdir(parents=True, exist_ok=True)
 SITES_DB_FILE.parent.mkdir(parents=True, exist_ok=True)
 
 # Initialize site generator
-site_generator = SiteGenerator(sites_dir=SITES_DIR)
+site_generator = SiteGenerator(sites_dir=SITES_DIR, manifest_path=SITE_MANIFEST)
 
 # Proof secret (HMAC). Set via env PROOF_SECRET. Falls back to ADMIN_TOKEN if present.
 PROOF_SECRET = os.environ.get('PROOF_SECRET') or os.environ.get('ADMIN_TOKEN')
@@ -75,172 +90,136 @@ PRICE_FILE = os.path.join(BASE_DIR, '..', 'config', 'token_prices.json')
 # Staking contract address (configurable via ENV or use default)
 STAKING_PROGRAM_ID = os.environ.get('STAKING_PROGRAM_ID', 'HMwy4JHwuLkMMR3q6B3atwZ4oUAGrc3yHtgC7MswWNY1')
 
-# RPC configuration
+# RPC configuration: one or more comma-separated endpoints behind a shared
+# pool (health scoring, 429 backoff, retries, hedged reads)
 RPC = os.environ.get('SOLANA_RPC', 'https://api.mainnet-beta.solana.com')
 try:
-    client = Client(RPC)
-    logger.info(f"Connected to Solana RPC: {RPC}")
+    rpc_pool = RpcPool(
+        rpc_endpoints(RPC),
+        rate_limit=float(os.environ.get('RPC_RATE_LIMIT', '0')),
+        retries=int(os.environ.get('RPC_RETRIES', '3')),
+        timeout=float(os.environ.get('RPC_TIMEOUT', '10')),
+    )
+    client = rpc_pool.client()
+    logger.info(f"Connected to Solana RPC: {', '.join(rpc_pool.urls)}")
 except Exception as e:
     logger.error(f"Failed to connect to Solana RPC: {e}")
+    rpc_pool = None
     client = None
 
-# Tokenomics
-TOTAL_SUPPLY = 850_000_000
-AIRDROP_PERCENT = 60
-AIRDROP_POOL = int(TOTAL_SUPPLY * AIRDROP_PERCENT / 100)
-REFERRAL_BPS = 2400
+# Single-call holdings lookups (sync Client + pooled AsyncClient)
+holdings_fetcher = HoldingsFetcher(RPC, client=client, pool=rpc_pool)
 
-# Rate limiting
-REQUEST_COUNTS = {}
+# Per-wallet holdings cache keyed by (wallet, monitored mint set)
+_slot_lag = os.environ.get('HOLDINGS_MAX_SLOT_LAG')
+holdings_cache = HoldingsCache(
+    maxsize=int(os.environ.get('HOLDINGS_CACHE_SIZE', '10000')),
+    ttl=float(os.environ.get('HOLDINGS_CACHE_TTL', '30')),
+    max_slot_lag=int(_slot_lag) if _slot_lag else None,
+)
+
+# Threadpool used by sync endpoints and offloaded file I/O
+THREADPOOL_SIZE = int(os.environ.get('THREADPOOL_SIZE', '40'))
+
+# Rate limiting (GCRA; RATE_LIMIT_BACKEND=sqlite shares limits across workers)
 RATE_LIMIT_WINDOW = 60  # seconds
 RATE_LIMIT_REQUESTS = 10  # requests per window
+rate_limiter = build_rate_limiter(
+    os.environ.get('RATE_LIMIT_BACKEND', 'memory'),
+    os.environ.get('RATE_LIMIT_DB', os.path.join(BASE_DIR, '..', 'outputs', 'rate_limits.sqlite')),
+)
 
 
 def rate_limit(max_requests: int = RATE_LIMIT_REQUESTS, window: int = RATE_LIMIT_WINDOW):
     """Rate limiting decorator for endpoints"""
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # Get client IP from request
-            request = None
-            for arg in args:
-                if isinstance(arg, Request):
-                    request = arg
-                    break
-            
-            if not request:
-                return func(*args, **kwargs)
-            
-            client_ip = request.client.host
-            now = time.time()
-            
-            if client_ip not in REQUEST_COUNTS:
-                REQUEST_COUNTS[client_ip] = []
-            
-            # Clean old requests outside the window
-            REQUEST_COUNTS[client_ip] = [
-                ts for ts in REQUEST_COUNTS[client_ip]
-                if now - ts < window
-            ]
-            
-            if len(REQUEST_COUNTS[client_ip]) >= max_requests:
-                logger.warning(f"Rate limit exceeded for {client_ip}")
-                raise HTTPException(status_code=429, detail="Too many requests")
-            
-            REQUEST_COUNTS[client_ip].append(now)
-            return func(*args, **kwargs)
-        return wrapper
-    return decorator
-
-
-def load_recipients(path):
-    """Load recipients from CSV with error handling"""
-    rows = []
-    if not os.path.exists(path):
-        logger.warning(f"Recipients CSV not found: {path}")
-        return rows
-    try:
-        with open(path, 'r', newline='') as f:
-            r = csv.DictReader(f)
-            for row in r:
-                wallet = row.get('wallet', '').strip()
-                if not wallet:
-                    logger.debug("Skipping row with empty wallet")
-                    continue
-                try:
-                    weight = Decimal(row.get('weight', '1'))
-                except (ValueError, TypeError):
-                    logger.warning(f"Invalid weight for {wallet}, using default 1")
-                    weight = Decimal(1)
-                ref = row.get('referrer', '').strip() or None
-                rows.append({'wallet': wallet, 'weight': weight, 'referrer': ref})
-        logger.info(f"Loaded {len(rows)} recipients from {path}")
-    except Exception as e:
-        logger.error(f"Error loading recipients CSV: {e}")
-    return rows
+    return rate_limiter.limit(max_requests, window)
 
 
-def compute_allocations(rows):
-    """Compute token allocations from weighted rows"""
-    if not rows:
-        logger.warning("No rows to compute allocations from")
-        return {}
-    
-    total_weight = sum(r['weight'] for r in rows)
-    if total_weight <= 0:
-        logger.error("Total weight is zero or negative")
-        return {}
-    
-    allocations = {}
-    for r in rows:
-        wallet = r['wallet']
-        try:
-            share = r['weight'] / total_weight
-            amount = int(Decimal(AIRDROP_POOL) * share)
-            allocations[wallet] = amount
-        except Exception as e:
-            logger.error(f"Error computing allocation for {wallet}: {e}")
-    
-    logger.info(f"Computed allocations for {len(allocations)} recipients")
-    return allocations
+# Process-wide allocation index, rebuilt only when the source file changes
+allocation_index = AllocationIndex(
+    ALLOC_FILE,
+    RECIPIENTS_CSV,
+    compute_fn=allocation_map,
+    check_interval=float(os.environ.get('ALLOC_CHECK_INTERVAL', '1.0')),
+)
+
+
+# Append-only claims ledger with in-memory wallet index and running totals
+claims_store = ClaimsStore(CLAIMS_LOG, legacy_json=CLAIMS_FILE)
+
+
+# Merkle commitment over the allocation set (built by backend/merkle.py)
+merkle_tree_file = MerkleTreeFile(MERKLE_FILE)
+
+
+# Admin-triggered airdrop runs: one at a time, in a child process, state shared via files
+admin_jobs = JobManager(
+    os.environ.get('ADMIN_JOBS_DIR', os.path.join(BASE_DIR, '..', 'outputs', 'admin_jobs')),
+    timeout=float(os.environ.get('ADMIN_JOB_TIMEOUT', '3600')),
+    log_max_bytes=int(os.environ.get('ADMIN_JOB_LOG_BYTES', str(5 * 1024 * 1024))),
+)
 
 
 def load_or_compute_allocations():
-    """Load precomputed allocations or compute from recipients"""
-    try:
-        # Prefer precomputed allocations file
-        if os.path.exists(ALLOC_FILE):
-            allocs = {}
-            with open(ALLOC_FILE, 'r') as f:
-                r = csv.DictReader(f)
-                for row in r:
-                    wallet = row['wallet'].strip()
-                    try:
-                        amount = int(row.get('net', row.get('gross', 0)))
-                        allocs[wallet] = amount
-                    except (ValueError, TypeError):
-                        logger.warning(f"Invalid allocation for {wallet}")
-            logger.info(f"Loaded {len(allocs)} precomputed allocations")
-            return allocs
-        
-        # Fall back to computing from recipients
-        rows = load_recipients(RECIPIENTS_CSV)
-        return compute_allocations(rows)
-    except Exception as e:
-        logger.error(f"Error in load_or_compute_allocations: {e}")
-        return {}
+    """Return the wallet -> amount map from the in-memory allocation index"""
+    return allocation_index.snapshot().allocations
+
+
+async def allocation_snapshot():
+    """Current allocation snapshot; source checks and rebuilds run off the event loop"""
+    if allocation_index.check_due():
+        return await run_in_threadpool(allocation_index.snapshot)
+    return allocation_index.current()
+
+
+async def merkle_tree():
+    """Current Merkle tree; the file check and reload run off the event loop"""
+    if merkle_tree_file.check_due():
+        return await run_in_threadpool(merkle_tree_file.get)
+    return merkle_tree_file.current()
+
+
+def snapshot_merkle_proof(tree, snapshot, wallet: str) -> Optional[Dict]:
+    """Merkle proof for ``wallet`` only if the tree commits to its snapshot amount
+
+    The tree file and the allocations file are republished separately; while
+    one is ahead of the other a proof would not match the allocation served
+    (and the claim would be rejected), so none is returned.
+    """
+    amount = snapshot.allocations.get(wallet)
+    if tree is None or not amount:
+        return None
+    proof = tree.proof_for_wallet(wallet)
+    if proof is None or proof['amount'] != amount:
+        return None
+    return proof
+
+
+# Monitored mints and static prices: parsed once, hot-reloaded on change
+config_registry = ConfigRegistry(poll_interval=float(os.environ.get('CONFIG_POLL_INTERVAL', '2')))
+config_registry.register(
+    'monitored', MONITORED_FILE, parse_monitored,
+    default=parse_monitored({'tokens': [], 'nfts': []}),
+)
+config_registry.register('prices', PRICE_FILE, parse_price_map)
 
 
 def load_monitored():
-    """Load monitored tokens/NFTs config with error handling"""
-    if not os.path.exists(MONITORED_FILE):
-        logger.debug(f"Monitored file not found: {MONITORED_FILE}")
-        return {'tokens': [], 'nfts': []}
-    
-    try:
-        with open(MONITORED_FILE, 'r') as f:
-            data = json.load(f)
-        logger.info(f"Loaded monitored config: {len(data.get('tokens', []))} tokens, {len(data.get('nfts', []))} NFTs")
-        return data
-    except Exception as e:
-        logger.error(f"Error loading monitored config: {e}")
-        return {'tokens': [], 'nfts': []}
+    """Immutable snapshot of the monitored tokens/NFTs config"""
+    return config_registry.get('monitored')
 
 
 def load_price_map():
-    """Load token price map with error handling"""
-    if not os.path.exists(PRICE_FILE):
-        logger.debug(f"Price file not found: {PRICE_FILE}")
-        return {}
-    
-    try:
-        with open(PRICE_FILE, 'r') as f:
-            prices = json.load(f)
-        logger.debug(f"Loaded prices for {len(prices)} tokens")
-        return prices
-    except Exception as e:
-        logger.error(f"Error loading price map: {e}")
-        return {}
+    """Immutable snapshot of the static token price map ({mint: Decimal})"""
+    return config_registry.get('prices')
+
+
+# Background USD prices for monitored tokens without a static price
+price_oracle = PriceOracle(
+    ids_fn=lambda: [t.get('coingecko_id') for t in load_monitored().get('tokens', [])],
+    api_url=os.environ.get('COINGECKO_API_URL', DEFAULT_API_URL),
+    interval=float(os.environ.get('PRICE_REFRESH_INTERVAL', '60')),
+)
 
 
 def validate_wallet_address(wallet: str) -> bool:
@@ -256,54 +235,76 @@ def validate_wallet_address(wallet: str) -> bool:
         return False
 
 
-def get_token_balance(wallet: str, mint: str) -> Decimal:
-    """Get token balance with comprehensive error handling"""
-    if not client:
-        logger.error("Solana client not initialized")
-        return Decimal(0)
-    
-    if not validate_wallet_address(wallet):
-        logger.warning(f"Invalid wallet address: {wallet}")
-        return Decimal(0)
-    
+def _fetch_holdings_uncached(wallet: str) -> Optional[Holdings]:
+    """Fetch every token balance for a wallet in one RPC call"""
     try:
-        res = client.get_token_accounts_by_owner(wallet, encoding='jsonParsed')
+        return holdings_fetcher.fetch(wallet)
     except RPCException as e:
         logger.warning(f"RPC error fetching token accounts for {wallet}: {e}")
-        return Decimal(0)
     except Exception as e:
-        logger.error(f"Error fetching token balance for {wallet}: {e}")
-        return Decimal(0)
-    
-    total = Decimal(0)
+        logger.error(f"Error fetching token accounts for {wallet}: {e}")
+    return None
+
+
+async def _fetch_holdings_uncached_async(wallet: str) -> Optional[Holdings]:
+    """Async variant of _fetch_holdings_uncached on the shared AsyncClient"""
     try:
-        for acc in res.get('result', {}).get('value', []):
-            info = acc.get('account', {}).get('data', {}).get('parsed', {}).get('info', {})
-            if info.get('mint') != mint:
-                continue
-            ta = info.get('tokenAmount', {})
-            amount = Decimal(ta.get('amount', '0'))
-            decimals = int(ta.get('decimals', 0))
-            total += amount / (Decimal(10) ** decimals)
+        return await holdings_fetcher.fetch_async(wallet)
+    except RPCException as e:
+        logger.warning(f"RPC error fetching token accounts for {wallet}: {e}")
     except Exception as e:
-        logger.error(f"Error parsing token balance response: {e}")
+        logger.error(f"Error fetching token accounts for {wallet}: {e}")
+    return None
+
+
+def monitored_mint_set(monitored) -> frozenset:
+    """Cache key component: every mint the eligibility rules look at"""
+    return monitored.get('mints', frozenset())
+
+
+def fetch_holdings(wallet: str, mints: frozenset = frozenset()) -> Optional[Holdings]:
+    """Fetch a wallet's holdings through the TTL/LRU cache"""
+    if not client:
+        logger.error("Solana client not initialized")
+        return None
+    
+    if not validate_wallet_address(wallet):
+        logger.warning(f"Invalid wallet address: {wallet}")
+        return None
     
-    return total
+    return holdings_cache.get_or_fetch(
+        (wallet, mints), lambda: _fetch_holdings_uncached(wallet)
+    )
 
 
-def check_onchain_eligibility(wallet: str):
-    """Check eligibility based on on-chain token/NFT holdings"""
+async def fetch_holdings_async(wallet: str, mints: frozenset = frozenset()) -> Optional[Holdings]:
+    """Async variant of fetch_holdings"""
     if not validate_wallet_address(wallet):
-        logger.warning(f"Invalid wallet for on-chain check: {wallet}")
-        return {'eligible': False, 'details': {}, 'reason': []}
+        logger.warning(f"Invalid wallet address: {wallet}")
+        return None
     
-    monitored = load_monitored()
+    return await holdings_cache.get_or_fetch_async(
+        (wallet, mints), lambda: _fetch_holdings_uncached_async(wallet)
+    )
+
+
+def get_token_balance(wallet: str, mint: str) -> Decimal:
+    """Get token balance for a single mint"""
+    holdings = fetch_holdings(wallet)
+    return holdings.balance(mint) if holdings else Decimal(0)
+
+
+def evaluate_onchain_eligibility(wallet: str, holdings: Optional[Holdings], monitored: dict):
+    """Evaluate monitored token/NFT rules against already-fetched holdings"""
     price_map = load_price_map()
     tokens = monitored.get('tokens', [])
     nfts = monitored.get('nfts', [])
     details = {'wallet': wallet, 'tokens': [], 'nfts': [], 'value_usd': 0}
     total_value = Decimal(0)
 
+    def balance_of(mint):
+        return holdings.balance(mint) if holdings else Decimal(0)
+
     # Check tokens
     for t in tokens:
         mint = t.get('mint')
@@ -312,33 +313,18 @@ def check_onchain_eligibility(wallet: str):
             continue
         
         cg = t.get('coingecko_id')
-        bal = get_token_balance(wallet, mint)
+        bal = balance_of(mint)
         price = None
         
-        # Try cached price first
+        # Static price first (validated as Decimal at config load)
         if price_map.get(mint) is not None:
-            try:
-                price = Decimal(str(price_map[mint]))
-            except (ValueError, TypeError):
-                logger.warning(f"Invalid cached price for {mint}")
-                price = None
+            price = price_map[mint]
         
-        # Try CoinGecko if no cached price
+        # Fall back to the background price oracle (never calls out here)
         elif cg:
-            try:
-                r = requests.get(
-                    f'https://api.coingecko.com/api/v3/simple/price?ids={cg}&vs_currencies=usd',
-                    timeout=5
-                )
-                r.raise_for_status()
-                j = r.json()
-                price = Decimal(str(j.get(cg, {}).get('usd', 0)))
-            except requests.RequestException as e:
-                logger.warning(f"Error fetching price from CoinGecko for {cg}: {e}")
-                price = None
-            except Exception as e:
-                logger.error(f"Unexpected error in price fetch: {e}")
-                price = None
+            price = price_oracle.get(cg)
+            if price is None:
+                logger.debug(f"No oracle price yet for {cg}")
         
         val = (price * bal) if price is not None else None
         if val is not None:
@@ -354,7 +340,7 @@ def check_onchain_eligibility(wallet: str):
     # Check NFTs
     for m in nfts:
         try:
-            bal = get_token_balance(wallet, m)
+            bal = balance_of(m)
             owns = bal >= 1
             details['nfts'].append({'mint': m, 'owns': owns})
         except Exception as e:
@@ -380,6 +366,26 @@ def check_onchain_eligibility(wallet: str):
     return {'eligible': eligible, 'details': details, 'reason': reason}
 
 
+def check_onchain_eligibility(wallet: str, monitored=None):
+    """Check eligibility based on on-chain token/NFT holdings"""
+    if not validate_wallet_address(wallet):
+        logger.warning(f"Invalid wallet for on-chain check: {wallet}")
+        return {'eligible': False, 'details': {}, 'reason': []}
+    monitored = monitored if monitored is not None else load_monitored()
+    holdings = fetch_holdings(wallet, monitored_mint_set(monitored))
+    return evaluate_onchain_eligibility(wallet, holdings, monitored)
+
+
+async def check_onchain_eligibility_async(wallet: str, monitored=None):
+    """Check on-chain eligibility with a single async RPC round-trip"""
+    if not validate_wallet_address(wallet):
+        logger.warning(f"Invalid wallet for on-chain check: {wallet}")
+        return {'eligible': False, 'details': {}, 'reason': []}
+    monitored = monitored if monitored is not None else load_monitored()
+    holdings = await fetch_holdings_async(wallet, monitored_mint_set(monitored))
+    return evaluate_onchain_eligibility(wallet, holdings, monitored)
+
+
 def sign_proof(wallet: str, amount: int) -> str:
     """Generate HMAC proof for airdrop claim"""
     try:
@@ -401,11 +407,26 @@ def verify_proof(wallet: str, amount: int, sig_b64: str) -> bool:
         return False
 
 
+def verify_claim_merkle_proof(tree, wallet: str, amount: int, index: int, proof: List[str]) -> bool:
+    """Verify a Merkle inclusion proof against the published allocation root"""
+    if tree is None:
+        return False
+    try:
+        siblings = [bytes.fromhex(h) for h in proof]
+        return verify_merkle_proof(tree.root, tree.leaf_count, index,
+                                   base58.b58decode(wallet), amount, siblings)
+    except Exception as e:
+        logger.error(f"Error verifying Merkle proof: {e}")
+        return False
+
+
 class ClaimIn(BaseModel):
     """Input model for airdrop claim"""
     wallet: str
     amount: int
-    proof: str
+    proof: Optional[str] = None
+    merkle_index: Optional[int] = None
+    merkle_proof: Optional[List[str]] = None
     message: Optional[str] = None
     signature: Optional[str] = None
     referrer: Optional[str] = None
@@ -425,20 +446,41 @@ class ClaimIn(BaseModel):
         return v
 
 
+@app.on_event('startup')
+def startup():
+    """Size the sync-endpoint threadpool and start background refreshers"""
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = THREADPOOL_SIZE
+    logger.info(f"Threadpool size: {THREADPOOL_SIZE}")
+    config_registry.start()
+    price_oracle.start()
+
+
+@app.on_event('shutdown')
+async def shutdown():
+    """Stop background refreshers and release pooled RPC connections"""
+    price_oracle.stop()
+    config_registry.stop()
+    admin_jobs.shutdown()
+    await holdings_fetcher.aclose()
+
+
 @app.get('/health')
-def health():
+async def health():
     """Health check endpoint"""
     return {
         'status': 'ok',
         'airdrop_pool': AIRDROP_POOL,
         'staking_program': STAKING_PROGRAM_ID,
-        'rpc_connected': client is not None
+        'rpc_connected': rpc_pool is not None and rpc_pool.healthy(),
+        'rpc_endpoints': [ep.status() for ep in rpc_pool.endpoints] if rpc_pool else [],
+        'holdings_cache': holdings_cache.metrics(),
     }
 
 
 @app.get('/api/eligibility')
 @rate_limit(max_requests=30)
-def eligibility(wallet: str, request: Request):
+async def eligibility(wallet: str, request: Request):
     """Check airdrop eligibility for a wallet"""
     logger.info(f"Eligibility check for {wallet[:10]}...")
     
@@ -451,7 +493,7 @@ def eligibility(wallet: str, request: Request):
         # Try on-chain eligibility first
         monitored = load_monitored()
         if monitored.get('tokens') or monitored.get('nfts'):
-            onchain = check_onchain_eligibility(wallet)
+            onchain = await check_onchain_eligibility_async(wallet, monitored)
             if onchain.get('eligible'):
                 # For on-chain qualified claims
                 proof = sign_proof(wallet, 0)
@@ -468,13 +510,14 @@ def eligibility(wallet: str, request: Request):
                 }
 
         # Fall back to CSV-based allocations
-        allocs = load_or_compute_allocations()
-        amount = allocs.get(wallet)
+        snapshot = await allocation_snapshot()
+        amount = snapshot.allocations.get(wallet)
         if not amount:
             logger.info(f"Wallet {wallet[:10]}... not in allocations")
             return {'wallet': wallet, 'eligible': False}
         
         proof = sign_proof(wallet, amount)
+        merkle_proof = snapshot_merkle_proof(await merkle_tree(), snapshot, wallet)
         logger.info(f"Wallet {wallet[:10]}... eligible for {amount} tokens")
         return {
             'wallet': wallet,
@@ -483,6 +526,7 @@ def eligibility(wallet: str, request: Request):
             'allocation_currency': 'TOKEN',
             'amount_usd': None,
             'proof': proof,
+            'merkle_proof': merkle_proof,
             'staking_program': STAKING_PROGRAM_ID,
         }
     except Exception as e:
@@ -492,13 +536,18 @@ def eligibility(wallet: str, request: Request):
 
 @app.post('/api/claim')
 @rate_limit(max_requests=5)
-def claim(inp: ClaimIn, request: Request):
+async def claim(inp: ClaimIn, request: Request):
     """Submit airdrop claim with wallet signature verification"""
     logger.info(f"Claim submission from {inp.wallet[:10]}...")
     
     try:
-        # Verify server-side proof first
-        if not verify_proof(inp.wallet, inp.amount, inp.proof):
+        # Verify the allocation proof first: Merkle inclusion or server HMAC
+        if inp.merkle_proof is not None and inp.merkle_index is not None:
+            proof_ok = verify_claim_merkle_proof(await merkle_tree(), inp.wallet, inp.amount,
+                                                 inp.merkle_index, inp.merkle_proof)
+        else:
+            proof_ok = bool(inp.proof) and verify_proof(inp.wallet, inp.amount, inp.proof)
+        if not proof_ok:
             logger.warning(f"Invalid proof for {inp.wallet[:10]}...")
             raise HTTPException(status_code=400, detail='Invalid proof')
 
@@ -533,8 +582,7 @@ def claim(inp: ClaimIn, request: Request):
             raise HTTPException(status_code=400, detail='Signature verification error')
 
         # Check allocation and idempotency
-        allocs = load_or_compute_allocations()
-        expected = allocs.get(inp.wallet)
+        expected = (await allocation_snapshot()).allocations.get(inp.wallet)
         if expected is None:
             logger.warning(f"Wallet {inp.wallet[:10]}... not eligible")
             raise HTTPException(status_code=404, detail='Not eligible')
@@ -543,21 +591,10 @@ def claim(inp: ClaimIn, request: Request):
             logger.warning(f"Amount mismatch for {inp.wallet[:10]}...: expected {expected}, got {inp.amount}")
             raise HTTPException(status_code=400, detail='Amount mismatch')
 
-        # Load existing claims and prevent double-claim
-        claims = []
-        if os.path.exists(CLAIMS_FILE):
-            try:
-                with open(CLAIMS_FILE, 'r') as f:
-                    claims = json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading claims file: {e}")
-                claims = []
-        
-        # Check if already claimed
-        for c in claims:
-            if c.get('wallet') == inp.wallet:
-                logger.warning(f"Double-claim attempt for {inp.wallet[:10]}...")
-                raise HTTPException(status_code=409, detail='Already claimed')
+        # Prevent double-claim
+        if claims_store.has_claimed(inp.wallet):
+            logger.warning(f"Double-claim attempt for {inp.wallet[:10]}...")
+            raise HTTPException(status_code=409, detail='Already claimed')
 
         # Record the claim
         entry = {
@@ -568,14 +605,16 @@ def claim(inp: ClaimIn, request: Request):
             'signature': inp.signature,
             'referrer': inp.referrer or ''
         }
-        claims.append(entry)
-        
+
         try:
-            with open(CLAIMS_FILE, 'w') as f:
-                json.dump(claims, f, indent=2)
+            # Blocks until the group commit fsync covers this record
+            await run_in_threadpool(claims_store.record, entry)
             logger.info(f"Claim recorded for {inp.wallet[:10]}... amount={inp.amount}")
+        except AlreadyClaimed:
+            logger.warning(f"Double-claim attempt for {inp.wallet[:10]}...")
+            raise HTTPException(status_code=409, detail='Already claimed')
         except Exception as e:
-            logger.error(f"Error writing claim to file: {e}")
+            logger.error(f"Error writing claim to ledger: {e}")
             raise HTTPException(status_code=500, detail='Error recording claim')
 
         return {
@@ -591,96 +630,131 @@ def claim(inp: ClaimIn, request: Request):
         raise HTTPException(status_code=500, detail='Internal server error')
 
 
-@app.post('/api/admin/run')
+def require_admin(request: Request):
+    """Check the admin token (Bearer header, x-admin-token header or token query param)"""
+    auth = request.headers.get('authorization', '') or ''
+    token = None
+    if auth.lower().startswith('bearer '):
+        token = auth.split(None, 1)[1].strip()
+
+    token = token or request.headers.get('x-admin-token') or request.query_params.get('token')
+
+    admin_token = os.environ.get('ADMIN_TOKEN')
+    if not admin_token or not token or not hmac.compare_digest(token, admin_token):
+        logger.warning(f"Unauthorized admin request: {request.url.path}")
+        raise HTTPException(status_code=403, detail='Forbidden')
+
+
+def job_urls(job: dict) -> dict:
+    base = f"/api/admin/jobs/{job['id']}"
+    return dict(job, status_url=base, events_url=f'{base}/events', log_url=f'{base}/log')
+
+
+@app.post('/api/admin/run', status_code=202)
 def admin_run(request: Request):
-    """Trigger airdrop distribution (admin only)"""
+    """Start an airdrop distribution job (admin only); returns at once with the job id"""
+    require_admin(request)
     logger.info("Admin run requested")
-    
+
+    # Always the journaled orchestrator with --resume on one journal: a run after a
+    # crash, cancel or timeout continues the previous one and never re-pays a transfer
+    cmd = [
+        sys.executable,
+        'outputs/airdrop_orchestrator.py',
+        'outputs/recipients_full_sample.csv',
+        '--output', 'outputs/allocations_live.csv',
+        '--journal', 'outputs/allocations_live.journal.sqlite',
+        '--progress-interval', '2',
+        '--yes',
+        '--resume',
+    ]
+    env = {
+        'ALLOW_LIVE': '1',
+        'TREASURY_KEYPAIR_PATH': os.environ.get('TREASURY_KEYPAIR_PATH', 'outputs/dev_treasury_keypair.json'),
+    }
     try:
-        # Accept Bearer token in Authorization header or query param
-        auth = request.headers.get('authorization', '') or ''
-        token = None
-        if auth.lower().startswith('bearer '):
-            token = auth.split(None, 1)[1].strip()
-        
-        token = token or request.headers.get('x-admin-token') or request.query_params.get('token')
-        
-        # Verify admin token
-        admin_token = os.environ.get('ADMIN_TOKEN')
-        if not admin_token or token != admin_token:
-            logger.warning("Unauthorized admin run attempt")
-            raise HTTPException(status_code=403, detail='Forbidden')
-        
-        # Prepare command
-        import subprocess
-        cmd = [
-            'python3',
-            'scripts/run_inproc_orchestrator.py',
-            'outputs/recipients_full_sample.csv',
-            '--mint', os.environ.get('DOJO3_TOKEN_MINT', ''),
-            '--treasury-ata', os.environ.get('TREASURY_TOKEN_ACCOUNT', ''),
-            '--yes'
-        ]
-        
-        logger.info(f"Executing orchestrator command: {' '.join(cmd)}")
-        
-        try:
-            p = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                timeout=300
-            )
-            out, _ = p.communicate()
-            
-            if p.returncode != 0:
-                logger.error(f"Orchestrator returned error code {p.returncode}")
-                raise HTTPException(status_code=500, detail=f'Orchestrator failed with code {p.returncode}')
-            
-            logger.info("Admin run completed successfully")
-            return {'output': out, 'status': 'success'}
-        except subprocess.TimeoutExpired:
-            logger.error("Orchestrator timeout")
-            p.kill()
-            raise HTTPException(status_code=500, detail='Orchestrator timeout')
-        except Exception as e:
-            logger.error(f"Orchestrator error: {e}")
-            raise HTTPException(status_code=500, detail=f'Run failed: {str(e)}')
-    
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Unexpected error in admin_run: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail='Internal server error')
+        job = admin_jobs.submit(cmd, env=env, cwd=str(BASE_PATH))
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=f'Job {e.job_id} is already running')
+    except OSError as e:
+        logger.error(f"Failed to start orchestrator: {e}")
+        raise HTTPException(status_code=500, detail='Failed to start job')
+    return job_urls(job)
+
+
+@app.get('/api/admin/jobs')
+def admin_jobs_list(request: Request, limit: int = 20):
+    """Recent admin jobs, newest first"""
+    require_admin(request)
+    return {'jobs': [job_urls(job) for job in admin_jobs.list(min(max(limit, 1), 100))]}
+
+
+@app.get('/api/admin/jobs/{job_id}')
+def admin_job_status(job_id: str, request: Request):
+    """Job state and latest progress (processed/succeeded/failed, tx/s)"""
+    require_admin(request)
+    job = admin_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Job not found')
+    return job_urls(job)
+
+
+@app.get('/api/admin/jobs/{job_id}/events')
+async def admin_job_events(job_id: str, request: Request):
+    """Server-sent events: the job state on every change until it finishes"""
+    require_admin(request)
+    if admin_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail='Job not found')
+
+    async def stream():
+        async for job in admin_jobs.events(job_id, disconnected=request.is_disconnected):
+            if job is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield f"event: {job['state']}\ndata: {json.dumps(job)}\n\n"
+
+    return StreamingResponse(stream(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.get('/api/admin/jobs/{job_id}/log')
+def admin_job_log(job_id: str, request: Request, lines: int = 200):
+    """Tail of the job's log"""
+    require_admin(request)
+    if admin_jobs.get(job_id) is None:
+        raise HTTPException(status_code=404, detail='Job not found')
+    return {'id': job_id, 'lines': admin_jobs.log_tail(job_id, min(max(lines, 1), 5000))}
+
+
+@app.post('/api/admin/jobs/{job_id}/cancel')
+def admin_job_cancel(job_id: str, request: Request):
+    """Stop a running job (SIGTERM, then SIGKILL if it does not exit)"""
+    require_admin(request)
+    job = admin_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail='Job not found')
+    return job_urls(job)
 
 
 @app.get('/api/status')
 @rate_limit(max_requests=20)
-def status(request: Request):
+async def status(request: Request):
     """Get airdrop distribution status"""
     try:
-        allocs = load_or_compute_allocations()
-        claims = []
-        
-        if os.path.exists(CLAIMS_FILE):
-            try:
-                with open(CLAIMS_FILE, 'r') as f:
-                    claims = json.load(f)
-            except Exception as e:
-                logger.error(f"Error loading claims: {e}")
-        
-        total_allocated = sum(allocs.values())
-        total_claimed = sum(c.get('amount', 0) for c in claims)
+        snapshot = await allocation_snapshot()
+        totals = claims_store.totals()
+
+        total_allocated = snapshot.total_allocated
+        total_claimed = totals['total_claimed']
         remaining = total_allocated - total_claimed
         claimed_percent = (total_claimed / total_allocated * 100) if total_allocated > 0 else 0
         
-        logger.debug(f"Status: {len(claims)} claims, {total_claimed} tokens claimed")
+        logger.debug(f"Status: {totals['claims']} claims, {total_claimed} tokens claimed")
         
         return {
-            'recipients': len(allocs),
+            'recipients': snapshot.recipients,
             'total_allocated': total_allocated,
-            'claims': len(claims),
+            'claims': totals['claims'],
             'total_claimed': total_claimed,
             'remaining': remaining,
             'claimed_percent': round(claimed_percent, 2),
@@ -690,27 +764,57 @@ def status(request: Request):
         logger.error(f"Error in status endpoint: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail='Internal server error')
 
-# ============= SITE MANAGER APIs =============
-SITES_FILE = os.path.join(BASE_DIR, '..', 'outputs', 'sites.json')
+@app.get('/api/merkle/root')
+async def merkle_root():
+    """Published Merkle root of the allocation set"""
+    tree = await merkle_tree()
+    if tree is None:
+        raise HTTPException(status_code=404, detail='Merkle tree not built')
+    return {'root': tree.root.hex(), 'leaf_count': tree.leaf_count}
 
-def load_sites():
-    """Load sites database"""
-    try:
-        if os.path.exists(SITES_FILE):
-            with open(SITES_FILE, 'r') as f:
-                return json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading sites: {e}")
-    return {}
 
-def save_sites(sites_data):
-    """Save sites database"""
-    try:
-        os.makedirs(os.path.dirname(SITES_FILE), exist_ok=True)
-        with open(SITES_FILE, 'w') as f:
-            json.dump(sites_data, f, indent=2)
-    except Exception as e:
-        logger.error(f"Error saving sites: {e}")
+@app.get('/api/merkle/proof')
+@rate_limit(max_requests=30)
+async def merkle_proof(wallet: str, request: Request):
+    """Merkle inclusion proof for a wallet's allocation"""
+    if not validate_wallet_address(wallet):
+        raise HTTPException(status_code=400, detail='Invalid wallet address format')
+    tree = await merkle_tree()
+    if tree is None:
+        raise HTTPException(status_code=404, detail='Merkle tree not built')
+    snapshot = await allocation_snapshot()
+    if not snapshot.allocations.get(wallet):
+        raise HTTPException(status_code=404, detail='Not eligible')
+    proof = snapshot_merkle_proof(tree, snapshot, wallet)
+    if proof is None:
+        raise HTTPException(status_code=409, detail='Merkle tree does not match the current allocations')
+    return proof
+
+
+@app.get('/api/metrics')
+async def metrics():
+    """Internal cache and index metrics"""
+    return {
+        'allocation_index': allocation_index.metrics(),
+        'claims': dict(claims_store.totals(), fsync_count=claims_store.fsync_count),
+        'holdings_cache': holdings_cache.metrics(),
+        'price_oracle': price_oracle.metrics(),
+        'config': config_registry.metrics(),
+        'rate_limiter': rate_limiter.metrics(),
+        'rpc': rpc_pool.metrics() if rpc_pool else None,
+        'admin_job': (admin_jobs.active() or {}).get('id'),
+        'threadpool': {
+            'size': THREADPOOL_SIZE,
+            'borrowed': anyio.to_thread.current_default_thread_limiter().borrowed_tokens,
+        },
+    }
+
+# ============= SITE MANAGER APIs =============
+SITES_FILE = os.path.join(BASE_DIR, '..', 'outputs', 'sites.json')  # legacy, imported once
+SITE_STORE_DB = os.environ.get('SITE_STORE_DB', os.path.join(BASE_DIR, '..', 'outputs', 'sites.sqlite'))
+
+# Site records by id (outputs/sites.json before scripts/migrate_sites.py)
+site_store = SiteStore(SITE_STORE_DB, 'sites', legacy_json=SITES_FILE)
 
 def generate_site_id():
     """Generate unique site ID"""
@@ -719,16 +823,19 @@ def generate_site_id():
 
 @app.get('/api/sites')
 @rate_limit(max_requests=20)
-def get_user_sites(wallet: str, request: Request):
-    """Get all sites for a wallet"""
+def get_user_sites(request: Request, wallet: Optional[str] = None, limit: int = 50,
+                   cursor: Optional[str] = None, template: Optional[str] = None,
+                   owner: Optional[str] = None, active: str = 'true', order: str = 'desc'):
+    """Get all sites for a wallet; without a wallet, a page of the user site listing"""
+    if wallet is None:
+        return list_all_sites(request, limit, cursor, template, owner, active, order)
     logger.info(f"Fetching sites for {wallet[:10]}...")
     
     if not validate_wallet_address(wallet):
         raise HTTPException(status_code=400, detail='Invalid wallet address')
     
     try:
-        sites_db = load_sites()
-        user_sites = [s for s in sites_db.values() if s.get('wallet') == wallet]
+        user_sites = site_store.by_wallet(wallet)
         
         return {'sites': user_sites, 'count': len(user_sites)}
     except Exception as e:
@@ -747,7 +854,6 @@ def create_site(request_data: dict, request: Request):
             raise HTTPException(status_code=400, detail='Invalid wallet address')
         
         site_id = generate_site_id()
-        sites_db = load_sites()
         
         site_data = {
             'id': site_id,
@@ -762,8 +868,7 @@ def create_site(request_data: dict, request: Request):
             'active': True
         }
         
-        sites_db[site_id] = site_data
-        save_sites(sites_db)
+        site_store.create(site_id, site_data)
         
         logger.info(f"Site {site_id} created successfully")
         return {'site_id': site_id, 'site': site_data}
@@ -782,22 +887,17 @@ def renew_site(request_data: dict, request: Request):
         site_id = request_data.get('site_id')
         wallet = request_data.get('wallet')
         
-        sites_db = load_sites()
-        
-        if site_id not in sites_db:
+        try:
+            site = site_store.update(site_id, {
+                'last_renewal': request_data.get('timestamp'),
+                'renewal_txid': request_data.get('txid'),
+                'active': True,
+            }, wallet=wallet)
+        except SiteNotFound:
             raise HTTPException(status_code=404, detail='Site not found')
-        
-        site = sites_db[site_id]
-        if site.get('wallet') != wallet:
+        except SiteForbidden:
             raise HTTPException(status_code=403, detail='Unauthorized')
         
-        site['last_renewal'] = request_data.get('timestamp')
-        site['renewal_txid'] = request_data.get('txid')
-        site['active'] = True
-        
-        sites_db[site_id] = site
-        save_sites(sites_db)
-        
         logger.info(f"Site {site_id} renewed successfully")
         return {'success': True, 'site': site}
     
@@ -817,18 +917,13 @@ def delete_site(request_data: dict, request: Request):
         site_id = request_data.get('site_id')
         wallet = request_data.get('wallet')
         
-        sites_db = load_sites()
-        
-        if site_id not in sites_db:
+        try:
+            site_store.delete(site_id, wallet=wallet)
+        except SiteNotFound:
             raise HTTPException(status_code=404, detail='Site not found')
-        
-        site = sites_db[site_id]
-        if site.get('wallet') != wallet:
+        except SiteForbidden:
             raise HTTPException(status_code=403, detail='Unauthorized')
         
-        del sites_db[site_id]
-        save_sites(sites_db)
-        
         logger.info(f"Site {site_id} deleted successfully")
         return {'success': True}
     
@@ -845,13 +940,11 @@ def get_site(site_id: str, request: Request):
     logger.info(f"Fetching site {site_id}...")
     
     try:
-        sites_db = load_sites()
+        site = site_store.get(site_id)
         
-        if site_id not in sites_db:
+        if site is None:
             raise HTTPException(status_code=404, detail='Site not found')
         
-        site = sites_db[site_id]
-        
         if not site.get('active'):
             raise HTTPException(status_code=410, detail='Site is inactive')
         
@@ -866,15 +959,8 @@ def get_site(site_id: str, request: Request):
 # USER SITES ENDPOINTS (subdomain: username.dojo3)
 # ============================================
 
-def load_sites_db():
-    """Load sites database"""
-    if SITES_DB_FILE.exists():
-        return json.loads(SITES_DB_FILE.read_text())
-    return {}
-
-def save_sites_db(sites: dict):
-    """Save sites database"""
-    SITES_DB_FILE.write_text(json.dumps(sites, indent=2))
+# User sites by username (config/sites_db.json before scripts/migrate_sites.py)
+user_site_store = SiteStore(SITE_STORE_DB, 'user_sites', legacy_json=str(SITES_DB_FILE))
 
 class CreateSiteRequest(BaseModel):
     """Request to create a user site"""
@@ -906,8 +992,8 @@ def create_user_site(payload: CreateSiteRequest, request: Request):
         username = payload.wallet[:8].lower()
         
         # Check if site already exists
-        sites_db = load_sites_db()
-        if username in sites_db and sites_db[username].get('active'):
+        existing = user_site_store.get(username)
+        if existing is not None and existing.get('active'):
             raise HTTPException(status_code=409, detail='Site already exists for this wallet')
         
         # Generate site HTML
@@ -921,8 +1007,8 @@ def create_user_site(payload: CreateSiteRequest, request: Request):
         html_path = site_generator.generate(username, site_data)
         logger.info(f"Generated site at: {html_path}")
         
-        # Save to sites database
-        sites_db[username] = {
+        # Save to sites database (a concurrent create for the same wallet gets 409)
+        site_record = {
             'username': username,
             'wallet': payload.wallet,
             'name': payload.name,
@@ -934,7 +1020,10 @@ def create_user_site(payload: CreateSiteRequest, request: Request):
             'active': True,
             'url': f'https://{username}.dojo3'
         }
-        save_sites_db(sites_db)
+        try:
+            user_site_store.create(username, site_record, replace_inactive=True)
+        except SiteExists:
+            raise HTTPException(status_code=409, detail='Site already exists for this wallet')
         
         return {
             'status': 'success',
@@ -966,16 +1055,14 @@ def delete_user_site(payload: dict, request: Request):
         username = wallet[:8].lower()
         
         # Check if site exists
-        sites_db = load_sites_db()
-        if username not in sites_db:
+        if user_site_store.get(username) is None:
             raise HTTPException(status_code=404, detail='Site not found')
         
         # Delete site files
         success = site_generator.delete_site(username)
         
         # Mark as inactive in database
-        sites_db[username]['active'] = False
-        save_sites_db(sites_db)
+        user_site_store.update(username, {'active': False})
         
         logger.info(f"Site {username} deleted")
         
@@ -997,13 +1084,11 @@ def get_user_site_info(username: str, request: Request):
     logger.info(f"Fetching site info for {username}...")
     
     try:
-        sites_db = load_sites_db()
+        site = user_site_store.get(username)
         
-        if username not in sites_db:
+        if site is None:
             raise HTTPException(status_code=404, detail='Site not found')
         
-        site = sites_db[username]
-        
         if not site.get('active'):
             raise HTTPException(status_code=410, detail='Site is inactive')
         
@@ -1019,26 +1104,48 @@ def get_user_site_info(username: str, request: Request):
         logger.error(f"Error fetching site: {e}")
         raise HTTPException(status_code=500, detail='Failed to fetch site')
 
-@app.get('/api/sites')
-@rate_limit(max_requests=20)
-def list_all_sites(request: Request):
-    """List all active sites"""
-    logger.info("Listing all sites...")
-    
+SITE_PAGE_MAX = 200
+
+
+def list_all_sites(request: Request, limit: int = 50, cursor: Optional[str] = None,
+                   template: Optional[str] = None, owner: Optional[str] = None,
+                   active: str = 'true', order: str = 'desc'):
+    """List user sites one page at a time (GET /api/sites without ``wallet``)
+
+    Sites are ordered by created_at (``order`` asc/desc) and filtered by
+    ``template``, ``owner`` wallet and ``active`` (true/false/all); pass the
+    returned ``next_cursor`` as ``cursor`` for the next page. The ETag is
+    derived from the store version, so an unchanged listing is answered
+    with 304 before the database is queried for rows.
+    """
+    if active not in ('true', 'false', 'all') or order not in ('asc', 'desc'):
+        raise HTTPException(status_code=400, detail="active must be true/false/all and order asc/desc")
+    limit = min(max(limit, 1), SITE_PAGE_MAX)
+    active_filter = None if active == 'all' else active == 'true'
+
+    query = json.dumps([limit, cursor, template, owner, active, order])
+    etag = '"' + hashlib.sha256(f'{user_site_store.version()}:{query}'.encode()).hexdigest()[:32] + '"'
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if etag in [t.strip() for t in request.headers.get('if-none-match', '').split(',')]:
+        return Response(status_code=304, headers=headers)
+
     try:
-        sites_db = load_sites_db()
-        active_sites = {k: v for k, v in sites_db.items() if v.get('active')}
-        
-        return {
-            'status': 'success',
-            'count': len(active_sites),
-            'sites': active_sites
-        }
-    
+        sites, next_cursor = user_site_store.page(limit, cursor, active=active_filter, template=template,
+                                                  wallet=owner, newest_first=order == 'desc')
+        total = user_site_store.count(active=active_filter, template=template, wallet=owner)
+    except BadCursor:
+        raise HTTPException(status_code=400, detail='Invalid cursor')
     except Exception as e:
         logger.error(f"Error listing sites: {e}")
         raise HTTPException(status_code=500, detail='Failed to list sites')
 
+    return JSONResponse({
+        'status': 'success',
+        'count': total,
+        'sites': [dict(site, username=key) for key, site in sites],
+        'next_cursor': next_cursor,
+    }, headers=headers)
+
 # Mount static files for serving user sites
 public_dir = BASE_PATH / 'public'
 if public_dir.exists():
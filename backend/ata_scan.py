@@ -0,0 +1,204 @@
+"""
+ATA Scan - Pre-flight check of recipients' associated token accounts
+Batched getMultipleAccounts over derived ATAs, with an on-disk result cache
+"""
+import os
+import asyncio
+import logging
+import sqlite3
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from solana.rpc.types import DataSliceOpts
+from solders.pubkey import Pubkey
+from spl.token.constants import TOKEN_PROGRAM_ID
+from spl.token.instructions import get_associated_token_address
+
+logger = logging.getLogger(__name__)
+
+# getMultipleAccounts accepts at most 100 accounts per call
+MULTIPLE_ACCOUNTS_BATCH = 100
+
+# Existence is all we need: ask for zero bytes of account data
+_NO_DATA = DataSliceOpts(offset=0, length=0)
+
+
+class AtaCache:
+    """SQLite cache of whether an owner's ATA for one mint exists
+
+    Entries older than ``max_age`` seconds count as unknown and are
+    rescanned. A stale "missing" is harmless (ATA creation is idempotent);
+    a stale "exists" would fail at send time if the account was closed
+    since, which is what ``max_age`` bounds. Lookups go through the
+    database, so the plan for millions of owners is not held in memory.
+    """
+
+    def __init__(self, path: str, mint: str, max_age: float = 86_400.0):
+        """Initialize ATA cache
+
+        Args:
+            path: SQLite database file (created if missing)
+            mint: Token mint the ATAs belong to
+            max_age: Seconds a scan result stays valid
+        """
+        self.path = path
+        self.mint = str(mint)
+        self.max_age = max_age
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS atas (mint TEXT NOT NULL, owner TEXT NOT NULL, '
+                           'exists_ INTEGER NOT NULL, checked REAL NOT NULL, PRIMARY KEY (mint, owner))')
+        self._conn.commit()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+    def get(self, owner: str) -> Optional[bool]:
+        """Whether the ATA exists, or None if never scanned or too old"""
+        row = self._conn.execute('SELECT exists_, checked FROM atas WHERE mint = ? AND owner = ?',
+                                 (self.mint, owner)).fetchone()
+        if row is None or time.time() - row[1] > self.max_age:
+            return None
+        return bool(row[0])
+
+    def put_many(self, results: Dict[str, bool]):
+        now = time.time()
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO atas (mint, owner, exists_, checked) VALUES (?, ?, ?, ?)',
+            [(self.mint, owner, int(exists), now) for owner, exists in results.items()])
+        self._conn.commit()
+
+    def __contains__(self, owner: str) -> bool:
+        """``owner in cache``: the owner's ATA is known to be missing
+
+        Lets the cache stand in for the ``missing_atas`` set of
+        backend.tx_pipeline.transfers_for_allocation.
+        """
+        return self.get(owner) is False
+
+
+class ScanReport(NamedTuple):
+    """Scan outcome; counts are per owner occurrence, i.e. per transfer"""
+    existing: int    # plain transfer
+    missing: int     # create + transfer
+    invalid: int     # not a public key (rejected at send time)
+    cached: int      # answered from the cache
+    rpc_calls: int
+    seconds: float
+
+    def lines(self) -> List[str]:
+        return [
+            f"ATA scan: {self.existing} transfers to existing accounts, "
+            f"{self.missing} need create+transfer, {self.invalid} invalid owners",
+            f"ATA scan: {self.cached} answered from cache, {self.rpc_calls} getMultipleAccounts calls "
+            f"in {self.seconds:.1f}s",
+        ]
+
+
+class AtaScanner:
+    """Derive owners' ATAs and check them with concurrent batched getMultipleAccounts
+
+    Owners are streamed; each is looked up in the cache first, and unknown
+    ones are queued in batches of 100. At most ``concurrency`` calls are in
+    flight, and only a bounded number of batches are queued, so memory stays
+    flat however many owners are scanned. Results are written to the cache.
+    """
+
+    def __init__(self, client, cache: AtaCache, concurrency: int = 8, retries: int = 3,
+                 program_id: Pubkey = TOKEN_PROGRAM_ID):
+        """Initialize scanner
+
+        Args:
+            client: solana AsyncClient
+            cache: AtaCache for the mint being distributed
+            concurrency: Maximum concurrent getMultipleAccounts calls
+            retries: Retry attempts per failed call
+            program_id: SPL token program the ATAs belong to
+        """
+        self.client = client
+        self.cache = cache
+        self.concurrency = concurrency
+        self.retries = retries
+        self.program_id = program_id
+        self.mint = Pubkey.from_string(cache.mint)
+        self.rpc_calls = 0
+
+    async def _check(self, owners: List[str], atas: List[Pubkey]) -> Dict[str, bool]:
+        for attempt in range(self.retries + 1):
+            try:
+                self.rpc_calls += 1
+                resp = await self.client.get_multiple_accounts(atas, data_slice=_NO_DATA)
+                return {owner: acc is not None for owner, acc in zip(owners, resp.value)}
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning(f"getMultipleAccounts failed (attempt {attempt + 1}): {e}")
+                await asyncio.sleep(min(5.0, 0.25 * 2 ** attempt))
+
+    async def scan(self, owners: Iterable[str]) -> ScanReport:
+        """Scan every owner (duplicates are fine) and return counts
+
+        Raises:
+            Exception: The RPC error of a batch that failed every retry
+        """
+        started = time.perf_counter()
+        self.rpc_calls = 0
+        counts = {'existing': 0, 'missing': 0, 'cached': 0, 'invalid': 0}
+        seen_batch: Dict[str, List] = {}  # owner -> [ata, occurrences]
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = set()
+
+        def tally(exists: bool, n: int = 1):
+            counts['existing' if exists else 'missing'] += n
+
+        async def run_batch(batch: Dict[str, List]):
+            try:
+                results = await self._check(list(batch), [ata for ata, _ in batch.values()])
+            finally:
+                slots.release()
+            self.cache.put_many(results)
+            for owner, exists in results.items():
+                tally(exists, batch[owner][1])
+
+        async def flush():
+            nonlocal seen_batch
+            batch, seen_batch = seen_batch, {}
+            await slots.acquire()
+            task = asyncio.create_task(run_batch(batch))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        try:
+            for owner in owners:
+                entry = seen_batch.get(owner)
+                if entry is not None:
+                    entry[1] += 1
+                    continue
+                cached = self.cache.get(owner)
+                if cached is not None:
+                    # Also repeats of an owner already scanned in an earlier batch
+                    counts['cached'] += 1
+                    tally(cached)
+                    continue
+                try:
+                    ata = get_associated_token_address(Pubkey.from_string(owner), self.mint, self.program_id)
+                except ValueError:
+                    counts['invalid'] += 1
+                    continue
+                seen_batch[owner] = [ata, 1]
+                if len(seen_batch) == MULTIPLE_ACCOUNTS_BATCH:
+                    await flush()
+            if seen_batch:
+                await flush()
+            if tasks:
+                await asyncio.gather(*list(tasks))
+        except BaseException:
+            for task in list(tasks):
+                task.cancel()
+            raise
+
+        return ScanReport(counts['existing'], counts['missing'], counts['invalid'], counts['cached'],
+                          self.rpc_calls, time.perf_counter() - started)
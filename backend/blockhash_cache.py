@@ -0,0 +1,141 @@
+"""
+Blockhash Cache - Background-refreshed recent blockhash for high-rate transaction building
+Hands out a cached blockhash until it nears expiry and tracks block height for expiry checks
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+
+from solana.rpc.commitment import Commitment
+from solders.hash import Hash
+
+logger = logging.getLogger(__name__)
+
+# Solana targets 400 ms slots
+SLOT_SECONDS = 0.4
+
+# Blocks past a blockhash's last valid height before a missing transaction is
+# treated as expired: covers RPC nodes lagging behind the one that reported
+# the height
+EXPIRY_MARGIN_BLOCKS = 32
+
+
+class BlockhashManager:
+    """One getLatestBlockhash per refresh interval instead of per transaction
+
+    A background task fetches the latest blockhash and block height every
+    ``refresh_interval`` seconds. ``get`` answers from the cache while the
+    blockhash is younger than ``max_age`` and has at least ``min_remaining``
+    blocks of validity left; otherwise (or before the first refresh) the
+    caller waits on a single shared fetch. A blockhash older than the cached
+    one (say, from a lagging endpoint in an RPC pool) is ignored.
+    """
+
+    def __init__(self, client, refresh_interval: float = 5.0, max_age: float = 20.0,
+                 min_remaining: int = 60, commitment: Commitment = Commitment('confirmed')):
+        """Initialize blockhash manager
+
+        Args:
+            client: solana AsyncClient
+            refresh_interval: Seconds between background refreshes
+            max_age: Seconds a blockhash is handed out after it was fetched
+            min_remaining: Blocks of validity a handed-out blockhash must have left
+            commitment: Commitment for the blockhash and block height
+        """
+        self.client = client
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.min_remaining = min_remaining
+        self.commitment = commitment
+        self.blockhash: Optional[Hash] = None
+        self.last_valid_height = 0
+        self.height = 0            # last block height reported by the RPC
+        self._height_at = 0.0
+        self.fetched_at = 0.0
+        self.refreshes = 0
+        self.hits = 0
+        self.waits = 0
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Fetch once and keep refreshing in the background"""
+        self._lock = asyncio.Lock()
+        await self.refresh()
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Blockhash refresh failed: {e}")
+
+    async def refresh(self):
+        """Fetch the latest blockhash and block height now"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            await self._fetch()
+
+    async def _fetch(self):
+        blockhash_resp, height_resp = await asyncio.gather(
+            self.client.get_latest_blockhash(self.commitment), self.client.get_block_height(self.commitment))
+        self.refreshes += 1
+        self.height = max(self.height, height_resp.value)
+        self._height_at = time.monotonic()
+        value = blockhash_resp.value
+        if value.last_valid_block_height >= self.last_valid_height:
+            self.blockhash = value.blockhash
+            self.last_valid_height = value.last_valid_block_height
+            self.fetched_at = time.monotonic()
+
+    def estimated_height(self) -> int:
+        """Block height extrapolated from the last refresh at one block per slot"""
+        return self.height + int((time.monotonic() - self._height_at) / SLOT_SECONDS)
+
+    def _fresh(self) -> bool:
+        return (self.blockhash is not None
+                and time.monotonic() - self.fetched_at <= self.max_age
+                and self.last_valid_height - self.estimated_height() >= self.min_remaining)
+
+    async def get(self) -> Tuple[Hash, int]:
+        """(recent blockhash, last block height at which it is valid)"""
+        if self._fresh():
+            self.hits += 1
+            return self.blockhash, self.last_valid_height
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._fresh():
+                self.waits += 1
+                await self._fetch()
+            return self.blockhash, self.last_valid_height
+
+    def expired(self, last_valid_height: int) -> bool:
+        """A transaction with this last valid height can no longer land
+
+        Decided on the block height the RPC reported, never on the
+        extrapolated one, so a stalled refresh cannot expire anything.
+        """
+        return self.height > last_valid_height + EXPIRY_MARGIN_BLOCKS
+
+    def metrics(self) -> Dict:
+        return {
+            'refreshes': self.refreshes,
+            'hits': self.hits,
+            'waits': self.waits,
+            'height': self.height,
+            'last_valid_height': self.last_valid_height,
+        }
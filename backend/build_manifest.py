@@ -0,0 +1,137 @@
+"""
+Build Manifest - Content hashes of generated sites and a log of the files each build changed
+Lets site builds skip unchanged sites and deploys sync only changed files
+"""
+import os
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WRITE = 'write'
+DELETE = 'delete'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    site TEXT PRIMARY KEY,
+    inputs TEXT NOT NULL,
+    files TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    built_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    action TEXT NOT NULL,
+    at REAL NOT NULL
+);
+"""
+
+
+class Build(NamedTuple):
+    inputs: str              # hash of everything the site is rendered from
+    files: Dict[str, str]    # file name -> sha256 of its content
+    created_at: str          # first build of the site, kept across rebuilds
+
+
+class BuildManifest:
+    """Last build of every site plus an append-only log of changed files
+
+    ``builds`` holds, per site, the hash of its inputs and of each file
+    written, so a build whose inputs are unchanged is a no-op and one whose
+    output is byte-identical rewrites nothing. Every file actually written
+    or deleted is appended to ``changes``; deploy tooling keeps the last
+    ``seq`` it synced and asks for the paths changed since.
+
+    WAL-mode SQLite with per-thread connections: API workers and the
+    regeneration process pool share one manifest.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        """Initialize build manifest
+
+        Args:
+            path: SQLite database file (created if missing)
+            timeout: Seconds to wait for another process's write lock
+        """
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, fn):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = fn(conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return result
+
+    @staticmethod
+    def _log(conn: sqlite3.Connection, paths: List[str], action: str):
+        now = time.time()
+        conn.executemany('INSERT INTO changes (path, action, at) VALUES (?, ?, ?)',
+                         [(path, action, now) for path in paths])
+
+    def get(self, site: str) -> Optional[Build]:
+        row = self._conn().execute('SELECT inputs, files, created_at FROM builds WHERE site = ?',
+                                   (site,)).fetchone()
+        return Build(row[0], json.loads(row[1]), row[2]) if row else None
+
+    def record(self, site: str, build: Build, written: List[str]):
+        """Store a site's build and log the paths it wrote"""
+        def record(conn):
+            conn.execute('INSERT INTO builds (site, inputs, files, created_at, built_at) VALUES (?, ?, ?, ?, ?) '
+                         'ON CONFLICT(site) DO UPDATE SET inputs = excluded.inputs, files = excluded.files, '
+                         'created_at = excluded.created_at, built_at = excluded.built_at',
+                         (site, build.inputs, json.dumps(build.files, sort_keys=True), build.created_at,
+                          time.time()))
+            self._log(conn, written, WRITE)
+
+        self._transaction(record)
+
+    def remove(self, site: str, deleted: List[str]):
+        """Forget a site and log the paths deleted with it"""
+        def remove(conn):
+            conn.execute('DELETE FROM builds WHERE site = ?', (site,))
+            self._log(conn, deleted, DELETE)
+
+        self._transaction(remove)
+
+    def last_seq(self) -> int:
+        return self._conn().execute('SELECT COALESCE(MAX(seq), 0) FROM changes').fetchone()[0]
+
+    def changes(self, since: int = 0) -> Tuple[Dict[str, str], int]:
+        """Net change per path after ``since``
+
+        Returns:
+            ({path: WRITE or DELETE}, last seq) where a path's action is its latest one
+        """
+        changed: Dict[str, str] = {}
+        last = since
+        for seq, path, action in self._conn().execute(
+                'SELECT seq, path, action FROM changes WHERE seq > ? ORDER BY seq', (since,)):
+            changed[path] = action
+            last = seq
+        return changed, last
+
+    def prune(self, before: int) -> int:
+        """Drop log entries up to ``before`` (once every deploy target has synced them)"""
+        return self._transaction(lambda conn: conn.execute('DELETE FROM changes WHERE seq <= ?', (before,)).rowcount)
@@ -0,0 +1,186 @@
+"""
+Claims Store - Append-only claims ledger with an in-memory wallet index
+Each claim is one JSON line; fsyncs are batched across concurrent writers
+"""
+import os
+import json
+import logging
+import threading
+import time
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class AlreadyClaimed(Exception):
+    """Raised when a wallet already has a recorded claim"""
+
+
+class ClaimsStore:
+    """Append-only JSONL claims log with O(1) double-claim checks
+
+    The log is replayed once at startup into a wallet -> claim dict and
+    running totals. Records are appended with a single ``write`` per line and
+    made durable with group commit: the first writer to reach the sync point
+    fsyncs on behalf of every record appended before it, so N concurrent
+    claims cost far fewer than N fsyncs. A torn trailing line left by a crash
+    is discarded during replay. A claim enters the index only once its fsync
+    has succeeded; until then its wallet is held as pending so a concurrent
+    duplicate is still refused.
+    """
+
+    def __init__(self, log_path: str, legacy_json: Optional[str] = None,
+                 commit_delay: float = 0.002):
+        """Initialize claims store
+
+        Args:
+            log_path: Path to the append-only JSONL ledger
+            legacy_json: Old claims.json to import when the ledger is new
+            commit_delay: Seconds the fsync leader waits to gather more writes
+        """
+        self.log_path = log_path
+        self.commit_delay = commit_delay
+
+        self._lock = threading.Lock()
+        self._sync_cond = threading.Condition()
+        self._claims: Dict[str, Dict] = {}
+        self._pending: Set[str] = set()
+        self._total_claimed = 0
+        self._written = 0
+        self._synced = 0
+        self._syncing = False
+        self.fsync_count = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+        if not os.path.exists(log_path) and legacy_json and os.path.exists(legacy_json):
+            self._import_legacy(legacy_json)
+        self._replay()
+        self._fh = open(log_path, 'ab', buffering=0)
+
+    def _import_legacy(self, legacy_json: str):
+        """Convert a legacy claims.json list into a new ledger atomically"""
+        try:
+            with open(legacy_json, 'r') as f:
+                claims = json.load(f)
+        except Exception as e:
+            logger.error(f"Error loading legacy claims file: {e}")
+            return
+
+        tmp_path = self.log_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            for c in claims:
+                f.write(self._encode(c))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.log_path)
+        logger.info(f"Imported {len(claims)} claims from {legacy_json}")
+
+    def _replay(self):
+        """Load the ledger into memory, truncating a torn final record"""
+        if not os.path.exists(self.log_path):
+            return
+
+        good_bytes = 0
+        with open(self.log_path, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                self._index(entry)
+                good_bytes += len(line)
+
+        if good_bytes < os.path.getsize(self.log_path):
+            logger.warning(f"Truncating torn record at byte {good_bytes} of {self.log_path}")
+            with open(self.log_path, 'r+b') as f:
+                f.truncate(good_bytes)
+                os.fsync(f.fileno())
+
+        logger.info(f"Replayed {len(self._claims)} claims from {self.log_path}")
+
+    @staticmethod
+    def _encode(entry: Dict) -> bytes:
+        return (json.dumps(entry, separators=(',', ':')) + '\n').encode()
+
+    def _index(self, entry: Dict):
+        wallet = entry.get('wallet')
+        if not wallet or wallet in self._claims:
+            return
+        self._claims[wallet] = entry
+        self._total_claimed += int(entry.get('amount', 0))
+
+    def has_claimed(self, wallet: str) -> bool:
+        return wallet in self._claims
+
+    def get(self, wallet: str) -> Optional[Dict]:
+        return self._claims.get(wallet)
+
+    def record(self, entry: Dict):
+        """Append a claim and block until it is durable on disk
+
+        The claim is indexed only after the fsync covering it succeeds; if the
+        write or fsync fails it is not indexed and the wallet may claim again.
+
+        Raises:
+            AlreadyClaimed: If the wallet already has a claim (or one in flight)
+            OSError: If the record could not be written or made durable
+        """
+        wallet = entry['wallet']
+        line = self._encode(entry)
+        with self._lock:
+            if wallet in self._claims or wallet in self._pending:
+                raise AlreadyClaimed(wallet)
+            offset = self._fh.tell()
+            try:
+                written = self._fh.write(line)
+                if written != len(line):
+                    raise OSError(f"short write to {self.log_path}: {written} of {len(line)} bytes")
+            except BaseException:
+                # Drop the partial line so later appends stay parseable
+                os.ftruncate(self._fh.fileno(), offset)
+                raise
+            self._pending.add(wallet)
+            self._written += 1
+            seq = self._written
+        try:
+            self._wait_durable(seq)
+        except BaseException:
+            with self._lock:
+                self._pending.discard(wallet)
+            raise
+        with self._lock:
+            self._pending.discard(wallet)
+            self._index(entry)
+
+    def _wait_durable(self, seq: int):
+        """Group commit: one fsync covers every record appended before it"""
+        with self._sync_cond:
+            while self._synced < seq:
+                if self._syncing:
+                    self._sync_cond.wait()
+                    continue
+                self._syncing = True
+                self._sync_cond.release()
+                try:
+                    if self.commit_delay:
+                        time.sleep(self.commit_delay)
+                    target = self._written
+                    os.fsync(self._fh.fileno())
+                    self.fsync_count += 1
+                    self._sync_cond.acquire()
+                    self._synced = max(self._synced, target)
+                except BaseException:
+                    self._sync_cond.acquire()
+                    raise
+                finally:
+                    self._syncing = False
+                    self._sync_cond.notify_all()
+
+    def totals(self) -> Dict:
+        """Running totals without scanning the ledger"""
+        return {'claims': len(self._claims), 'total_claimed': self._total_claimed}
+
+    def close(self):
+        self._fh.close()
@@ -0,0 +1,184 @@
+"""
+Config Registry - Parse-once, hot-reloadable JSON config files
+Request handlers read immutable snapshots; a poller reloads changed files
+"""
+import os
+import json
+import logging
+import threading
+from decimal import Decimal, InvalidOperation
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ConfigError(ValueError):
+    """Raised when a config file fails schema validation"""
+
+
+def parse_monitored(data: Any) -> Mapping:
+    """Validate monitored_mints.json and freeze it
+
+    Expected shape: {"tokens": [{"mint": str, "coingecko_id"?: str}], "nfts": [str]}
+    """
+    if not isinstance(data, dict):
+        raise ConfigError('monitored config must be an object')
+    tokens = data.get('tokens', [])
+    nfts = data.get('nfts', [])
+    if not isinstance(tokens, list) or not isinstance(nfts, list):
+        raise ConfigError("'tokens' and 'nfts' must be lists")
+
+    frozen_tokens = []
+    for i, t in enumerate(tokens):
+        if not isinstance(t, dict) or not isinstance(t.get('mint'), str) or not t['mint']:
+            raise ConfigError(f"tokens[{i}] must be an object with a non-empty 'mint'")
+        cg = t.get('coingecko_id')
+        if cg is not None and not isinstance(cg, str):
+            raise ConfigError(f"tokens[{i}].coingecko_id must be a string")
+        frozen_tokens.append(MappingProxyType(dict(t)))
+    for i, m in enumerate(nfts):
+        if not isinstance(m, str) or not m:
+            raise ConfigError(f"nfts[{i}] must be a non-empty string")
+
+    mints = frozenset([t['mint'] for t in frozen_tokens] + nfts)
+    return MappingProxyType({
+        'tokens': tuple(frozen_tokens),
+        'nfts': tuple(nfts),
+        'mints': mints,
+    })
+
+
+def parse_price_map(data: Any) -> Mapping:
+    """Validate token_prices.json ({mint: usd_price}) into Decimals and freeze it
+
+    Entries that are not finite positive numbers (including NaN and
+    Infinity) are skipped with a warning; the valid ones are kept.
+    """
+    if not isinstance(data, dict):
+        raise ConfigError('price map must be an object')
+    prices = {}
+    skipped = []
+    for mint, usd in data.items():
+        if isinstance(usd, bool) or not isinstance(usd, (int, float, str)):
+            skipped.append(f"{mint} (not a number: {usd!r})")
+            continue
+        try:
+            price = Decimal(str(usd).strip())
+        except InvalidOperation:
+            skipped.append(f"{mint} (not a valid number: {usd!r})")
+            continue
+        if not price.is_finite() or price <= 0:
+            skipped.append(f"{mint} (not a finite positive price: {usd!r})")
+            continue
+        prices[mint] = price
+    if skipped:
+        logger.warning(f"Skipped {len(skipped)} invalid price entries: {', '.join(skipped[:10])}")
+    return MappingProxyType(prices)
+
+
+class _Entry:
+    __slots__ = ('path', 'parser', 'default', 'snapshot', 'stat_key', 'loads', 'errors')
+
+    def __init__(self, path: str, parser: Callable[[Any], Mapping], default: Mapping):
+        self.path = path
+        self.parser = parser
+        self.default = default
+        self.snapshot = default
+        self.stat_key: Optional[Tuple] = None
+        self.loads = 0
+        self.errors = 0
+
+
+class ConfigRegistry:
+    """Registry of named JSON config files held as immutable snapshots
+
+    Files are parsed and validated once at registration and again only when
+    their mtime/size change, checked by a background poller. A file that
+    fails validation keeps serving its last good snapshot; a missing file
+    serves the registered default.
+    """
+
+    def __init__(self, poll_interval: float = 2.0):
+        """Initialize config registry
+
+        Args:
+            poll_interval: Seconds between file change checks
+        """
+        self.poll_interval = poll_interval
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, path: str, parser: Callable[[Any], Mapping],
+                 default: Mapping = MappingProxyType({})):
+        """Register a config file and load it immediately"""
+        entry = _Entry(path, parser, default)
+        self._entries[name] = entry
+        self._reload(name, entry)
+
+    def get(self, name: str) -> Mapping:
+        """Current immutable snapshot for a config (no file I/O)"""
+        return self._entries[name].snapshot
+
+    def _reload(self, name: str, entry: _Entry) -> bool:
+        try:
+            st = os.stat(entry.path)
+            stat_key = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stat_key = None
+        if stat_key == entry.stat_key:
+            return False
+
+        entry.stat_key = stat_key
+        if stat_key is None:
+            logger.debug(f"Config file not found: {entry.path}")
+            entry.snapshot = entry.default
+            return True
+
+        try:
+            with open(entry.path, 'r') as f:
+                snapshot = entry.parser(json.load(f))
+        except (ValueError, OSError) as e:
+            entry.errors += 1
+            logger.error(f"Invalid config {name} ({entry.path}), keeping previous: {e}")
+            return False
+
+        entry.snapshot = snapshot
+        entry.loads += 1
+        logger.info(f"Loaded config {name} from {entry.path}")
+        return True
+
+    def poll(self):
+        """Reload every registered file whose mtime/size changed"""
+        with self._lock:
+            for name, entry in self._entries.items():
+                self._reload(name, entry)
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Config poll error: {e}")
+
+    def start(self):
+        """Start the background change poller"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='config-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+
+    def metrics(self) -> Dict:
+        return {
+            name: {'path': e.path, 'loads': e.loads, 'errors': e.errors}
+            for name, e in self._entries.items()
+        }
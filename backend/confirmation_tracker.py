@@ -0,0 +1,264 @@
+"""
+Confirmation Tracker - Resolve many outstanding transaction signatures with few RPC calls
+Batched getSignatureStatuses polling, optionally fed by signatureSubscribe over a websocket
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from solana.rpc.commitment import Commitment
+from solders.signature import Signature
+from solders.transaction_status import TransactionConfirmationStatus
+
+logger = logging.getLogger(__name__)
+
+# getSignatureStatuses accepts at most 256 signatures per call
+STATUS_BATCH = 256
+
+REACHED = {
+    'processed': (TransactionConfirmationStatus.Processed, TransactionConfirmationStatus.Confirmed,
+                  TransactionConfirmationStatus.Finalized),
+    'confirmed': (TransactionConfirmationStatus.Confirmed, TransactionConfirmationStatus.Finalized),
+    'finalized': (TransactionConfirmationStatus.Finalized,),
+}
+
+
+class Confirmation(NamedTuple):
+    """How a tracked signature resolved"""
+    signature: str
+    status: str  # 'confirmed', 'failed', 'expired' or 'unconfirmed'
+    error: Optional[str]
+    slot: Optional[int]
+    seconds: float  # since tracking started
+
+
+class _Tracked(NamedTuple):
+    future: asyncio.Future
+    started: float
+    last_valid_height: Optional[int]
+
+
+class ConfirmationTracker:
+    """Awaitable confirmations for any number of in-flight signatures
+
+    ``track`` registers a signature and returns a future. One background
+    loop polls every outstanding signature with getSignatureStatuses, 256 per
+    call, so thousands of transactions cost a handful of requests per poll.
+    With ``ws_url`` each signature is also subscribed with signatureSubscribe
+    and resolved as soon as its notification arrives; polling then only runs
+    every ``ws_poll_interval`` to catch transactions that landed before
+    their subscription. If the websocket drops, polling takes over at the
+    normal interval until it reconnects.
+
+    Given a BlockhashManager, a signature still missing once its blockhash
+    has expired resolves 'expired' (after a full-history lookup), meaning
+    the transaction can never land. One missing for ``timeout`` seconds
+    resolves 'unconfirmed'.
+    """
+
+    def __init__(self, client, commitment: str = 'confirmed', poll_interval: float = 0.5,
+                 timeout: float = 150.0, blockhashes=None, ws_url: Optional[str] = None,
+                 ws_poll_interval: float = 2.0):
+        """Initialize tracker
+
+        Args:
+            client: solana AsyncClient
+            commitment: Confirmation level treated as success
+            poll_interval: Seconds between status polls
+            timeout: Seconds before a missing signature resolves 'unconfirmed'
+            blockhashes: Optional BlockhashManager used to detect expired transactions
+            ws_url: Optional websocket endpoint for signatureSubscribe
+            ws_poll_interval: Seconds between safety-net polls while the websocket is up
+        """
+        self.client = client
+        self.commitment = commitment
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.blockhashes = blockhashes
+        self.ws_url = ws_url
+        self.ws_poll_interval = ws_poll_interval
+        self._reached = REACHED[commitment]
+        self._tracked: Dict[Signature, _Tracked] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._subscribe: Optional[asyncio.Queue] = None
+        self._ws_up = False
+        self._tasks: List[asyncio.Task] = []
+        self.status_calls = 0
+        self.notifications = 0
+        self.ws_reconnects = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._tracked)
+
+    async def start(self):
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._poll_loop())]
+        if self.ws_url:
+            self._subscribe = asyncio.Queue()
+            self._tasks.append(asyncio.create_task(self._ws_loop()))
+
+    async def stop(self):
+        """Stop the loops; unresolved futures are cancelled"""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        for tracked in self._tracked.values():
+            tracked.future.cancel()
+        self._tracked = {}
+
+    async def __aenter__(self) -> 'ConfirmationTracker':
+        await self.start()
+        return self
+
+    async def __aexit__(self, _exc_type, _exc, _tb):
+        await self.stop()
+
+    def track(self, signature, last_valid_height: Optional[int] = None) -> asyncio.Future:
+        """Future resolving to the signature's Confirmation
+
+        Args:
+            signature: Signature (or base58 string) of a sent transaction
+            last_valid_height: Last valid block height of its blockhash, for expiry
+        """
+        if isinstance(signature, str):
+            signature = Signature.from_string(signature)
+        tracked = self._tracked.get(signature)
+        if tracked is not None:
+            return tracked.future
+        future = asyncio.get_running_loop().create_future()
+        self._tracked[signature] = _Tracked(future, time.perf_counter(), last_valid_height)
+        if self._subscribe is not None:
+            self._subscribe.put_nowait(signature)
+        self._wake.set()
+        return future
+
+    async def wait(self, signature, last_valid_height: Optional[int] = None) -> Confirmation:
+        return await self.track(signature, last_valid_height)
+
+    def _settle(self, signature: Signature, status: str, error=None, slot: Optional[int] = None):
+        tracked = self._tracked.pop(signature, None)
+        if tracked is None or tracked.future.done():
+            return
+        tracked.future.set_result(Confirmation(str(signature), status, str(error) if error is not None else None,
+                                               slot, time.perf_counter() - tracked.started))
+
+    # Polling ----------------------------------------------------------------
+
+    async def _poll_loop(self):
+        while True:
+            if not self._tracked:
+                self._wake.clear()
+                await self._wake.wait()
+            sigs = list(self._tracked)
+            batches = [sigs[i:i + STATUS_BATCH] for i in range(0, len(sigs), STATUS_BATCH)]
+            await asyncio.gather(*(self._poll(batch) for batch in batches))
+            await asyncio.sleep(self.ws_poll_interval if self._ws_up else self.poll_interval)
+
+    async def _poll(self, sigs: List[Signature]):
+        try:
+            resp = await self.client.get_signature_statuses(sigs)
+            statuses = resp.value
+        except Exception as e:
+            logger.warning(f"getSignatureStatuses failed for {len(sigs)} signatures: {e}")
+            statuses = [None] * len(sigs)
+        self.status_calls += 1
+
+        now = time.perf_counter()
+        expired = []
+        for sig, st in zip(sigs, statuses):
+            tracked = self._tracked.get(sig)
+            if tracked is None:
+                continue
+            if st is not None and st.err is not None:
+                self._settle(sig, 'failed', st.err, st.slot)
+            elif st is not None and st.confirmation_status in self._reached:
+                self._settle(sig, 'confirmed', None, st.slot)
+            elif (st is None and self.blockhashes is not None and tracked.last_valid_height is not None
+                  and self.blockhashes.expired(tracked.last_valid_height)):
+                expired.append(sig)
+            elif now - tracked.started > self.timeout:
+                self._settle(sig, 'unconfirmed', f'not {self.commitment} after {self.timeout:.0f}s')
+        if expired:
+            await self._expire(expired)
+
+    async def _expire(self, sigs: List[Signature]):
+        try:
+            # Double-check the full history before declaring them dead
+            resp = await self.client.get_signature_statuses(sigs, search_transaction_history=True)
+        except Exception as e:
+            logger.warning(f"getSignatureStatuses failed for {len(sigs)} expired signatures: {e}")
+            return
+        self.status_calls += 1
+        for sig, st in zip(sigs, resp.value):
+            tracked = self._tracked.get(sig)
+            if st is None and tracked is not None:
+                self._settle(sig, 'expired', f'blockhash expired (last valid height {tracked.last_valid_height})')
+
+    # Websocket --------------------------------------------------------------
+
+    async def _ws_loop(self):
+        from solana.rpc.websocket_api import connect
+        from solders.errors import SerdeJSONError
+        from solders.rpc.responses import SignatureNotification
+
+        commitment = Commitment(self.commitment)
+        backoff = 1.0
+        while True:
+            try:
+                async with connect(self.ws_url) as ws:
+                    # Everything still outstanding, then new signatures as they are tracked
+                    for sig in list(self._tracked):
+                        self._subscribe.put_nowait(sig)
+                    self._ws_up = True
+                    backoff = 1.0
+                    sender = asyncio.create_task(self._ws_send(ws, commitment))
+                    try:
+                        while True:
+                            try:
+                                messages = await ws.recv()
+                            except SerdeJSONError as e:
+                                # solders cannot parse some errors (e.g. Custom program
+                                # errors); the safety-net poll resolves that signature
+                                logger.debug(f"Skipping websocket message: {e}")
+                                continue
+                            for msg in messages:
+                                if isinstance(msg, SignatureNotification):
+                                    body = ws.subscriptions.pop(msg.subscription, None)
+                                    if body is None:
+                                        continue
+                                    self.notifications += 1
+                                    err = msg.result.value.err
+                                    self._settle(body.signature, 'failed' if err is not None else 'confirmed',
+                                                 err, msg.result.context.slot)
+                    finally:
+                        sender.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Signature websocket {self.ws_url} failed, polling until it reconnects: {e}")
+            self._ws_up = False
+            self.ws_reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(30.0, backoff * 2)
+
+    async def _ws_send(self, ws, commitment: Commitment):
+        while True:
+            sig = await self._subscribe.get()
+            if sig in self._tracked:
+                await ws.signature_subscribe(sig, commitment)
+
+    def metrics(self) -> Dict:
+        return {
+            'pending': self.pending,
+            'status_calls': self.status_calls,
+            'notifications': self.notifications,
+            'websocket': self._ws_up,
+            'ws_reconnects': self.ws_reconnects,
+        }
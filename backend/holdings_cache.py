@@ -0,0 +1,165 @@
+"""
+Holdings Cache - Bounded TTL + LRU cache for per-wallet on-chain holdings
+Concurrent lookups for the same key share a single in-flight fetch
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """A fetch in progress that followers wait on"""
+    __slots__ = ('event', 'value')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+
+
+class HoldingsCache:
+    """LRU cache with TTL, slot-aware staleness and single-flight loading
+
+    Entries expire after ``ttl`` seconds, or earlier when the slot they were
+    read at lags the newest slot seen by more than ``max_slot_lag``. Values
+    of ``None`` (failed fetches) are never cached. Both blocking callers
+    (threadpool handlers) and coroutines are deduplicated per key.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 30.0,
+                 max_slot_lag: Optional[int] = None):
+        """Initialize holdings cache
+
+        Args:
+            maxsize: Maximum number of cached entries
+            ttl: Entry lifetime in seconds
+            max_slot_lag: Max slots an entry may trail the newest observed slot
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_slot_lag = max_slot_lag
+
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, "_Flight"] = {}
+        self._inflight_async: Dict[Hashable, asyncio.Future] = {}
+        self.latest_slot = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+
+    def _lookup(self, key: Hashable):
+        """Return a fresh cached value or None; caller holds the lock"""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at, slot = entry
+        stale_slot = (
+            self.max_slot_lag is not None and slot is not None
+            and self.latest_slot - slot > self.max_slot_lag
+        )
+        if time.monotonic() >= expires_at or stale_slot:
+            del self._data[key]
+            self.expirations += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _store(self, key: Hashable, value):
+        """Insert a value and evict least-recently-used entries; caller holds the lock"""
+        if value is None:
+            return
+        slot = getattr(value, 'slot', None)
+        if slot is not None and slot > self.latest_slot:
+            self.latest_slot = slot
+        self._data[key] = (value, time.monotonic() + self.ttl, slot)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_fetch(self, key: Hashable, loader: Callable[[], object]):
+        """Return the cached value for key, calling loader once on a miss"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            return flight.value
+
+        try:
+            flight.value = loader()
+        finally:
+            with self._lock:
+                self._store(key, flight.value)
+                del self._inflight[key]
+            flight.event.set()
+        return flight.value
+
+    async def get_or_fetch_async(self, key: Hashable, loader: Callable[[], Awaitable]):
+        """Coroutine variant of get_or_fetch sharing one in-flight task per key"""
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value
+            fut = self._inflight_async.get(key)
+            if fut is None:
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if fut is not None:
+            return await asyncio.shield(fut)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight_async[key] = fut
+        value = None
+        try:
+            value = await loader()
+        finally:
+            with self._lock:
+                self._store(key, value)
+            self._inflight_async.pop(key, None)
+            fut.set_result(value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one key, or the whole cache when key is None"""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+            else:
+                self._data.pop(key, None)
+
+    def metrics(self) -> Dict:
+        """Hit/miss/eviction counters for the metrics endpoint"""
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'hit_ratio': round(self.hits / total, 4) if total else 0.0,
+            'latest_slot': self.latest_slot,
+        }
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Merkle Allocations - Commit the allocation set to a single Merkle root
+Array-backed tree persisted to a compact binary file, with proof lookup and
+a batch verifier that checks every proof with O(N) total hashing.
+
+Leaf   = sha256(0x00 || wallet_pubkey[32] || amount_u64_le)
+Parent = sha256(0x01 || left || right); an unpaired last node is carried up
+
+Usage:
+    python3 backend/merkle.py build outputs/allocations_live.csv outputs/allocations_merkle.bin
+    python3 backend/merkle.py proof outputs/allocations_merkle.bin <wallet>
+    python3 backend/merkle.py verify outputs/allocations_merkle.bin
+"""
+import os
+import csv
+import sys
+import json
+import hashlib
+import logging
+import struct
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import base58
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'DJMT'
+VERSION = 1
+HEADER = struct.Struct('<4sB3xQQ')  # magic, version, leaf_count, node_count
+RECORD = struct.Struct('<32sQ')     # wallet pubkey, amount
+INDEX = struct.Struct('<I')
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+def leaf_hash(pubkey: bytes, amount: int) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + RECORD.pack(pubkey, amount)).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def level_sizes(leaf_count: int) -> List[int]:
+    """Number of nodes on each level, leaves first, root last"""
+    sizes = [leaf_count]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+
+def iter_allocations_csv(path: str) -> Iterator[Tuple[bytes, int]]:
+    """Stream (pubkey, amount) from an allocations CSV (net, else gross/amount)"""
+    with open(path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            wallet = (row.get('wallet') or '').strip()
+            if not wallet:
+                continue
+            raw = row.get('net') or row.get('gross') or row.get('amount') or '0'
+            try:
+                pubkey = base58.b58decode(wallet)
+                amount = int(raw)
+            except (ValueError, TypeError):
+                logger.warning(f"Skipping invalid allocation row for {wallet}")
+                continue
+            if len(pubkey) != 32 or amount < 0:
+                logger.warning(f"Skipping invalid allocation row for {wallet}")
+                continue
+            yield pubkey, amount
+
+
+class MerkleTree:
+    """Array-backed Merkle tree over allocation records
+
+    All node hashes live in one contiguous buffer, level by level, so node
+    (level, i) is at ``offsets[level] + i``. Records are kept in input order
+    alongside a pubkey-sorted index used for O(log N) wallet lookup.
+    """
+
+    def __init__(self, leaf_count: int, nodes, records, index):
+        self.leaf_count = leaf_count
+        self.nodes = memoryview(nodes)
+        self.records = memoryview(records)
+        self.index = memoryview(index)
+        self.sizes = level_sizes(leaf_count) if leaf_count else [0]
+        self.offsets = []
+        off = 0
+        for n in self.sizes:
+            self.offsets.append(off)
+            off += n
+
+    # ---- construction -------------------------------------------------
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[bytes, int]]) -> 'MerkleTree':
+        """Build a tree in O(N) hashes from a stream of (pubkey, amount)"""
+        nodes = bytearray()
+        records = bytearray()
+        for pubkey, amount in items:
+            records += RECORD.pack(pubkey, amount)
+            nodes += leaf_hash(pubkey, amount)
+        leaf_count = len(records) // RECORD.size
+        if leaf_count == 0:
+            raise ValueError('Cannot build a Merkle tree with no allocations')
+
+        start, n = 0, leaf_count
+        while n > 1:
+            level = bytes(nodes[start * 32:(start + n) * 32])
+            for i in range(0, n - 1, 2):
+                nodes += node_hash(level[i * 32:i * 32 + 32], level[i * 32 + 32:i * 32 + 64])
+            if n % 2:
+                nodes += level[(n - 1) * 32:]
+            start, n = start + n, (n + 1) // 2
+
+        rec_view = memoryview(records)
+        order = sorted(range(leaf_count), key=lambda i: bytes(rec_view[i * RECORD.size:i * RECORD.size + 32]))
+        index = bytearray(INDEX.size * leaf_count)
+        for pos, i in enumerate(order):
+            INDEX.pack_into(index, pos * INDEX.size, i)
+        return cls(leaf_count, nodes, records, index)
+
+    @classmethod
+    def from_csv(cls, path: str) -> 'MerkleTree':
+        return cls.build(iter_allocations_csv(path))
+
+    # ---- persistence --------------------------------------------------
+
+    def save(self, path: str):
+        """Write the tree atomically (temp file + rename)"""
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.leaf_count, len(self.nodes) // 32))
+            f.write(self.nodes)
+            f.write(self.records)
+            f.write(self.index)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'MerkleTree':
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, leaf_count, node_count = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'Not a Merkle allocations file: {path}')
+        off = HEADER.size
+        nodes = data[off:off + node_count * 32]
+        off += node_count * 32
+        records = data[off:off + leaf_count * RECORD.size]
+        off += leaf_count * RECORD.size
+        index = data[off:off + leaf_count * INDEX.size]
+        if len(index) != leaf_count * INDEX.size:
+            raise ValueError(f'Truncated Merkle allocations file: {path}')
+        return cls(leaf_count, nodes, records, index)
+
+    # ---- queries ------------------------------------------------------
+
+    @property
+    def root(self) -> bytes:
+        return bytes(self.nodes[-32:])
+
+    def node(self, level: int, i: int) -> bytes:
+        pos = (self.offsets[level] + i) * 32
+        return bytes(self.nodes[pos:pos + 32])
+
+    def record(self, i: int) -> Tuple[bytes, int]:
+        pubkey, amount = RECORD.unpack_from(self.records, i * RECORD.size)
+        return pubkey, amount
+
+    def find(self, pubkey: bytes) -> Optional[int]:
+        """Leaf index for a wallet pubkey via binary search over the sorted index"""
+        lo, hi = 0, self.leaf_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            i = INDEX.unpack_from(self.index, mid * INDEX.size)[0]
+            key = bytes(self.records[i * RECORD.size:i * RECORD.size + 32])
+            if key < pubkey:
+                lo = mid + 1
+            elif key > pubkey:
+                hi = mid
+            else:
+                return i
+        return None
+
+    def proof(self, i: int) -> List[bytes]:
+        """Sibling hashes from leaf i up to (excluding) the root"""
+        path = []
+        for level, n in enumerate(self.sizes[:-1]):
+            sibling = i ^ 1
+            if sibling < n:
+                path.append(self.node(level, sibling))
+            i //= 2
+        return path
+
+    def proof_for_wallet(self, wallet: str) -> Optional[Dict]:
+        """JSON-ready proof for a base58 wallet, or None if not in the tree"""
+        try:
+            pubkey = base58.b58decode(wallet)
+        except ValueError:
+            return None
+        i = self.find(pubkey)
+        if i is None:
+            return None
+        _, amount = self.record(i)
+        return {
+            'wallet': wallet,
+            'index': i,
+            'amount': amount,
+            'leaf_count': self.leaf_count,
+            'root': self.root.hex(),
+            'proof': [h.hex() for h in self.proof(i)],
+        }
+
+
+def verify_proof(root: bytes, leaf_count: int, index: int, pubkey: bytes,
+                 amount: int, proof: List[bytes]) -> bool:
+    """Verify a single proof against a published root"""
+    return BatchVerifier(root, leaf_count).verify(index, pubkey, amount, proof)
+
+
+class BatchVerifier:
+    """Verify many proofs against one root, hashing each shared node once
+
+    Once a path is confirmed, every (level, index, hash) on it is remembered;
+    later proofs stop climbing as soon as they reach a confirmed node. Checking
+    every leaf of an N-leaf tree therefore costs O(N) hashes, not O(N log N).
+    """
+
+    def __init__(self, root: bytes, leaf_count: int):
+        self.root = root
+        self.leaf_count = leaf_count
+        self.sizes = level_sizes(leaf_count)
+        self._confirmed: Dict[Tuple[int, int], bytes] = {}
+        self.hashes = 0
+
+    def verify(self, index: int, pubkey: bytes, amount: int, proof: List[bytes]) -> bool:
+        if not 0 <= index < self.leaf_count:
+            return False
+        h = leaf_hash(pubkey, amount)
+        self.hashes += 1
+        path = []
+        i, siblings = index, iter(proof)
+        for level, n in enumerate(self.sizes[:-1]):
+            known = self._confirmed.get((level, i))
+            if known is not None:
+                ok = known == h
+                break
+            path.append((level, i, h))
+            sibling = i ^ 1
+            if sibling < n:
+                s = next(siblings, None)
+                if s is None:
+                    return False
+                h = node_hash(h, s) if i % 2 == 0 else node_hash(s, h)
+                self.hashes += 1
+            i //= 2
+        else:
+            ok = h == self.root and next(siblings, None) is None
+        if ok:
+            for level, i, node in path:
+                self._confirmed[(level, i)] = node
+        return ok
+
+
+def verify_tree(tree: MerkleTree) -> Tuple[int, int]:
+    """Generate and batch-verify the proof of every leaf; returns (ok, failed)"""
+    verifier = BatchVerifier(tree.root, tree.leaf_count)
+    ok = failed = 0
+    for i in range(tree.leaf_count):
+        pubkey, amount = tree.record(i)
+        if verifier.verify(i, pubkey, amount, tree.proof(i)):
+            ok += 1
+        else:
+            failed += 1
+    return ok, failed
+
+
+class MerkleTreeFile:
+    """Lazily loaded tree file, reloaded when its mtime/size change
+
+    get() stats (and may load) the file; async callers check check_due()
+    and run get() in a worker thread, otherwise take current().
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._tree: Optional[MerkleTree] = None
+        self._stat_key = None
+        self._next_check = 0.0
+
+    def get(self) -> Optional[MerkleTree]:
+        now = time.monotonic()
+        if now < self._next_check:
+            return self._tree
+        with self._lock:
+            if now < self._next_check:
+                return self._tree
+            self._next_check = now + self.check_interval
+            try:
+                st = os.stat(self.path)
+                stat_key = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                self._tree, self._stat_key = None, None
+                return None
+            if stat_key != self._stat_key:
+                try:
+                    self._tree = MerkleTree.load(self.path)
+                    self._stat_key = stat_key
+                    logger.info(f"Loaded Merkle tree {self.path}: {self._tree.leaf_count} leaves, "
+                                f"root {self._tree.root.hex()}")
+                except (OSError, ValueError, struct.error) as e:
+                    logger.error(f"Error loading Merkle tree {self.path}: {e}")
+            return self._tree
+
+    def check_due(self) -> bool:
+        """True when the next get() call would stat (and maybe load) the file"""
+        return time.monotonic() >= self._next_check
+
+    def current(self) -> Optional[MerkleTree]:
+        """Last loaded tree without checking the file"""
+        return self._tree
+
+
+def main():
+    import argparse
+    p = argparse.ArgumentParser(description="Build and verify Merkle allocation commitments")
+    sub = p.add_subparsers(dest='cmd', required=True)
+    b = sub.add_parser('build', help='Build a tree file from an allocations CSV')
+    b.add_argument('allocations_csv')
+    b.add_argument('output', nargs='?', default='outputs/allocations_merkle.bin')
+    pr = sub.add_parser('proof', help='Print the proof for a wallet')
+    pr.add_argument('tree_file')
+    pr.add_argument('wallet')
+    v = sub.add_parser('verify', help='Batch-verify every proof in a tree file')
+    v.add_argument('tree_file')
+    args = p.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.cmd == 'build':
+        start = time.perf_counter()
+        tree = MerkleTree.from_csv(args.allocations_csv)
+        tree.save(args.output)
+        logger.info(f"Built tree of {tree.leaf_count} leaves in {time.perf_counter() - start:.2f}s")
+        print(json.dumps({'root': tree.root.hex(), 'leaf_count': tree.leaf_count, 'file': args.output}))
+    elif args.cmd == 'proof':
+        tree = MerkleTree.load(args.tree_file)
+        proof = tree.proof_for_wallet(args.wallet)
+        if proof is None:
+            print(f"Wallet not in tree: {args.wallet}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(proof, indent=2))
+    elif args.cmd == 'verify':
+        tree = MerkleTree.load(args.tree_file)
+        start = time.perf_counter()
+        ok, failed = verify_tree(tree)
+        elapsed = time.perf_counter() - start
+        print(f"root={tree.root.hex()} leaves={tree.leaf_count} ok={ok} failed={failed} "
+              f"({ok / elapsed if elapsed else 0:,.0f} proofs/s)")
+        sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
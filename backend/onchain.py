@@ -0,0 +1,108 @@
+"""
+On-chain Holdings - Fetch all SPL token balances for a wallet in one RPC call
+Provides a sync path on the shared Client and an async path on AsyncClient
+"""
+import json
+import logging
+from decimal import Decimal
+from typing import Dict, NamedTuple, Optional
+
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.types import TokenAccountOpts
+from solders.pubkey import Pubkey
+from spl.token.constants import TOKEN_PROGRAM_ID
+
+from backend.rpc_pool import RpcPool
+
+logger = logging.getLogger(__name__)
+
+
+class Holdings(NamedTuple):
+    """Token balances (UI units) per mint for one wallet at a given slot"""
+    wallet: str
+    balances: Dict[str, Decimal]
+    slot: Optional[int]
+
+    def balance(self, mint: str) -> Decimal:
+        return self.balances.get(mint, Decimal(0))
+
+
+def _as_dict(res) -> Dict:
+    """Normalize a solders response object or raw dict to a JSON dict"""
+    if isinstance(res, dict):
+        return res
+    return json.loads(res.to_json())
+
+
+def parse_holdings(wallet: str, res) -> Holdings:
+    """Sum every parsed token account in a getTokenAccountsByOwner response by mint"""
+    data = _as_dict(res)
+    result = data.get('result', {}) or {}
+    slot = (result.get('context') or {}).get('slot')
+    balances: Dict[str, Decimal] = {}
+    for acc in result.get('value', []) or []:
+        try:
+            info = acc.get('account', {}).get('data', {}).get('parsed', {}).get('info', {})
+            mint = info.get('mint')
+            if not mint:
+                continue
+            ta = info.get('tokenAmount', {})
+            amount = Decimal(ta.get('amount', '0'))
+            decimals = int(ta.get('decimals', 0))
+            balances[mint] = balances.get(mint, Decimal(0)) + amount / (Decimal(10) ** decimals)
+        except Exception as e:
+            logger.error(f"Error parsing token account for {wallet}: {e}")
+    return Holdings(wallet, balances, slot)
+
+
+class HoldingsFetcher:
+    """Fetch a wallet's complete token account list once per lookup
+
+    Every monitored mint is then answered from the same response instead of
+    issuing one ``getTokenAccountsByOwner`` per mint. The async client is
+    created lazily and reused, so its HTTP connection pool is shared by all
+    requests served on the event loop.
+    """
+
+    def __init__(self, rpc_url: str, client: Optional[Client] = None, timeout: float = 10,
+                 pool: Optional[RpcPool] = None):
+        """Initialize holdings fetcher
+
+        Args:
+            rpc_url: Solana JSON-RPC endpoint
+            client: Existing sync Client to reuse (created if omitted)
+            timeout: Request timeout in seconds for the async client
+            pool: RpcPool to create missing clients from instead of ``rpc_url``
+        """
+        self.rpc_url = rpc_url
+        self.client = client
+        self.timeout = timeout
+        self.pool = pool
+        self._async_client: Optional[AsyncClient] = None
+        self._opts = TokenAccountOpts(program_id=TOKEN_PROGRAM_ID)
+
+    def fetch(self, wallet: str) -> Holdings:
+        """Fetch all token balances for a wallet (blocking)"""
+        if self.client is None:
+            self.client = self.pool.client() if self.pool else Client(self.rpc_url)
+        res = self.client.get_token_accounts_by_owner_json_parsed(
+            Pubkey.from_string(wallet), self._opts
+        )
+        return parse_holdings(wallet, res)
+
+    async def fetch_async(self, wallet: str) -> Holdings:
+        """Fetch all token balances for a wallet on the shared AsyncClient"""
+        if self._async_client is None:
+            self._async_client = (self.pool.async_client() if self.pool
+                                  else AsyncClient(self.rpc_url, timeout=self.timeout))
+        res = await self._async_client.get_token_accounts_by_owner_json_parsed(
+            Pubkey.from_string(wallet), self._opts
+        )
+        return parse_holdings(wallet, res)
+
+    async def aclose(self):
+        """Close the pooled async connection"""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
@@ -0,0 +1,138 @@
+"""
+Price Oracle - Background USD price refresher for monitored tokens
+Batches every CoinGecko id into one query per refresh; lookups never block
+"""
+import logging
+import threading
+import time
+from decimal import Decimal
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_URL = 'https://api.coingecko.com/api/v3'
+
+
+class PriceOracle:
+    """In-memory price table refreshed on a schedule by a daemon thread
+
+    Each refresh sends ``/simple/price`` with all ids joined (chunked at
+    ``batch_size``). Failed refreshes keep the last known prices, so request
+    handlers always read from memory and never call out.
+    """
+
+    def __init__(self, ids_fn: Callable[[], Iterable[str]],
+                 api_url: str = DEFAULT_API_URL, interval: float = 60.0,
+                 timeout: float = 5.0, batch_size: int = 250):
+        """Initialize price oracle
+
+        Args:
+            ids_fn: Returns the CoinGecko ids to track (called every refresh)
+            api_url: CoinGecko-compatible API base URL
+            interval: Seconds between refreshes
+            timeout: HTTP timeout per batch request
+            batch_size: Maximum ids per request
+        """
+        self.ids_fn = ids_fn
+        self.api_url = api_url.rstrip('/')
+        self.interval = interval
+        self.timeout = timeout
+        self.batch_size = batch_size
+
+        self._prices: Dict[str, Tuple[Decimal, float]] = {}
+        self._session = requests.Session()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.refresh_count = 0           # refreshes that updated at least one price
+        self.failed_refresh_count = 0    # refreshes that updated none
+        self.failure_count = 0           # failed batch requests
+        self.last_refresh_at: Optional[float] = None
+
+    def get(self, coingecko_id: str) -> Optional[Decimal]:
+        """Last known USD price for an id, or None if never fetched"""
+        entry = self._prices.get(coingecko_id)
+        return entry[0] if entry else None
+
+    def age(self, coingecko_id: str) -> Optional[float]:
+        """Seconds since the id's price was last updated"""
+        entry = self._prices.get(coingecko_id)
+        return time.time() - entry[1] if entry else None
+
+    def refresh(self) -> int:
+        """Fetch prices for all tracked ids; returns the number updated"""
+        ids = sorted({i for i in self.ids_fn() if i})
+        if not ids:
+            return 0
+
+        updated = 0
+        for start in range(0, len(ids), self.batch_size):
+            batch = ids[start:start + self.batch_size]
+            try:
+                r = self._session.get(
+                    f'{self.api_url}/simple/price',
+                    params={'ids': ','.join(batch), 'vs_currencies': 'usd'},
+                    timeout=self.timeout,
+                )
+                r.raise_for_status()
+                data = r.json()
+            except (requests.RequestException, ValueError) as e:
+                self.failure_count += 1
+                logger.warning(f"Price refresh failed for {len(batch)} ids: {e}")
+                continue
+
+            now = time.time()
+            for cg in batch:
+                usd = (data.get(cg) or {}).get('usd')
+                if usd is None:
+                    continue
+                try:
+                    self._prices[cg] = (Decimal(str(usd)), now)
+                    updated += 1
+                except (ValueError, ArithmeticError):
+                    logger.warning(f"Invalid price for {cg}: {usd}")
+
+        if not updated:
+            self.failed_refresh_count += 1
+            logger.warning(f"Price refresh updated none of {len(ids)} ids; keeping last known prices")
+            return 0
+        self.refresh_count += 1
+        self.last_refresh_at = time.time()
+        logger.debug(f"Refreshed {updated}/{len(ids)} prices")
+        return updated
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                self.failed_refresh_count += 1
+                logger.error(f"Unexpected error in price refresh: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start the background refresh thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='price-oracle', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.timeout + 1)
+            self._thread = None
+
+    def metrics(self) -> Dict:
+        return {
+            'tracked': len(self._prices),
+            'refresh_count': self.refresh_count,
+            'failed_refresh_count': self.failed_refresh_count,
+            'failure_count': self.failure_count,
+            'last_refresh_at': self.last_refresh_at,
+            'interval': self.interval,
+        }
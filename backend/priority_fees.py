@@ -0,0 +1,93 @@
+"""
+Priority Fees - Periodically sampled compute unit price for outgoing transactions
+One getRecentPrioritizationFees per refresh interval instead of one per transaction
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Sequence
+
+from solders.pubkey import Pubkey
+
+logger = logging.getLogger(__name__)
+
+
+class PriorityFeeEstimator:
+    """Compute unit price (micro-lamports) from recent prioritization fees
+
+    A background task samples ``getRecentPrioritizationFees`` for the
+    accounts the transactions write (the treasury token account, so fees
+    reflect contention on it) every ``refresh_interval`` seconds. ``price``
+    is the ``percentile`` of the per-slot fees over the last ~150 slots,
+    clamped to [``min_price``, ``max_price``]; reading it never touches the
+    network. If sampling fails the last estimate is kept.
+    """
+
+    def __init__(self, client, accounts: Sequence = (), percentile: float = 75.0,
+                 refresh_interval: float = 10.0, min_price: int = 0, max_price: int = 1_000_000):
+        """Initialize estimator
+
+        Args:
+            client: solana AsyncClient
+            accounts: Writable accounts the transactions lock (Pubkeys or base58 strings)
+            percentile: Percentile (0-100) of recent per-slot fees to pay
+            refresh_interval: Seconds between samples
+            min_price: Lower bound in micro-lamports per compute unit
+            max_price: Upper bound in micro-lamports per compute unit
+        """
+        self.client = client
+        self.accounts = [Pubkey.from_string(a) if isinstance(a, str) else a for a in accounts]
+        self.percentile = percentile
+        self.refresh_interval = refresh_interval
+        self.min_price = min_price
+        self.max_price = max_price
+        self.price = min_price
+        self.samples = 0
+        self.sampled_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Sample once and keep sampling in the background"""
+        await self.refresh()
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    async def refresh(self) -> int:
+        """Sample recent fees now; returns the new price"""
+        try:
+            resp = await self.client.get_recent_prioritization_fees(self.accounts or None)
+        except Exception as e:
+            logger.warning(f"getRecentPrioritizationFees failed, keeping {self.price}: {e}")
+            return self.price
+        self.samples += 1
+        self.sampled_at = time.monotonic()
+        self.price = self.estimate([f.prioritization_fee for f in resp.value])
+        return self.price
+
+    def estimate(self, fees: List[int]) -> int:
+        """Clamped ``percentile`` of per-slot fees"""
+        if not fees:
+            return self.min_price
+        ordered = sorted(fees)
+        value = ordered[min(len(ordered) - 1, int(round(self.percentile / 100 * (len(ordered) - 1))))]
+        return max(self.min_price, min(self.max_price, value))
+
+    def metrics(self) -> Dict:
+        return {
+            'price_micro_lamports': self.price,
+            'samples': self.samples,
+            'age_s': round(time.monotonic() - self.sampled_at, 1) if self.sampled_at is not None else None,
+        }
@@ -0,0 +1,220 @@
+"""
+Rate Limiter - GCRA (generic cell rate algorithm) with pluggable backends
+Stores one float per client key; the SQLite backend shares limits across workers
+"""
+import os
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Dict, Tuple
+
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+
+def gcra(tat: float, now: float, interval: float, window: float) -> Tuple[bool, float, float]:
+    """One GCRA step
+
+    Args:
+        tat: Stored theoretical arrival time for the key (0 if unknown)
+        now: Current time
+        interval: Seconds per request (window / max_requests)
+        window: Burst window in seconds
+
+    Returns:
+        (allowed, new_tat, retry_after_seconds)
+    """
+    new_tat = max(tat, now) + interval
+    if new_tat - now > window:
+        return False, tat, new_tat - window - now
+    return True, new_tat, 0.0
+
+
+class MemoryBackend:
+    """In-process backend: key -> TAT in an LRU-ordered dict
+
+    Keys whose TAT has passed are indistinguishable from new keys, so they
+    are evicted opportunistically from the cold end on every update; the
+    dict is additionally capped at ``max_keys``.
+    """
+    blocking = False
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def acquire(self, key: str, now: float, interval: float, window: float) -> Tuple[bool, float]:
+        with self._lock:
+            tats = self._tats
+            allowed, new_tat, retry_after = gcra(tats.get(key, 0.0), now, interval, window)
+            if allowed:
+                tats[key] = new_tat
+                tats.move_to_end(key)
+            # Drop idle keys from the cold end (amortized O(1))
+            while tats:
+                oldest_key, oldest_tat = next(iter(tats.items()))
+                if oldest_tat > now and len(tats) <= self.max_keys:
+                    break
+                del tats[oldest_key]
+                self.evictions += 1
+            return allowed, retry_after
+
+    def size(self) -> int:
+        return len(self._tats)
+
+
+class SQLiteBackend:
+    """Shared backend: TATs in a WAL-mode SQLite table used by all workers
+
+    Each acquire is one ``BEGIN IMMEDIATE`` transaction, so concurrent
+    uvicorn workers enforce a single limit. Expired rows are purged every
+    ``sweep_interval`` seconds. Acquires may wait up to 5s for the write
+    lock, so async endpoints run them in the threadpool (``blocking``).
+    """
+    blocking = True
+
+    def __init__(self, path: str, sweep_interval: float = 60.0):
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        self.evictions = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.execute('CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)')
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key: str, now: float, interval: float, window: float) -> Tuple[bool, float]:
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT tat FROM rate_limits WHERE key = ?', (key,)).fetchone()
+            allowed, new_tat, retry_after = gcra(row[0] if row else 0.0, now, interval, window)
+            if allowed:
+                conn.execute(
+                    'INSERT INTO rate_limits (key, tat) VALUES (?, ?) '
+                    'ON CONFLICT(key) DO UPDATE SET tat = excluded.tat',
+                    (key, new_tat),
+                )
+            if now >= self._next_sweep:
+                self._next_sweep = now + self.sweep_interval
+                self.evictions += conn.execute('DELETE FROM rate_limits WHERE tat <= ?', (now,)).rowcount
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return allowed, retry_after
+
+    def size(self) -> int:
+        return self._conn().execute('SELECT COUNT(*) FROM rate_limits').fetchone()[0]
+
+
+class NullBackend:
+    """Backend that never limits (RATE_LIMIT_BACKEND=off, e.g. for load tests)"""
+    blocking = False
+    evictions = 0
+
+    def acquire(self, key: str, now: float, interval: float, window: float) -> Tuple[bool, float]:
+        return True, 0.0
+
+    def size(self) -> int:
+        return 0
+
+
+class RateLimiter:
+    """GCRA limiter allowing ``max_requests`` per ``window`` per client and endpoint"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.allowed = 0
+        self.rejected = 0
+
+    def check(self, key: str, max_requests: int, window: float) -> Tuple[bool, float]:
+        allowed, retry_after = self.backend.acquire(key, time.time(), window / max_requests, window)
+        if allowed:
+            self.allowed += 1
+        else:
+            self.rejected += 1
+        return allowed, retry_after
+
+    def limit(self, max_requests: int, window: float):
+        """Decorator enforcing the limit on a FastAPI endpoint taking a Request
+
+        Works for both ``def`` and ``async def`` endpoints; for ``async def``
+        a blocking backend is consulted from the threadpool.
+        """
+        def decorator(func):
+            scope = func.__name__
+
+            def enforce(args, kwargs):
+                request = kwargs.get('request')
+                if not isinstance(request, Request):
+                    request = next((a for a in args if isinstance(a, Request)), None)
+                if request is None or request.client is None:
+                    return
+
+                client_ip = request.client.host
+                allowed, retry_after = self.check(f'{scope}:{client_ip}', max_requests, window)
+                if not allowed:
+                    logger.warning(f"Rate limit exceeded for {client_ip} on {scope}")
+                    raise HTTPException(
+                        status_code=429,
+                        detail='Too many requests',
+                        headers={'Retry-After': str(max(1, int(retry_after + 0.999)))},
+                    )
+
+            if asyncio.iscoroutinefunction(func):
+                @wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if self.backend.blocking:
+                        await run_in_threadpool(enforce, args, kwargs)
+                    else:
+                        enforce(args, kwargs)
+                    return await func(*args, **kwargs)
+                return async_wrapper
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                enforce(args, kwargs)
+                return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def metrics(self) -> Dict:
+        return {
+            'backend': type(self.backend).__name__,
+            'keys': self.backend.size(),
+            'allowed': self.allowed,
+            'rejected': self.rejected,
+            'evictions': self.backend.evictions,
+        }
+
+
+def build_rate_limiter(kind: str = 'memory', path: str = None) -> RateLimiter:
+    """Create a limiter for RATE_LIMIT_BACKEND ('memory', 'sqlite' or 'off')"""
+    if kind == 'off':
+        logger.warning("Rate limiting disabled (RATE_LIMIT_BACKEND=off)")
+        return RateLimiter(NullBackend())
+    if kind == 'sqlite':
+        if not path:
+            raise ValueError('sqlite rate limit backend requires a database path')
+        return RateLimiter(SQLiteBackend(path))
+    if kind != 'memory':
+        logger.warning(f"Unknown rate limit backend {kind!r}, using memory")
+    return RateLimiter(MemoryBackend())
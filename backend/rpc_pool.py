@@ -0,0 +1,619 @@
+"""
+RPC Pool - Adaptive Solana JSON-RPC client over a pool of endpoints
+Health-scored endpoint choice, 429-aware token buckets, jittered backoff and hedged reads
+"""
+import asyncio
+import logging
+import random
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from solana.exceptions import SolanaRpcException, handle_async_exceptions, handle_exceptions
+from solana.rpc.api import Client
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.providers.async_base import AsyncBaseProvider
+from solana.rpc.providers.base import BaseProvider
+from solders.rpc.requests import batch_to_json
+
+from backend.solana_compat import attach_provider, httpx, parse_raw, parse_raw_batch
+
+logger = logging.getLogger(__name__)
+
+# Methods that change state. sendTransaction is safe to repeat (a signed
+# transaction lands at most once) but is never hedged; requestAirdrop is
+# only retried when the request provably did not reach the node.
+WRITE_METHODS = frozenset({'sendTransaction', 'requestAirdrop'})
+NON_IDEMPOTENT_METHODS = frozenset({'requestAirdrop'})
+
+# JSON-RPC errors that mean "this node cannot answer right now", not "the
+# request is wrong": node unhealthy/behind, block not available yet,
+# minimum context slot not reached
+RETRYABLE_RPC_CODES = frozenset({-32004, -32005, -32014, -32016})
+
+# Transport errors raised before the request left the client
+_NOT_SENT = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+_METHOD_RE = re.compile(r'"method"\s*:\s*"([^"]+)"')
+_ERROR_CODE_RE = re.compile(r'"error"\s*:\s*\{[^{}]*?"code"\s*:\s*(-?\d+)')
+
+
+def rpc_endpoints(value: str) -> List[str]:
+    """Split a comma/whitespace separated SOLANA_RPC value into URLs"""
+    return [u for u in re.split(r'[\s,]+', value or '') if u]
+
+
+class TokenBucket:
+    """Per-endpoint request rate limiter that learns the provider's limit
+
+    ``rate`` of 0 means unlimited until the first 429. A 429 halves the rate
+    (starting from the observed request rate) and blocks the bucket until
+    its Retry-After; successes then add back about one request/second per
+    second (AIMD), up to ``max_rate`` when one was configured.
+    """
+
+    def __init__(self, rate: float = 0.0, burst: Optional[float] = None, min_rate: float = 1.0):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.burst = burst or max(1.0, rate)
+        self.tokens = self.burst
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self._updated = time.monotonic()
+        self._window = (self._updated, 0, 0)  # (start, requests, previous second's requests)
+        self._lock = threading.Lock()
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a request could start, without reserving it"""
+        with self._lock:
+            wait = max(0.0, self.blocked_until - now)
+            if self.rate:
+                tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+                wait = max(wait, (1 - tokens) / self.rate if tokens < 1 else 0.0)
+            return wait
+
+    def reserve(self) -> float:
+        """Take a token; returns the seconds to wait before sending"""
+        now = time.monotonic()
+        with self._lock:
+            start, count, previous = self._window
+            self._window = (start, count + 1, previous) if now - start < 1.0 else (now, 1, count)
+            wait = max(0.0, self.blocked_until - now)
+            if self.rate:
+                self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate) - 1
+                self._updated = now
+                if self.tokens < 0:
+                    wait = max(wait, -self.tokens / self.rate)
+            return wait
+
+    def on_throttled(self, retry_after: Optional[float]):
+        now = time.monotonic()
+        with self._lock:
+            self.throttled += 1
+            if now >= self.blocked_until:
+                # One decrease per throttling episode, not per rejected in-flight request
+                start, count, previous = self._window
+                observed = max(previous, count / max(now - start, 1.0))
+                self.rate = max(self.min_rate, (self.rate or observed) / 2)
+                self.burst = max(1.0, self.rate)
+            self.tokens = min(self.tokens, 0.0)
+            self._updated = now
+            self.blocked_until = max(self.blocked_until, now + (retry_after if retry_after else 1.0 / self.rate))
+
+    def on_success(self):
+        with self._lock:
+            if not self.rate:
+                return
+            # Additive increase of about one request/second per second
+            self.rate = min(self.max_rate or float('inf'), self.rate + 1.0 / max(1.0, self.rate))
+            self.burst = max(1.0, self.rate)
+
+
+class Endpoint:
+    """Health state for one RPC URL
+
+    The score is the expected cost of sending the next request here:
+    latency (EWMA) scaled by in-flight load and recent error rate, plus any
+    rate-limit wait. Consecutive failures put the endpoint in a growing
+    cooldown; a success ends it.
+    """
+
+    LATENCY_ALPHA = 0.2
+    ERROR_ALPHA = 0.1
+    FAILURES_BEFORE_COOLDOWN = 3
+    MAX_COOLDOWN = 30.0
+
+    def __init__(self, url: str, rate_limit: float = 0.0):
+        self.url = url
+        self.bucket = TokenBucket(rate_limit)
+        self.latency = 0.1   # seconds, optimistic until measured
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.failures = 0    # consecutive
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def score(self, now: float) -> float:
+        if now < self.cooldown_until:
+            return float('inf')
+        return (self.latency * (1 + self.in_flight) * (1 + 10 * self.error_rate)
+                + self.bucket.wait_time(now))
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+            self.requests += 1
+
+    def finished(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def succeeded(self, seconds: float):
+        with self._lock:
+            self.latency += self.LATENCY_ALPHA * (seconds - self.latency)
+            self.error_rate *= 1 - self.ERROR_ALPHA
+            self.failures = 0
+            self.cooldown_until = 0.0
+        self.bucket.on_success()
+
+    def lagged(self, seconds: float):
+        """An unfinished request (e.g. a hedge loser) has taken ``seconds`` so far"""
+        with self._lock:
+            if seconds > self.latency:
+                self.latency += self.LATENCY_ALPHA * (seconds - self.latency)
+
+    def failed(self, seconds: Optional[float] = None):
+        with self._lock:
+            if seconds is not None:
+                self.latency += self.LATENCY_ALPHA * (seconds - self.latency)
+            self.error_rate += self.ERROR_ALPHA * (1 - self.error_rate)
+            self.errors += 1
+            self.failures += 1
+            if self.failures >= self.FAILURES_BEFORE_COOLDOWN:
+                backoff = 2 ** (self.failures - self.FAILURES_BEFORE_COOLDOWN)
+                self.cooldown_until = time.monotonic() + min(self.MAX_COOLDOWN, backoff)
+
+    def status(self) -> Dict:
+        now = time.monotonic()
+        return {
+            'url': self.url,
+            'healthy': now >= self.cooldown_until,
+            'score': round(self.score(now), 4) if now >= self.cooldown_until else None,
+            'latency_ms': round(self.latency * 1000, 1),
+            'error_rate': round(self.error_rate, 3),
+            'in_flight': self.in_flight,
+            'requests': self.requests,
+            'errors': self.errors,
+            'throttled': self.bucket.throttled,
+            'rate_limit': round(self.bucket.rate, 1) if self.bucket.rate else None,
+        }
+
+
+class MethodMetrics:
+    """Per-method counters and a bounded log2 latency histogram"""
+
+    BUCKETS_MS = [2 ** i for i in range(17)]
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.throttled = 0
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+
+    def record(self, seconds: float):
+        ms = seconds * 1000
+        i = 0
+        while i < len(self.BUCKETS_MS) and ms > self.BUCKETS_MS[i]:
+            i += 1
+        self.counts[i] += 1
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Upper bound (ms) of the bucket holding ``pct`` (0-100), None without samples"""
+        total = sum(self.counts)
+        if not total:
+            return None
+        target = pct / 100 * total
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                return float(self.BUCKETS_MS[min(i, len(self.BUCKETS_MS) - 1)])
+        return float(self.BUCKETS_MS[-1])
+
+    def summary(self) -> Dict:
+        return {
+            'calls': self.calls,
+            'errors': self.errors,
+            'retries': self.retries,
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+            'throttled': self.throttled,
+            'p50_ms': self.percentile(50),
+            'p99_ms': self.percentile(99),
+        }
+
+
+class _Retry(Exception):
+    """One attempt failed in a way another attempt may not"""
+
+    def __init__(self, reason: str, error: Optional[BaseException] = None, raw: Optional[str] = None,
+                 sent: bool = True):
+        super().__init__(reason)
+        self.reason = reason
+        self.error = error  # transport/HTTP error to raise if retries run out
+        self.raw = raw      # JSON-RPC error body to return if retries run out
+        self.sent = sent    # the node may have processed the request
+
+
+def _retry_after(response) -> Optional[float]:
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class RpcPool:
+    """Shared endpoint health, rate limits, retry policy and metrics
+
+    Clients made by ``client()`` / ``async_client()`` are ordinary solana-py
+    clients whose provider sends every request through the pool. Each
+    request goes to the best of two randomly sampled healthy endpoints;
+    failures (transport errors, 429, 5xx, "node behind" RPC errors) are
+    retried on another endpoint after a full-jitter exponential backoff.
+    Async reads are hedged: if the first endpoint has not answered by the
+    method's p95 latency, the same request is sent to a second endpoint and
+    the first answer wins. Hedges are budgeted to ``HEDGE_RATIO`` of reads,
+    so a saturated pool does not double its own load. Pool state is thread-safe, so sync clients used
+    from a threadpool and async clients on the event loop share it.
+    """
+
+    HEDGE_RATIO = 0.1   # hedges earned per read
+    HEDGE_BURST = 10.0
+
+    def __init__(self, urls: Sequence[str], rate_limit: float = 0.0, retries: int = 3,
+                 backoff_base: float = 0.1, backoff_max: float = 5.0, hedge: bool = True,
+                 hedge_after: Optional[float] = None, max_connections: int = 32, timeout: float = 10.0):
+        """Initialize pool
+
+        Args:
+            urls: RPC endpoint URLs
+            rate_limit: Requests/second per endpoint (0: unlimited until a 429)
+            retries: Extra attempts after the first
+            backoff_base: First backoff cap in seconds (doubles per attempt)
+            backoff_max: Largest backoff cap in seconds
+            hedge: Hedge async reads when more than one endpoint is configured
+            hedge_after: Fixed hedge delay in seconds (default: per-method p95)
+            max_connections: Keep-alive connections per endpoint and client
+            timeout: Per-request timeout in seconds
+        """
+        if not urls:
+            raise ValueError('RpcPool needs at least one endpoint')
+        self.endpoints = [Endpoint(url, rate_limit) for url in urls]
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge and len(self.endpoints) > 1
+        self.hedge_after = hedge_after
+        self._hedge_tokens = self.HEDGE_BURST
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.methods: Dict[str, MethodMetrics] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random()
+
+    @classmethod
+    def from_env(cls, value: str, **kwargs) -> 'RpcPool':
+        """Pool over a comma-separated SOLANA_RPC value"""
+        return cls(rpc_endpoints(value), **kwargs)
+
+    @property
+    def urls(self) -> List[str]:
+        return [ep.url for ep in self.endpoints]
+
+    # Clients ----------------------------------------------------------------
+
+    def _limits(self):
+        return httpx.Limits(max_connections=self.max_connections,
+                            max_keepalive_connections=self.max_connections, keepalive_expiry=30.0)
+
+    def client(self, **kwargs) -> Client:
+        """solana-py Client whose requests go through the pool"""
+        return attach_provider(Client(self.urls[0], timeout=self.timeout, **kwargs), PoolProvider(self))
+
+    def async_client(self, **kwargs) -> AsyncClient:
+        """solana-py AsyncClient whose requests go through the pool"""
+        return attach_provider(AsyncClient(self.urls[0], timeout=self.timeout, **kwargs), AsyncPoolProvider(self))
+
+    # Policy -----------------------------------------------------------------
+
+    def _metrics(self, method: str) -> MethodMetrics:
+        m = self.methods.get(method)
+        if m is None:
+            with self._lock:
+                m = self.methods.setdefault(method, MethodMetrics())
+        return m
+
+    def choose(self, exclude: Iterable[Endpoint] = ()) -> Endpoint:
+        """Best of two random candidates, avoiding ``exclude`` when possible"""
+        now = time.monotonic()
+        excluded = set(map(id, exclude))
+        candidates = [ep for ep in self.endpoints if id(ep) not in excluded] or self.endpoints
+        healthy = [ep for ep in candidates if now >= ep.cooldown_until]
+        if not healthy:
+            return min(candidates, key=lambda ep: ep.cooldown_until)
+        if len(healthy) == 1:
+            return healthy[0]
+        a, b = self._rng.sample(healthy, 2)
+        return a if a.score(now) <= b.score(now) else b
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry ``attempt`` (0-based)"""
+        return self._rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _take_hedge(self) -> bool:
+        with self._lock:
+            if self._hedge_tokens < 1:
+                return False
+            self._hedge_tokens -= 1
+            return True
+
+    def hedge_delay(self, method: str) -> float:
+        if self.hedge_after is not None:
+            return self.hedge_after
+        m = self._metrics(method)
+        if sum(m.counts) < 20:
+            return 0.25
+        return max(0.02, m.percentile(95) / 1000)
+
+    def _check(self, ep: Endpoint, response, seconds: float, method: str) -> str:
+        """Classify a response: return its body or raise _Retry"""
+        if response.status_code == 429:
+            ep.bucket.on_throttled(_retry_after(response))
+            self._metrics(method).throttled += 1
+            raise _Retry('429', httpx.HTTPStatusError('429 Too Many Requests', request=response.request,
+                                                       response=response), sent=False)
+        if response.status_code >= 500:
+            ep.failed(seconds)
+            raise _Retry(f'HTTP {response.status_code}',
+                         httpx.HTTPStatusError(f'HTTP {response.status_code}', request=response.request,
+                                               response=response))
+        response.raise_for_status()
+        raw = response.text
+        match = _ERROR_CODE_RE.search(raw)
+        if match:
+            code = int(match.group(1))
+            if code == 429:
+                ep.bucket.on_throttled(None)
+                self._metrics(method).throttled += 1
+                raise _Retry('429', raw=raw, sent=False)
+            if code in RETRYABLE_RPC_CODES:
+                ep.failed(seconds)
+                raise _Retry(f'RPC {code}', raw=raw)
+        ep.succeeded(seconds)
+        return raw
+
+    def _give_up(self, method: str, last: _Retry) -> str:
+        self._metrics(method).errors += 1
+        if last.raw is not None:
+            return last.raw  # parsed into an RPCException by the client
+        raise last.error
+
+    def _retryable(self, method: str, failure: _Retry) -> bool:
+        return method not in NON_IDEMPOTENT_METHODS or not failure.sent
+
+    # Async path -------------------------------------------------------------
+
+    async def _attempt(self, session, ep: Endpoint, content: str, method: str) -> str:
+        wait = ep.bucket.reserve()
+        if wait:
+            await asyncio.sleep(wait)
+        ep.started()
+        started = time.perf_counter()
+        try:
+            try:
+                response = await session.post(ep.url, content=content, headers=_HEADERS)
+            except (httpx.RemoteProtocolError, httpx.ReadError):
+                # Stale keep-alive connection: one immediate retry on a fresh one, unless
+                # the request may have reached the node and must not be repeated
+                if method in NON_IDEMPOTENT_METHODS:
+                    raise
+                response = await session.post(ep.url, content=content, headers=_HEADERS)
+        except _NOT_SENT as e:
+            ep.failed()
+            raise _Retry(type(e).__name__, e, sent=False)
+        except httpx.TransportError as e:
+            ep.failed(time.perf_counter() - started)
+            raise _Retry(type(e).__name__, e)
+        except asyncio.CancelledError:
+            ep.lagged(time.perf_counter() - started)
+            raise
+        finally:
+            ep.finished()
+        return self._check(ep, response, time.perf_counter() - started, method)
+
+    async def request_async(self, sessions: Dict[str, object], content: str, method: str) -> str:
+        """Send one JSON-RPC body with retries and hedging; returns the raw response"""
+        metrics = self._metrics(method)
+        metrics.calls += 1
+        started = time.perf_counter()
+        hedge = self.hedge and not any(m in WRITE_METHODS for m in _METHOD_RE.findall(content))
+        if hedge:
+            with self._lock:
+                self._hedge_tokens = min(self.HEDGE_BURST, self._hedge_tokens + self.HEDGE_RATIO)
+        tried: List[Endpoint] = []
+        last: Optional[_Retry] = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                metrics.retries += 1
+                await asyncio.sleep(self.backoff(attempt - 1))
+            ep = self.choose(tried[-len(self.endpoints) + 1:] if len(self.endpoints) > 1 else ())
+            tried.append(ep)
+            tasks = {asyncio.ensure_future(self._attempt(sessions[ep.url], ep, content, method)): ep}
+            try:
+                if hedge:
+                    done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay(method))
+                    if not done and self._take_hedge():
+                        second = self.choose([ep])
+                        if second is not ep:
+                            metrics.hedged += 1
+                            tried.append(second)
+                            tasks[asyncio.ensure_future(
+                                self._attempt(sessions[second.url], second, content, method))] = second
+                pending = set(tasks)
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        try:
+                            raw = task.result()
+                        except _Retry as e:
+                            last = e
+                            continue
+                        if tasks[task] is not ep:
+                            metrics.hedge_wins += 1
+                        metrics.record(time.perf_counter() - started)
+                        return raw
+            finally:
+                for task in tasks:
+                    task.cancel()
+            if not self._retryable(method, last):
+                break
+            logger.debug(f"{method} attempt {attempt + 1} on {ep.url} failed: {last.reason}")
+        return self._give_up(method, last)
+
+    # Sync path --------------------------------------------------------------
+
+    def _attempt_sync(self, session, ep: Endpoint, content: str, method: str) -> str:
+        wait = ep.bucket.reserve()
+        if wait:
+            time.sleep(wait)
+        ep.started()
+        started = time.perf_counter()
+        try:
+            try:
+                response = session.post(ep.url, content=content, headers=_HEADERS)
+            except (httpx.RemoteProtocolError, httpx.ReadError):
+                if method in NON_IDEMPOTENT_METHODS:
+                    raise
+                response = session.post(ep.url, content=content, headers=_HEADERS)
+        except _NOT_SENT as e:
+            ep.failed()
+            raise _Retry(type(e).__name__, e, sent=False)
+        except httpx.TransportError as e:
+            ep.failed(time.perf_counter() - started)
+            raise _Retry(type(e).__name__, e)
+        finally:
+            ep.finished()
+        return self._check(ep, response, time.perf_counter() - started, method)
+
+    def request(self, sessions: Dict[str, object], content: str, method: str) -> str:
+        """Blocking request_async without hedging (sync clients run on threads)"""
+        metrics = self._metrics(method)
+        metrics.calls += 1
+        started = time.perf_counter()
+        last: Optional[_Retry] = None
+        ep = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                metrics.retries += 1
+                time.sleep(self.backoff(attempt - 1))
+            ep = self.choose([ep] if ep is not None and len(self.endpoints) > 1 else ())
+            try:
+                raw = self._attempt_sync(sessions[ep.url], ep, content, method)
+            except _Retry as e:
+                last = e
+                if not self._retryable(method, e):
+                    break
+                logger.debug(f"{method} attempt {attempt + 1} on {ep.url} failed: {e.reason}")
+                continue
+            metrics.record(time.perf_counter() - started)
+            return raw
+        return self._give_up(method, last)
+
+    # Reporting --------------------------------------------------------------
+
+    def metrics(self) -> Dict:
+        return {
+            'endpoints': [ep.status() for ep in self.endpoints],
+            'methods': {name: m.summary() for name, m in sorted(self.methods.items())},
+        }
+
+    def healthy(self) -> bool:
+        now = time.monotonic()
+        return any(now >= ep.cooldown_until for ep in self.endpoints)
+
+
+_HEADERS = {'Content-Type': 'application/json'}
+
+
+def _method(content: str) -> str:
+    match = _METHOD_RE.search(content)
+    return match.group(1) if match else 'unknown'
+
+
+class AsyncPoolProvider(AsyncBaseProvider):
+    """solana-py async provider that sends through an RpcPool
+
+    Holds one keep-alive connection pool per endpoint.
+    """
+
+    def __init__(self, pool: RpcPool):
+        self.pool = pool
+        self.endpoint_uri = pool.urls[0]
+        self.sessions = {url: httpx.AsyncClient(timeout=pool.timeout, limits=pool._limits())
+                         for url in pool.urls}
+
+    def __str__(self) -> str:
+        return f"Async pooled RPC connection {', '.join(self.pool.urls)}"
+
+    @handle_async_exceptions(SolanaRpcException, httpx.HTTPError)
+    async def make_request(self, body, parser):
+        content = body.to_json()
+        raw = await self.pool.request_async(self.sessions, content, _method(content))
+        return parse_raw(raw, parser)
+
+    async def make_batch_request(self, reqs: Tuple, parsers: Tuple):
+        raw = await self.pool.request_async(self.sessions, batch_to_json(reqs), 'batch')
+        return parse_raw_batch(raw, parsers)
+
+    async def __aenter__(self) -> 'AsyncPoolProvider':
+        return self
+
+    async def __aexit__(self, _exc_type, _exc, _tb):
+        await self.close()
+
+    async def close(self):
+        for session in self.sessions.values():
+            await session.aclose()
+
+
+class PoolProvider(BaseProvider):
+    """solana-py sync provider that sends through an RpcPool"""
+
+    def __init__(self, pool: RpcPool):
+        self.pool = pool
+        self.endpoint_uri = pool.urls[0]
+        self.sessions = {url: httpx.Client(timeout=pool.timeout, limits=pool._limits()) for url in pool.urls}
+
+    def __str__(self) -> str:
+        return f"Pooled RPC connection {', '.join(self.pool.urls)}"
+
+    @handle_exceptions(SolanaRpcException, httpx.HTTPError)
+    def make_request(self, body, parser):
+        content = body.to_json()
+        raw = self.pool.request(self.sessions, content, _method(content))
+        return parse_raw(raw, parser)
+
+    def make_batch_request(self, reqs: Tuple, parsers: Tuple):
+        raw = self.pool.request(self.sessions, batch_to_json(reqs), 'batch')
+        return parse_raw_batch(raw, parsers)
+
+    def close(self):
+        for session in self.sessions.values():
+            session.close()
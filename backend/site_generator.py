@@ -3,13 +3,68 @@ Site Generator - Generate HTML for user sites
 Supports multiple templates: Classic, Modern, Minimal, Gaming
 """
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple, Union
+from functools import lru_cache
+import hashlib
 import json
+import os
+import re
 from datetime import datetime
 
+from backend.build_manifest import Build, BuildManifest
+
+# ${slot} placeholders; CSS braces need no escaping
+SLOT = re.compile(r'\$\{(\w+)\}')
+SLOTS = frozenset({'name', 'username', 'initial', 'description', 'color', 'rgb', 'light', 'year'})
+
+# Bump when rendering changes without a template source changing (e.g. render_template)
+RENDER_VERSION = 1
+
+
+class CompiledTemplate:
+    """A template split once into static chunks and the slots between them
+
+    ``chunks`` alternates static text and slot names (slots at odd
+    positions); a render copies that pre-sized list, drops each slot's
+    value into its position and joins it.
+    """
+
+    def __init__(self, name: str, source: str, default_color: str, default_description: str):
+        self.name = name
+        self.chunks: List[str] = SLOT.split(source)
+        self.slots: Tuple[Tuple[int, str], ...] = tuple(
+            (i, self.chunks[i]) for i in range(1, len(self.chunks), 2))
+        unknown = {slot for _, slot in self.slots} - SLOTS
+        if unknown:
+            raise ValueError(f"template {name}: unknown slots {sorted(unknown)}")
+        self.uses_palette = any(slot in ('rgb', 'light') for _, slot in self.slots)
+        self.default_color = default_color
+        self.default_description = default_description
+        # Changes whenever the output of this template can change
+        self.version = hashlib.sha256(json.dumps(
+            [RENDER_VERSION, source, default_color, default_description]).encode()).hexdigest()[:16]
+
+    def render(self, values: Dict[str, str]) -> str:
+        parts = self.chunks.copy()
+        for i, slot in self.slots:
+            parts[i] = values[slot]
+        return ''.join(parts)
+
 
 class SiteGenerator:
-    """Generate static HTML sites from user data"""
+    """Generate static HTML sites from user data
+
+    The templates are compiled once at import (see COMPILED below); a
+    render fills their slots from one dict of values, with the colors
+    derived from the site color looked up in a memoized palette.
+
+    Builds are incremental: the build manifest records each site's build
+    key (a hash of its inputs and template version) and the content hash
+    of each file. A site whose key is unchanged is not rendered, and a
+    rendered file identical to the last build is not rewritten; files that
+    are written are replaced atomically (temp file + rename) and logged in
+    the manifest for deploys to sync.
+    """
     
     TEMPLATES = {
         'classic': 'template_classic',
@@ -18,20 +73,26 @@ class SiteGenerator:
         'gaming': 'template_gaming'
     }
     
-    def __init__(self, sites_dir: Path = None):
+    def __init__(self, sites_dir: Path = None, manifest_path: Union[str, Path] = None):
         """Initialize site generator
         
         Args:
             sites_dir: Directory to store generated sites (default: /public/sites)
+            manifest_path: Build manifest database (default: outputs/site_manifest.sqlite
+                for the default sites_dir, else <sites_dir>.manifest.sqlite beside it)
         """
+        if manifest_path is None:
+            manifest_path = (Path(__file__).parent.parent / 'outputs' / 'site_manifest.sqlite' if sites_dir is None
+                             else Path(f'{Path(sites_dir).resolve()}.manifest.sqlite'))
         if sites_dir is None:
             sites_dir = Path(__file__).parent.parent / 'public' / 'sites'
         
         self.sites_dir = Path(sites_dir)
         self.sites_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest = BuildManifest(str(manifest_path))
     
     def generate(self, username: str, site_data: Dict) -> str:
-        """Generate a site from user data
+        """Generate a site from user data (a no-op when it is up to date)
         
         Args:
             username: Username (will be used as subdomain)
@@ -40,33 +101,88 @@ class SiteGenerator:
         Returns:
             Path to generated index.html
         """
+        self.build(username, site_data)
+        return str(self.sites_dir / username / 'index.html')
+    
+    def build(self, username: str, site_data: Dict, force: bool = False) -> List[str]:
+        """Bring a site's files up to date
+        
+        Args:
+            username: Username (will be used as subdomain)
+            site_data: Dict with keys: name, description, template, color
+            force: Render even if the build key is unchanged, and compare the
+                output with the files on disk rather than the manifest
+            
+        Returns:
+            Paths (relative to sites_dir) of the files written; empty if none changed
+        """
+        inputs = self.build_key(username, site_data)
+        previous = self.manifest.get(username)
+        user_dir = self.sites_dir / username
+        if (not force and previous is not None and previous.inputs == inputs
+                and all((user_dir / name).exists() for name in previous.files)):
+            return []
+        
         template_type = site_data.get('template', 'classic')
         template_method = getattr(self, self.TEMPLATES.get(template_type, 'template_classic'))
         
         html_content = template_method(username, site_data)
         
-        # Create user directory
-        user_dir = self.sites_dir / username
-        user_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Write index.html
-        index_path = user_dir / 'index.html'
-        index_path.write_text(html_content, encoding='utf-8')
-        
-        # Save metadata
+        # Metadata keeps the first build time, so an unchanged site renders the same bytes
+        created_at = previous.created_at if previous is not None else self._created_at(user_dir)
         metadata = {
             'username': username,
             'name': site_data.get('name', username),
             'description': site_data.get('description', ''),
             'template': template_type,
             'color': site_data.get('color', '#4ECDC4'),
-            'created_at': datetime.now().isoformat(),
+            'created_at': created_at,
             'status': 'active'
         }
-        metadata_path = user_dir / 'metadata.json'
-        metadata_path.write_text(json.dumps(metadata, indent=2), encoding='utf-8')
         
-        return str(index_path)
+        # Create user directory
+        user_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Write index.html and metadata.json where their content changed
+        hashes = {}
+        written = []
+        for name, text in (('index.html', html_content), ('metadata.json', json.dumps(metadata, indent=2))):
+            content = text.encode('utf-8')
+            digest = hashlib.sha256(content).hexdigest()
+            hashes[name] = digest
+            path = user_dir / name
+            if force:
+                unchanged = path.exists() and hashlib.sha256(path.read_bytes()).hexdigest() == digest
+            else:
+                unchanged = previous is not None and previous.files.get(name) == digest and path.exists()
+            if not unchanged:
+                self._write_atomic(path, content)
+                written.append(f'{username}/{name}')
+        
+        self.manifest.record(username, Build(inputs, hashes, created_at), written)
+        return written
+    
+    @staticmethod
+    def _created_at(user_dir: Path) -> str:
+        """Creation time of a site built before the manifest, or now for a new one"""
+        try:
+            return json.loads((user_dir / 'metadata.json').read_text(encoding='utf-8'))['created_at']
+        except (OSError, ValueError, KeyError):
+            return datetime.now().isoformat()
+    
+    def build_key(self, username: str, site_data: Dict) -> str:
+        """Hash of everything a site's files are rendered from"""
+        template_type = site_data.get('template', 'classic')
+        template = COMPILED.get(template_type, COMPILED['classic'])
+        inputs = [template.version, str(datetime.now().year), username, template_type,
+                  site_data.get('name'), site_data.get('description'), site_data.get('color')]
+        return hashlib.sha256(json.dumps(inputs, default=str).encode()).hexdigest()[:32]
+    
+    @staticmethod
+    def _write_atomic(path: Path, content: bytes):
+        tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
     
     def delete_site(self, username: str) -> bool:
         """Delete a user's site
@@ -82,29 +198,106 @@ class SiteGenerator:
             return False
         
         import shutil
+        files = sorted(p.relative_to(self.sites_dir).as_posix() for p in user_dir.rglob('*') if p.is_file())
         shutil.rmtree(user_dir)
+        self.manifest.remove(username, files)
         return True
     
     def template_classic(self, username: str, data: Dict) -> str:
         """Classic template - simple and clean"""
-        color = data.get('color', '#4ECDC4')
-        name = data.get('name', username)
-        description = data.get('description', '')
+        return self.render_template('classic', username, data)
+    
+    def template_modern(self, username: str, data: Dict) -> str:
+        """Modern template - contemporary design"""
+        return self.render_template('modern', username, data)
+    
+    def template_minimal(self, username: str, data: Dict) -> str:
+        """Minimal template - clean and simple"""
+        return self.render_template('minimal', username, data)
+    
+    def template_gaming(self, username: str, data: Dict) -> str:
+        """Gaming template - vibrant and playful"""
+        return self.render_template('gaming', username, data)
+    
+    @staticmethod
+    def render_template(template_type: str, username: str, data: Dict) -> str:
+        """Render one compiled template
+        
+        Args:
+            template_type: Key of COMPILED
+            username: Username (subdomain)
+            data: Dict with keys: name, description, color
+            
+        Returns:
+            HTML document
+        """
+        template = COMPILED[template_type]
+        color = str(data.get('color', template.default_color))
+        values = {
+            'name': str(data.get('name', username)),
+            'username': username,
+            'initial': username[0].upper(),
+            'description': str(data.get('description', '') or template.default_description),
+            'color': color,
+            'year': str(datetime.now().year),
+        }
+        if template.uses_palette:
+            values['rgb'], values['light'] = palette(color)
+        return template.render(values)
+    
+    @staticmethod
+    def hex_to_rgb(hex_color: str) -> str:
+        """Convert hex color to rgb string
+        
+        Args:
+            hex_color: Color in hex format (e.g., #FF00FF)
+            
+        Returns:
+            RGB string (e.g., "255, 0, 255")
+        """
+        hex_color = hex_color.lstrip('#')
+        return ', '.join(str(int(hex_color[i:i+2], 16)) for i in (0, 2, 4))
+    
+    @staticmethod
+    def lighten_color(hex_color: str, factor: float = 1.3) -> str:
+        """Lighten a hex color
         
-        return f"""<!DOCTYPE html>
+        Args:
+            hex_color: Color in hex format
+            factor: Lightening factor (1.0 = no change, >1 = lighter)
+            
+        Returns:
+            Lighter hex color
+        """
+        hex_color = hex_color.lstrip('#')
+        r = min(int(hex_color[0:2], 16) * factor, 255)
+        g = min(int(hex_color[2:4], 16) * factor, 255)
+        b = min(int(hex_color[4:6], 16) * factor, 255)
+        return f'#{int(r):02x}{int(g):02x}{int(b):02x}'
+
+
+@lru_cache(maxsize=4096)
+def palette(color: str) -> Tuple[str, str]:
+    """(rgb triplet, lightened hex) derived from a site color"""
+    return SiteGenerator.hex_to_rgb(color), SiteGenerator.lighten_color(color)
+
+
+# Template sources: ${slot} marks a value filled per render (see SLOTS)
+
+CLASSIC_HTML = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{name} - Dojo3</title>
+    <title>${name} - Dojo3</title>
     <style>
-        * {{
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             background: linear-gradient(135deg, #1a1a1a 0%, #2d2d2d 100%);
             color: #fff;
@@ -113,28 +306,28 @@ class SiteGenerator:
             align-items: center;
             justify-content: center;
             padding: 20px;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 800px;
             width: 100%;
             background: rgba(255, 255, 255, 0.05);
-            border: 1px solid rgba({self.hex_to_rgb(color)}, 0.3);
+            border: 1px solid rgba(${rgb}, 0.3);
             border-radius: 10px;
             padding: 60px 40px;
             text-align: center;
             backdrop-filter: blur(10px);
-        }}
+        }
         
-        .header {{
+        .header {
             margin-bottom: 30px;
-        }}
+        }
         
-        .avatar {{
+        .avatar {
             width: 120px;
             height: 120px;
             border-radius: 50%;
-            background: linear-gradient(135deg, {color}, {self.lighten_color(color)});
+            background: linear-gradient(135deg, ${color}, ${light});
             margin: 0 auto 20px;
             display: flex;
             align-items: center;
@@ -143,142 +336,137 @@ class SiteGenerator:
             font-weight: bold;
             color: #fff;
             text-shadow: 0 2px 4px rgba(0,0,0,0.3);
-        }}
+        }
         
-        h1 {{
+        h1 {
             font-size: 42px;
             margin-bottom: 10px;
-            color: {color};
-        }}
+            color: ${color};
+        }
         
-        .subtitle {{
+        .subtitle {
             font-size: 16px;
             color: rgba(255, 255, 255, 0.7);
             margin-bottom: 30px;
-        }}
+        }
         
-        .description {{
+        .description {
             font-size: 16px;
             line-height: 1.6;
             color: rgba(255, 255, 255, 0.8);
             margin-bottom: 40px;
-        }}
+        }
         
-        .footer {{
-            border-top: 1px solid rgba({self.hex_to_rgb(color)}, 0.2);
+        .footer {
+            border-top: 1px solid rgba(${rgb}, 0.2);
             padding-top: 20px;
             font-size: 14px;
             color: rgba(255, 255, 255, 0.6);
-        }}
+        }
         
-        .footer a {{
-            color: {color};
+        .footer a {
+            color: ${color};
             text-decoration: none;
             transition: opacity 0.3s;
-        }}
+        }
         
-        .footer a:hover {{
+        .footer a:hover {
             opacity: 0.8;
-        }}
+        }
         
-        @media (max-width: 600px) {{
-            .container {{
+        @media (max-width: 600px) {
+            .container {
                 padding: 40px 20px;
-            }}
-            h1 {{
+            }
+            h1 {
                 font-size: 32px;
-            }}
-            .avatar {{
+            }
+            .avatar {
                 width: 80px;
                 height: 80px;
                 font-size: 32px;
-            }}
-        }}
+            }
+        }
     </style>
 </head>
 <body>
     <div class="container">
         <div class="header">
-            <div class="avatar">{username[0].upper()}</div>
-            <h1>{name}</h1>
-            <p class="subtitle">@{username} on Dojo3</p>
+            <div class="avatar">${initial}</div>
+            <h1>${name}</h1>
+            <p class="subtitle">@${username} on Dojo3</p>
         </div>
         
-        <p class="description">{description if description else "Welcome to my personal site on Dojo3!"}</p>
+        <p class="description">${description}</p>
         
         <div class="footer">
-            <p>Powered by <a href="https://dojo3.local">Dojo3</a> • {datetime.now().strftime('%Y')}</p>
+            <p>Powered by <a href="https://dojo3.local">Dojo3</a> • ${year}</p>
         </div>
     </div>
 </body>
 </html>"""
-    
-    def template_modern(self, username: str, data: Dict) -> str:
-        """Modern template - contemporary design"""
-        color = data.get('color', '#4ECDC4')
-        name = data.get('name', username)
-        description = data.get('description', '')
-        
-        return f"""<!DOCTYPE html>
+
+
+MODERN_HTML = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{name} - Dojo3</title>
+    <title>${name} - Dojo3</title>
     <style>
-        * {{
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: 'Poppins', 'Segoe UI', sans-serif;
             background: linear-gradient(-45deg, #1e1e1e, #2d2d2d, #1a1a1a, #333);
             background-size: 400% 400%;
             animation: gradient 15s ease infinite;
             color: #fff;
             min-height: 100vh;
-        }}
+        }
         
-        @keyframes gradient {{
-            0% {{ background-position: 0% 50%; }}
-            50% {{ background-position: 100% 50%; }}
-            100% {{ background-position: 0% 50%; }}
-        }}
+        @keyframes gradient {
+            0% { background-position: 0% 50%; }
+            50% { background-position: 100% 50%; }
+            100% { background-position: 0% 50%; }
+        }
         
-        .navbar {{
+        .navbar {
             background: rgba(0, 0, 0, 0.2);
             padding: 20px 40px;
             display: flex;
             justify-content: space-between;
             align-items: center;
             backdrop-filter: blur(10px);
-            border-bottom: 1px solid rgba({self.hex_to_rgb(color)}, 0.1);
-        }}
+            border-bottom: 1px solid rgba(${rgb}, 0.1);
+        }
         
-        .logo {{
+        .logo {
             font-size: 24px;
             font-weight: bold;
-            color: {color};
-        }}
+            color: ${color};
+        }
         
-        .container {{
+        .container {
             max-width: 1000px;
             margin: 0 auto;
             padding: 80px 40px;
-        }}
+        }
         
-        .hero {{
+        .hero {
             text-align: center;
             margin-bottom: 60px;
-        }}
+        }
         
-        .hero-avatar {{
+        .hero-avatar {
             width: 140px;
             height: 140px;
             border-radius: 50%;
-            background: linear-gradient(135deg, {color}, {self.lighten_color(color)});
+            background: linear-gradient(135deg, ${color}, ${light});
             margin: 0 auto 30px;
             display: flex;
             align-items: center;
@@ -286,29 +474,29 @@ class SiteGenerator:
             font-size: 56px;
             font-weight: bold;
             color: #fff;
-            box-shadow: 0 20px 60px rgba({self.hex_to_rgb(color)}, 0.3);
+            box-shadow: 0 20px 60px rgba(${rgb}, 0.3);
             animation: float 3s ease-in-out infinite;
-        }}
+        }
         
-        @keyframes float {{
-            0%, 100% {{ transform: translateY(0px); }}
-            50% {{ transform: translateY(-20px); }}
-        }}
+        @keyframes float {
+            0%, 100% { transform: translateY(0px); }
+            50% { transform: translateY(-20px); }
+        }
         
-        h1 {{
+        h1 {
             font-size: 48px;
             margin-bottom: 10px;
             color: #fff;
-        }}
+        }
         
-        .subtitle {{
+        .subtitle {
             font-size: 18px;
-            color: {color};
+            color: ${color};
             margin-bottom: 20px;
             font-weight: 500;
-        }}
+        }
         
-        .description {{
+        .description {
             font-size: 16px;
             line-height: 1.8;
             color: rgba(255, 255, 255, 0.8);
@@ -316,187 +504,177 @@ class SiteGenerator:
             max-width: 600px;
             margin-left: auto;
             margin-right: auto;
-        }}
+        }
         
-        .cta-button {{
+        .cta-button {
             display: inline-block;
             padding: 14px 40px;
-            background: linear-gradient(135deg, {color}, {self.lighten_color(color)});
+            background: linear-gradient(135deg, ${color}, ${light});
             color: #000;
             text-decoration: none;
             border-radius: 50px;
             font-weight: 600;
             transition: transform 0.3s, box-shadow 0.3s;
-            box-shadow: 0 10px 30px rgba({self.hex_to_rgb(color)}, 0.2);
-        }}
+            box-shadow: 0 10px 30px rgba(${rgb}, 0.2);
+        }
         
-        .cta-button:hover {{
+        .cta-button:hover {
             transform: translateY(-3px);
-            box-shadow: 0 15px 40px rgba({self.hex_to_rgb(color)}, 0.4);
-        }}
+            box-shadow: 0 15px 40px rgba(${rgb}, 0.4);
+        }
         
-        .footer {{
+        .footer {
             text-align: center;
             padding-top: 40px;
             margin-top: 60px;
-            border-top: 1px solid rgba({self.hex_to_rgb(color)}, 0.1);
+            border-top: 1px solid rgba(${rgb}, 0.1);
             font-size: 14px;
             color: rgba(255, 255, 255, 0.6);
-        }}
+        }
         
-        @media (max-width: 600px) {{
-            .navbar {{
+        @media (max-width: 600px) {
+            .navbar {
                 padding: 15px 20px;
-            }}
-            .container {{
+            }
+            .container {
                 padding: 40px 20px;
-            }}
-            h1 {{
+            }
+            h1 {
                 font-size: 36px;
-            }}
-        }}
+            }
+        }
     </style>
 </head>
 <body>
     <nav class="navbar">
         <div class="logo">Dojo3</div>
-        <div>@{username}</div>
+        <div>@${username}</div>
     </nav>
     
     <div class="container">
         <div class="hero">
-            <div class="hero-avatar">{username[0].upper()}</div>
-            <h1>{name}</h1>
+            <div class="hero-avatar">${initial}</div>
+            <h1>${name}</h1>
             <p class="subtitle">Welcome to my Dojo3 Site</p>
-            <p class="description">{description if description else "Creating amazing experiences on Web3"}</p>
+            <p class="description">${description}</p>
             <a href="https://dojo3.local" class="cta-button">← Back to Dojo3</a>
         </div>
     </div>
     
     <div class="footer">
-        <p>© {datetime.now().strftime('%Y')} on Dojo3 • Powered by Blockchain</p>
+        <p>© ${year} on Dojo3 • Powered by Blockchain</p>
     </div>
 </body>
 </html>"""
-    
-    def template_minimal(self, username: str, data: Dict) -> str:
-        """Minimal template - clean and simple"""
-        color = data.get('color', '#4ECDC4')
-        name = data.get('name', username)
-        description = data.get('description', '')
-        
-        return f"""<!DOCTYPE html>
+
+
+MINIMAL_HTML = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{name}</title>
+    <title>${name}</title>
     <style>
-        * {{
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: 'Courier New', monospace;
             background: #fff;
             color: #000;
             padding: 40px 20px;
             line-height: 1.6;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 600px;
             margin: 0 auto;
-        }}
+        }
         
-        h1 {{
+        h1 {
             font-size: 32px;
             margin-bottom: 10px;
-            color: {color};
-        }}
+            color: ${color};
+        }
         
-        .meta {{
+        .meta {
             font-size: 14px;
             color: #999;
             margin-bottom: 40px;
-        }}
+        }
         
-        p {{
+        p {
             font-size: 16px;
             margin-bottom: 20px;
             color: #333;
-        }}
+        }
         
-        .divider {{
+        .divider {
             border: none;
             border-top: 1px solid #eee;
             margin: 40px 0;
-        }}
+        }
         
-        a {{
-            color: {color};
+        a {
+            color: ${color};
             text-decoration: none;
-            border-bottom: 1px dotted {color};
-        }}
+            border-bottom: 1px dotted ${color};
+        }
         
-        a:hover {{
+        a:hover {
             opacity: 0.7;
-        }}
+        }
         
-        .footer {{
+        .footer {
             font-size: 12px;
             color: #999;
             margin-top: 60px;
-        }}
+        }
     </style>
 </head>
 <body>
     <div class="container">
-        <h1>{name}</h1>
-        <div class="meta">@{username} on <a href="https://dojo3.local">Dojo3</a></div>
+        <h1>${name}</h1>
+        <div class="meta">@${username} on <a href="https://dojo3.local">Dojo3</a></div>
         
-        <p>{description if description else "A minimal site on Dojo3"}</p>
+        <p>${description}</p>
         
         <hr class="divider">
         
         <div class="footer">
-            <p>Made with Dojo3 • {datetime.now().strftime('%Y')}</p>
+            <p>Made with Dojo3 • ${year}</p>
         </div>
     </div>
 </body>
 </html>"""
-    
-    def template_gaming(self, username: str, data: Dict) -> str:
-        """Gaming template - vibrant and playful"""
-        color = data.get('color', '#00FF41')
-        name = data.get('name', username)
-        description = data.get('description', '')
-        
-        return f"""<!DOCTYPE html>
+
+
+GAMING_HTML = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{name}</title>
+    <title>${name}</title>
     <style>
-        * {{
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: 'Arial', sans-serif;
             background: #0a0a0a;
-            color: {color};
+            color: ${color};
             min-height: 100vh;
             overflow: hidden;
             position: relative;
-        }}
+        }
         
-        .scanlines {{
+        .scanlines {
             position: fixed;
             top: 0;
             left: 0;
@@ -511,9 +689,9 @@ class SiteGenerator:
             );
             pointer-events: none;
             z-index: 1;
-        }}
+        }
         
-        .container {{
+        .container {
             position: relative;
             z-index: 2;
             max-width: 800px;
@@ -524,118 +702,96 @@ class SiteGenerator:
             display: flex;
             flex-direction: column;
             justify-content: center;
-            text-shadow: 0 0 10px {color};
-        }}
+            text-shadow: 0 0 10px ${color};
+        }
         
-        .title {{
+        .title {
             font-size: 48px;
             font-weight: bold;
             margin-bottom: 20px;
             animation: flicker 0.15s infinite;
             text-transform: uppercase;
             letter-spacing: 3px;
-        }}
-        
-        @keyframes flicker {{
-            0%, 19%, 21%, 23%, 25%, 54%, 56%, 100% {{
-                text-shadow: 0 0 10px {color};
-            }}
-            20%, 24%, 55% {{
-                text-shadow: 0 0 5px {color};
-            }}
-        }}
-        
-        .player {{
+        }
+        
+        @keyframes flicker {
+            0%, 19%, 21%, 23%, 25%, 54%, 56%, 100% {
+                text-shadow: 0 0 10px ${color};
+            }
+            20%, 24%, 55% {
+                text-shadow: 0 0 5px ${color};
+            }
+        }
+        
+        .player {
             font-size: 14px;
             margin-bottom: 40px;
             opacity: 0.8;
-        }}
+        }
         
-        .description {{
+        .description {
             font-size: 16px;
             margin-bottom: 40px;
             line-height: 1.8;
-        }}
+        }
         
-        .button {{
+        .button {
             display: inline-block;
             padding: 10px 30px;
-            border: 2px solid {color};
-            background: rgba({self.hex_to_rgb(color)}, 0.1);
-            color: {color};
+            border: 2px solid ${color};
+            background: rgba(${rgb}, 0.1);
+            color: ${color};
             text-decoration: none;
             text-transform: uppercase;
             font-weight: bold;
             cursor: pointer;
             transition: all 0.3s;
-            box-shadow: 0 0 10px rgba({self.hex_to_rgb(color)}, 0.3);
-        }}
+            box-shadow: 0 0 10px rgba(${rgb}, 0.3);
+        }
         
-        .button:hover {{
-            background: rgba({self.hex_to_rgb(color)}, 0.2);
-            box-shadow: 0 0 20px rgba({self.hex_to_rgb(color)}, 0.6);
-        }}
+        .button:hover {
+            background: rgba(${rgb}, 0.2);
+            box-shadow: 0 0 20px rgba(${rgb}, 0.6);
+        }
         
-        .score {{
+        .score {
             position: fixed;
             top: 20px;
             right: 20px;
             font-size: 12px;
             text-transform: uppercase;
             opacity: 0.7;
-        }}
+        }
         
-        @media (max-width: 600px) {{
-            .container {{
+        @media (max-width: 600px) {
+            .container {
                 padding: 30px 20px;
-            }}
-            .title {{
+            }
+            .title {
                 font-size: 32px;
                 letter-spacing: 2px;
-            }}
-        }}
+            }
+        }
     </style>
 </head>
 <body>
     <div class="scanlines"></div>
     
-    <div class="score">Player: {username}</div>
+    <div class="score">Player: ${username}</div>
     
     <div class="container">
-        <div class="title">► {name}</div>
-        <div class="player">@{username}</div>
-        <p class="description">{description if description else "🎮 Welcome to the Game"}</p>
+        <div class="title">► ${name}</div>
+        <div class="player">@${username}</div>
+        <p class="description">${description}</p>
         <a href="https://dojo3.local" class="button">← Back</a>
     </div>
 </body>
 </html>"""
-    
-    @staticmethod
-    def hex_to_rgb(hex_color: str) -> str:
-        """Convert hex color to rgb string
-        
-        Args:
-            hex_color: Color in hex format (e.g., #FF00FF)
-            
-        Returns:
-            RGB string (e.g., "255, 0, 255")
-        """
-        hex_color = hex_color.lstrip('#')
-        return ', '.join(str(int(hex_color[i:i+2], 16)) for i in (0, 2, 4))
-    
-    @staticmethod
-    def lighten_color(hex_color: str, factor: float = 1.3) -> str:
-        """Lighten a hex color
-        
-        Args:
-            hex_color: Color in hex format
-            factor: Lightening factor (1.0 = no change, >1 = lighter)
-            
-        Returns:
-            Lighter hex color
-        """
-        hex_color = hex_color.lstrip('#')
-        r = min(int(hex_color[0:2], 16) * factor, 255)
-        g = min(int(hex_color[2:4], 16) * factor, 255)
-        b = min(int(hex_color[4:6], 16) * factor, 255)
-        return f'#{int(r):02x}{int(g):02x}{int(b):02x}'
+
+
+COMPILED = {
+    'classic': CompiledTemplate('classic', CLASSIC_HTML, '#4ECDC4', 'Welcome to my personal site on Dojo3!'),
+    'modern': CompiledTemplate('modern', MODERN_HTML, '#4ECDC4', 'Creating amazing experiences on Web3'),
+    'minimal': CompiledTemplate('minimal', MINIMAL_HTML, '#4ECDC4', 'A minimal site on Dojo3'),
+    'gaming': CompiledTemplate('gaming', GAMING_HTML, '#00FF41', '🎮 Welcome to the Game'),
+}
@@ -0,0 +1,343 @@
+"""
+Site Store - Indexed SQLite store for the site manager databases
+Single-row transactional updates, lookup by key, wallet and active status, keyset-paginated listing
+"""
+import os
+import base64
+import json
+import logging
+import sqlite3
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+TABLES = ('sites', 'user_sites')  # keyed by site id / by username
+
+
+class SiteExists(Exception):
+    """Raised when creating a site whose key is already taken"""
+
+
+class SiteNotFound(Exception):
+    """Raised when a site key is unknown"""
+
+
+class SiteForbidden(Exception):
+    """Raised when a wallet changes a site it does not own"""
+
+
+class BadCursor(ValueError):
+    """Raised for a listing cursor this store did not issue"""
+
+
+def encode_cursor(created_at: str, key: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([created_at, key]).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        created_at, key = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise BadCursor(cursor)
+    if not isinstance(created_at, str) or not isinstance(key, str):
+        raise BadCursor(cursor)
+    return created_at, key
+
+
+class SiteStore:
+    """One table of sites in a WAL-mode SQLite database shared by all workers
+
+    Each site is a row keyed by its id (or username) holding the full record
+    as JSON, next to the columns it is looked up by: ``wallet`` and
+    ``active`` are indexed, so listing a wallet's sites or the active ones
+    touches only matching rows. Changes are single-row ``BEGIN IMMEDIATE``
+    transactions, so the ownership check and the write cannot interleave
+    with another worker's.
+
+    The same transaction bumps the table's version and keeps its site
+    counts (active/inactive, per template) in ``site_counters``, so a
+    listing can be validated by version and counted without a scan.
+    """
+
+    def __init__(self, path: str, table: str = 'sites', legacy_json: Optional[str] = None,
+                 timeout: float = 5.0):
+        """Initialize site store
+
+        Args:
+            path: SQLite database file (created if missing)
+            table: One of TABLES
+            legacy_json: Old JSON database ({key: site}) imported while the table is empty
+            timeout: Seconds to wait for another process's write lock
+        """
+        if table not in TABLES:
+            raise ValueError(f"unknown site table {table!r}")
+        self.path = path
+        self.table = table
+        self.timeout = timeout
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                wallet TEXT,
+                template TEXT,
+                active INTEGER NOT NULL,
+                created_at TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS {table}_wallet ON {table} (wallet);
+            CREATE INDEX IF NOT EXISTS {table}_active ON {table} (active, created_at, key);
+            CREATE INDEX IF NOT EXISTS {table}_template ON {table} (template, active, created_at, key);
+            CREATE TABLE IF NOT EXISTS site_counters (
+                store TEXT NOT NULL,
+                name TEXT NOT NULL,
+                value INTEGER NOT NULL,
+                PRIMARY KEY (store, name)
+            );
+        """)
+        if self.version() == 0:
+            self._transaction(self._recount)
+        if legacy_json and os.path.exists(legacy_json) and self.count(active=None) == 0:
+            self.import_json(legacy_json)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, fn, *args):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            result = fn(*args, conn)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return result
+
+    @staticmethod
+    def _row(key: str, site: Dict) -> tuple:
+        # created_at is '' rather than NULL so listing cursors compare plainly
+        return (key, site.get('wallet'), site.get('template'), 1 if site.get('active') else 0,
+                site.get('created_at') or '', json.dumps(site, separators=(',', ':')))
+
+    def _add(self, conn: sqlite3.Connection, counts: Dict[str, int]):
+        conn.executemany('INSERT INTO site_counters (store, name, value) VALUES (?, ?, ?) '
+                         'ON CONFLICT(store, name) DO UPDATE SET value = value + excluded.value',
+                         [(self.table, name, delta) for name, delta in counts.items()])
+
+    @staticmethod
+    def _counts(site: Dict, delta: int) -> Dict[str, int]:
+        active = 1 if site.get('active') else 0
+        return {f'active:{active}': delta, f"template:{site.get('template')}:{active}": delta}
+
+    def _changed(self, conn: sqlite3.Connection, old: Optional[Dict], new: Optional[Dict]):
+        counts = {'version': 1}
+        for site, delta in ((old, -1), (new, 1)):
+            if site is not None:
+                for name, d in self._counts(site, delta).items():
+                    counts[name] = counts.get(name, 0) + d
+        self._add(conn, counts)
+
+    def _recount(self, conn: sqlite3.Connection):
+        """Rebuild the counters from the rows (after bulk imports)"""
+        version = self.version()
+        conn.execute('DELETE FROM site_counters WHERE store = ?', (self.table,))
+        counts = {'version': version + 1}
+        for template, active, n in conn.execute(
+                f'SELECT template, active, COUNT(*) FROM {self.table} GROUP BY template, active'):
+            counts[f'active:{active}'] = counts.get(f'active:{active}', 0) + n
+            counts[f'template:{template}:{active}'] = n
+        self._add(conn, counts)
+
+    def _write(self, key: str, site: Dict, conn: sqlite3.Connection, old: Optional[Dict] = None):
+        conn.execute(f'INSERT INTO {self.table} (key, wallet, template, active, created_at, data) '
+                     f'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET wallet = excluded.wallet, '
+                     f'template = excluded.template, active = excluded.active, '
+                     f'created_at = excluded.created_at, data = excluded.data', self._row(key, site))
+        self._changed(conn, old, site)
+
+    # Reads ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Dict]:
+        row = self._conn().execute(f'SELECT data FROM {self.table} WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def by_wallet(self, wallet: str) -> List[Dict]:
+        """Sites of one wallet, in key order"""
+        return [json.loads(data) for (data,) in self._conn().execute(
+            f'SELECT data FROM {self.table} WHERE wallet = ? ORDER BY key', (wallet,))]
+
+    def items(self, active: Optional[bool] = None, template: Optional[str] = None) -> Iterator[tuple]:
+        """(key, site) for every site (or only active/inactive ones, of one template), in key order"""
+        where, params = self._filters(active, template, None)
+        for key, data in self._conn().execute(
+                f"SELECT key, data FROM {self.table} {'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY key",
+                params):
+            yield key, json.loads(data)
+
+    def _counter(self, name: str) -> int:
+        row = self._conn().execute('SELECT value FROM site_counters WHERE store = ? AND name = ?',
+                                   (self.table, name)).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _filters(active: Optional[bool], template: Optional[str], wallet: Optional[str]) -> Tuple[List[str], list]:
+        where, params = [], []
+        for column, value in (('active', None if active is None else (1 if active else 0)),
+                              ('template', template), ('wallet', wallet)):
+            if value is not None:
+                where.append(f'{column} = ?')
+                params.append(value)
+        return where, params
+
+    def version(self) -> int:
+        """Counter bumped by every write; unchanged version means unchanged table"""
+        return self._counter('version')
+
+    def count(self, active: Optional[bool] = True, template: Optional[str] = None,
+              wallet: Optional[str] = None) -> int:
+        """Number of active (inactive, or with None all) sites, optionally of one template or wallet
+
+        Counts come from the counters, except per wallet (an index range, one
+        site per wallet for user sites).
+        """
+        if wallet is not None:
+            where, params = self._filters(active, template, wallet)
+            return self._conn().execute(f"SELECT COUNT(*) FROM {self.table} WHERE {' AND '.join(where)}",
+                                        params).fetchone()[0]
+        prefix = f'template:{template}:' if template is not None else 'active:'
+        states = (0, 1) if active is None else (1 if active else 0,)
+        return sum(self._counter(f'{prefix}{state}') for state in states)
+
+    def page(self, limit: int = 50, cursor: Optional[str] = None, active: Optional[bool] = True,
+             template: Optional[str] = None, wallet: Optional[str] = None,
+             newest_first: bool = True) -> Tuple[List[Tuple[str, Dict]], Optional[str]]:
+        """One page of sites ordered by created_at (then key)
+
+        Args:
+            limit: Maximum sites on the page
+            cursor: ``next_cursor`` of the previous page
+            active: Only active (True) or inactive (False) sites; None for both
+            template: Only sites of this template
+            wallet: Only sites of this wallet
+            newest_first: Order by created_at descending
+
+        Returns:
+            ([(key, site), ...], next_cursor or None on the last page)
+
+        Raises:
+            BadCursor: If ``cursor`` is malformed
+        """
+        where, params = self._filters(active, template, wallet)
+        if cursor:
+            where.append(f"(created_at, key) {'<' if newest_first else '>'} (?, ?)")
+            params.extend(decode_cursor(cursor))
+        direction = 'DESC' if newest_first else 'ASC'
+        rows = self._conn().execute(
+            f"SELECT key, created_at, data FROM {self.table} {'WHERE ' + ' AND '.join(where) if where else ''} "
+            f"ORDER BY created_at {direction}, key {direction} LIMIT ?", params + [limit + 1]).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1][1], rows[limit - 1][0]) if len(rows) > limit else None
+        return [(key, json.loads(data)) for key, _, data in rows[:limit]], next_cursor
+
+    # Writes -----------------------------------------------------------------
+
+    def create(self, key: str, site: Dict, replace_inactive: bool = False) -> Dict:
+        """Insert a new site
+
+        Args:
+            key: Site id or username
+            site: Full site record
+            replace_inactive: Let the new site take over the key of an inactive one
+
+        Raises:
+            SiteExists: If the key is taken (by an active site, with replace_inactive)
+        """
+        def create(conn):
+            row = conn.execute(f'SELECT active, data FROM {self.table} WHERE key = ?', (key,)).fetchone()
+            if row is not None and (row[0] or not replace_inactive):
+                raise SiteExists(key)
+            self._write(key, site, conn, json.loads(row[1]) if row else None)
+
+        self._transaction(create)
+        return site
+
+    def update(self, key: str, changes: Dict, wallet: Optional[str] = None) -> Dict:
+        """Apply ``changes`` to one site and return the updated record
+
+        Args:
+            key: Site id or username
+            changes: Fields to set
+            wallet: Owner the site must belong to (None: no check)
+
+        Raises:
+            SiteNotFound: If the key is unknown
+            SiteForbidden: If the site belongs to another wallet
+        """
+        def update(conn):
+            old = self._owned(key, wallet, conn)
+            site = dict(old, **changes)
+            self._write(key, site, conn, old)
+            return site
+
+        return self._transaction(update)
+
+    def delete(self, key: str, wallet: Optional[str] = None) -> Dict:
+        """Remove one site and return its last record
+
+        Raises:
+            SiteNotFound: If the key is unknown
+            SiteForbidden: If the site belongs to another wallet
+        """
+        def delete(conn):
+            site = self._owned(key, wallet, conn)
+            conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+            self._changed(conn, site, None)
+            return site
+
+        return self._transaction(delete)
+
+    def _owned(self, key: str, wallet: Optional[str], conn: sqlite3.Connection) -> Dict:
+        row = conn.execute(f'SELECT data FROM {self.table} WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            raise SiteNotFound(key)
+        site = json.loads(row[0])
+        if wallet is not None and site.get('wallet') != wallet:
+            raise SiteForbidden(key)
+        return site
+
+    def import_json(self, json_path: str, overwrite: bool = False) -> int:
+        """Load an old JSON database ({key: site}) in one transaction
+
+        Args:
+            json_path: sites.json / sites_db.json file
+            overwrite: Replace sites already in the table (default: keep them)
+
+        Returns:
+            Number of sites written
+        """
+        with open(json_path, 'r') as f:
+            sites = json.load(f)
+        def load(conn):
+            existing = set() if overwrite else {k for (k,) in conn.execute(f'SELECT key FROM {self.table}')}
+            rows = [self._row(key, site) for key, site in sites.items() if key not in existing]
+            conn.executemany(f'INSERT OR REPLACE INTO {self.table} (key, wallet, template, active, created_at, data) '
+                             f'VALUES (?, ?, ?, ?, ?, ?)', rows)
+            self._recount(conn)
+            return len(rows)
+
+        written = self._transaction(load)
+        logger.info(f"Imported {written} of {len(sites)} sites from {json_path} into {self.table}")
+        return written
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
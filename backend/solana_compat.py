@@ -0,0 +1,68 @@
+"""
+Solana Compat - The one place that relies on solana-py internals
+Provider injection, raw response parsing and the HTTP library, checked against the tested versions
+"""
+import logging
+from importlib.metadata import PackageNotFoundError, version
+from typing import Tuple
+
+logger = logging.getLogger(__name__)
+
+# (major, minor) the pooled RPC provider (backend.rpc_pool) was tested against;
+# keep in step with the pins in requirements.txt and backend/requirements.txt
+SUPPORTED_VERSIONS = {'solana': (0, 37), 'solders': (0, 27)}
+
+
+class UnsupportedSolanaVersion(RuntimeError):
+    """Raised when the installed solana-py/solders differ from the tested versions"""
+
+
+def _major_minor(package: str) -> Tuple[int, int]:
+    try:
+        parts = version(package).split('.')
+        return int(parts[0]), int(parts[1])
+    except (PackageNotFoundError, ValueError, IndexError) as e:
+        raise UnsupportedSolanaVersion(f"cannot determine the installed {package} version: {e}")
+
+
+def check_versions():
+    """Refuse solana-py/solders versions whose internals were not tested
+
+    Raises:
+        UnsupportedSolanaVersion: If a package's major.minor differs from SUPPORTED_VERSIONS
+    """
+    for package, wanted in SUPPORTED_VERSIONS.items():
+        found = _major_minor(package)
+        if found != wanted:
+            raise UnsupportedSolanaVersion(
+                f"{package} {'.'.join(map(str, found))} is installed; the pooled RPC provider needs "
+                f"{package}=={'.'.join(map(str, wanted))}.* (see requirements.txt)")
+
+
+check_versions()
+
+# solana-py 0.36+ sends over httpx2, whose exceptions its providers translate
+import httpx2 as httpx  # noqa: E402
+from solana.rpc.providers.core import _parse_raw, _parse_raw_batch  # noqa: E402
+
+
+def parse_raw(raw: str, parser):
+    """Parse a raw JSON-RPC response the way solana-py's own providers do"""
+    return _parse_raw(raw, parser=parser)
+
+
+def parse_raw_batch(raw: str, parsers):
+    """Parse a raw JSON-RPC batch response the way solana-py's own providers do"""
+    return _parse_raw_batch(raw, parsers)
+
+
+def attach_provider(client, provider):
+    """Route every request of a solana-py Client/AsyncClient through ``provider``
+
+    solana-py has no public hook for a custom provider; its clients keep it
+    in ``_provider``, which every RPC method goes through.
+    """
+    if not hasattr(client, '_provider'):
+        raise UnsupportedSolanaVersion(f"{type(client).__name__} has no provider attribute to replace")
+    client._provider = provider
+    return client
@@ -0,0 +1,340 @@
+"""
+Transfer Journal - Write-ahead checkpoint journal for airdrop transfers
+SQLite (WAL) record of intended, signed, sent and resolved transfers for resumable runs
+"""
+import os
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from solana.rpc.types import TxOpts
+from solders.signature import Signature
+from solders.transaction_status import TransactionConfirmationStatus
+
+from backend.blockhash_cache import EXPIRY_MARGIN_BLOCKS
+from backend.confirmation_tracker import STATUS_BATCH
+from backend.tx_pipeline import Transfer, TransferJob, TxResult
+
+logger = logging.getLogger(__name__)
+
+# Transfer states. A transfer is in doubt while its latest transaction may
+# still land: it must be reconciled against the chain before any resend.
+INTENDED = 'intended'
+SIGNED = 'signed'
+SENT = 'sent'
+CONFIRMED = 'confirmed'
+FAILED = 'failed'
+UNCONFIRMED = 'unconfirmed'
+SEND_ERROR = 'send_error'
+EXPIRED = 'expired'
+
+IN_DOUBT = (SIGNED, SENT, UNCONFIRMED, SEND_ERROR)
+RETRYABLE = (INTENDED, FAILED, EXPIRED)
+
+_LANDED = (TransactionConfirmationStatus.Confirmed, TransactionConfirmationStatus.Finalized)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS transfers (
+    key TEXT PRIMARY KEY,
+    wallet TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    signature TEXT,
+    error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transfers_signature ON transfers (signature);
+CREATE TABLE IF NOT EXISTS txs (
+    signature TEXT PRIMARY KEY,
+    raw BLOB NOT NULL,
+    last_valid_height INTEGER NOT NULL,
+    keys TEXT NOT NULL,
+    state TEXT NOT NULL,
+    error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS txs_state ON txs (state);
+"""
+
+
+class JournalMismatch(Exception):
+    """Raised when a resumed run does not match what the journal recorded"""
+
+
+class JournalClaimed(Exception):
+    """Raised when another worker has claimed the journal (see TransferJournal.claim)"""
+
+
+class TransferJournal:
+    """Durable per-transfer checkpoints for one airdrop run
+
+    Every transfer is recorded as intended when planned. A transaction's
+    signature and signed bytes are committed (fsync) before its first send,
+    so after a crash every transaction that can possibly land is known.
+    Sent and resolved states are committed lazily with the next signed
+    record; losing them only means ``reconcile`` asks the chain again.
+
+    Lookups go through the database, so a resumed run over millions of
+    recipients keeps constant memory.
+
+    A journal shared between processes (a shard handed from a dead worker
+    to another, see backend.airdrop_shards) is fenced with ``claim``: once
+    another owner has claimed it, this one can no longer record a signed
+    transaction, and so can no longer send one.
+    """
+
+    def __init__(self, path: str, synchronous: str = 'FULL', timeout: float = 30.0):
+        """Initialize journal
+
+        Args:
+            path: SQLite database file (created if missing)
+            synchronous: SQLite synchronous pragma; FULL survives power loss
+            timeout: Seconds to wait for another process's write lock
+        """
+        self.path = path
+        self.owner: Optional[str] = None
+        self._fenced = False
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=timeout)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(f'PRAGMA synchronous={synchronous}')
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+    # Run metadata -----------------------------------------------------------
+
+    def transfer_count(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM transfers').fetchone()[0]
+
+    def check_meta(self, meta: Dict[str, str]):
+        """Record run parameters, or verify them against an existing journal
+
+        Raises:
+            JournalMismatch: If a recorded parameter differs
+        """
+        recorded = dict(self._conn.execute('SELECT key, value FROM meta'))
+        for key, value in meta.items():
+            value = str(value)
+            if key in recorded and recorded[key] != value:
+                raise JournalMismatch(f"journal {key} is {recorded[key]!r}, this run has {value!r}")
+            if key not in recorded:
+                self._conn.execute('INSERT INTO meta (key, value) VALUES (?, ?)', (key, value))
+        self._conn.commit()
+
+    def claim(self, owner: str):
+        """Become the journal's only writer
+
+        Any previous owner's next ``signed`` raises JournalClaimed. Signing
+        is write-ahead, so once this returns every transaction the previous
+        owner can ever send is already in the journal for ``reconcile``.
+        """
+        self._conn.commit()
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('owner', ?)", (owner,))
+        self._conn.commit()
+        self.owner = owner
+        self._fenced = False
+
+    def _check_owner(self):
+        if self.owner is None:
+            return
+        if not self._fenced:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'owner'").fetchone()
+            self._fenced = row is None or row[0] != self.owner
+        if self._fenced:
+            self._conn.rollback()
+            raise JournalClaimed(f"journal {self.path} was claimed by another worker")
+
+    # Planning ---------------------------------------------------------------
+
+    def plan(self, transfers: Iterable[Transfer]) -> Tuple[Tuple[Transfer, ...], int, List[str]]:
+        """Record transfers as intended and return the ones still to send
+
+        Returns:
+            (transfers to send, count already confirmed, errors for in-doubt transfers)
+
+        Raises:
+            JournalMismatch: If a recorded transfer has a different owner or amount
+        """
+        if self._fenced:
+            raise JournalClaimed(f"journal {self.path} was claimed by another worker")
+        todo, done, errors = [], 0, []
+        now = time.time()
+        for t in transfers:
+            row = self._conn.execute('SELECT owner, amount, state, signature FROM transfers WHERE key = ?',
+                                     (t.key,)).fetchone()
+            if row is None:
+                self._conn.execute(
+                    'INSERT INTO transfers (key, wallet, kind, owner, amount, state, updated) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (t.key, t.wallet, t.kind, t.owner, t.amount, INTENDED, now))
+                todo.append(t)
+                continue
+            owner, amount, state, signature = row
+            if (owner, amount) != (t.owner, t.amount):
+                raise JournalMismatch(f"transfer {t.key} was {amount} to {owner}, now {t.amount} to {t.owner}")
+            if state == CONFIRMED:
+                done += 1
+            elif state in RETRYABLE:
+                todo.append(t)
+            else:
+                errors.append(f"{t.kind} in_doubt: {state} {signature}")
+        return tuple(todo), done, errors
+
+    # Pipeline hooks ---------------------------------------------------------
+
+    def signed(self, job: TransferJob, signature: str, raw: bytes, last_valid_height: int):
+        """Durably record a signed transaction before it is sent"""
+        now = time.time()
+        keys = [t.key for t in job.transfers]
+        self._conn.execute(
+            'INSERT OR REPLACE INTO txs (signature, raw, last_valid_height, keys, state, updated) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (signature, raw, last_valid_height, json.dumps(keys), SIGNED, now))
+        self._conn.executemany(
+            'UPDATE transfers SET state = ?, signature = ?, error = NULL, updated = ? WHERE key = ?',
+            [(SIGNED, signature, now, key) for key in keys])
+        # Checked while holding the write lock, so a claim cannot slip in before the commit
+        self._check_owner()
+        self._conn.commit()
+
+    def has_tx(self, signature: str) -> bool:
+        return self._conn.execute('SELECT 1 FROM txs WHERE signature = ?', (signature,)).fetchone() is not None
+
+    def sent(self, signature: str):
+        self._set_tx_state(signature, SENT, None)
+
+    def resolved(self, result: TxResult):
+        if self._fenced:
+            return
+        if result.signature is None:
+            # Never signed, so it cannot land: plain retry on resume
+            now = time.time()
+            self._conn.executemany(
+                'UPDATE transfers SET state = ?, error = ?, updated = ? WHERE key = ?',
+                [(INTENDED, result.error, now, t.key) for t in result.job.transfers])
+            return
+        self._set_tx_state(result.signature, result.status, result.error)
+
+    def expired(self, signature: str, error: str):
+        """The transaction can no longer land; its transfers are safe to resend"""
+        self._set_tx_state(signature, EXPIRED, error)
+
+    def _set_tx_state(self, signature: str, state: str, error: Optional[str]):
+        if self._fenced:
+            return  # the new owner reconciles it
+        now = time.time()
+        self._conn.execute('UPDATE txs SET state = ?, error = ?, updated = ? WHERE signature = ?',
+                           (state, error, now, signature))
+        self._conn.execute('UPDATE transfers SET state = ?, error = ?, updated = ? WHERE signature = ?',
+                           (state, error, now, signature))
+
+    # Reconciliation ---------------------------------------------------------
+
+    def in_doubt(self) -> List[Tuple[str, bytes, int]]:
+        """(signature, raw tx, last valid block height) of transactions that may still land"""
+        marks = ','.join('?' * len(IN_DOUBT))
+        return self._conn.execute(
+            f'SELECT signature, raw, last_valid_height FROM txs WHERE state IN ({marks})', IN_DOUBT).fetchall()
+
+    async def reconcile(self, client, poll_interval: float = 2.0) -> Dict[str, int]:
+        """Settle every in-doubt transaction against the chain before a resume
+
+        Transactions found on chain are marked confirmed or failed. One that
+        is not found is expired (safe to rebuild) once the block height is
+        more than EXPIRY_MARGIN_BLOCKS past its blockhash's last valid height
+        (as BlockhashManager.expired) and a second status lookup, made after
+        that height was seen, still does not find it: the status and height
+        may come from different pooled nodes, and a lagging status node must
+        not expire a transaction that landed. Until then its original bytes
+        are rebroadcast, which cannot pay twice, and it is polled.
+
+        Args:
+            client: solana AsyncClient
+            poll_interval: Seconds between polls while waiting on live blockhashes
+
+        Returns:
+            Counts of confirmed, failed and expired transactions
+        """
+        counts = {CONFIRMED: 0, FAILED: 0, EXPIRED: 0}
+        waiting = {sig: (raw, last_valid) for sig, raw, last_valid in self.in_doubt()}
+        if not waiting:
+            return counts
+        logger.info(f"Reconciling {len(waiting)} in-flight transactions from {self.path}")
+
+        opts = TxOpts(skip_preflight=True, skip_confirmation=True)
+        rebroadcast = set()
+        while waiting:
+            seen = await self._settle_statuses(client, list(waiting), waiting, counts)
+
+            height = (await client.get_block_height()).value
+            stale = [s for s, (_, last_valid) in waiting.items()
+                     if height > last_valid + EXPIRY_MARGIN_BLOCKS and s not in seen]
+            if stale:
+                # Ask again now that the height is known to be past: a status node
+                # behind the height node would otherwise expire a landed transaction
+                seen |= await self._settle_statuses(client, stale, waiting, counts)
+            for sig in [s for s in stale if s in waiting and s not in seen]:
+                self._set_tx_state(sig, EXPIRED, f'blockhash expired at height {height}')
+                counts[EXPIRED] += 1
+                del waiting[sig]
+            self._conn.commit()
+            if not waiting:
+                break
+
+            for sig, (raw, _) in waiting.items():
+                if sig not in rebroadcast:
+                    rebroadcast.add(sig)
+                    try:
+                        await client.send_raw_transaction(raw, opts=opts)
+                    except Exception as e:
+                        logger.warning(f"Rebroadcast of {sig[:16]}... failed: {e}")
+            logger.info(f"Waiting on {len(waiting)} transactions with live blockhashes (height {height})")
+            await asyncio.sleep(poll_interval)
+
+        logger.info(f"Reconciled: {counts[CONFIRMED]} confirmed, {counts[FAILED]} failed, "
+                    f"{counts[EXPIRED]} expired")
+        return counts
+
+    async def _settle_statuses(self, client, sigs: List[str], waiting: Dict, counts: Dict[str, int]) -> Set[str]:
+        """Mark landed and failed ``sigs`` (dropping them from ``waiting``)
+
+        Returns:
+            Signatures on chain but not yet at the target commitment
+        """
+        seen = set()
+        for i in range(0, len(sigs), STATUS_BATCH):
+            batch = sigs[i:i + STATUS_BATCH]
+            resp = await client.get_signature_statuses([Signature.from_string(s) for s in batch],
+                                                       search_transaction_history=True)
+            for sig, st in zip(batch, resp.value):
+                if st is None:
+                    continue
+                if st.err is not None:
+                    self._set_tx_state(sig, FAILED, str(st.err))
+                    counts[FAILED] += 1
+                elif st.confirmation_status in _LANDED:
+                    self._set_tx_state(sig, CONFIRMED, None)
+                    counts[CONFIRMED] += 1
+                else:
+                    seen.add(sig)
+                    continue
+                del waiting[sig]
+        return seen
+
+    def transfer_state(self, key: str) -> Optional[Tuple[str, Optional[str]]]:
+        """(state, error) of a planned transfer, or None if it was never planned"""
+        return self._conn.execute('SELECT state, error FROM transfers WHERE key = ?', (key,)).fetchone()
+
+    def summary(self) -> Dict[str, int]:
+        """Transfer count per state"""
+        return dict(self._conn.execute('SELECT state, COUNT(*) FROM transfers GROUP BY state'))
@@ -0,0 +1,210 @@
+"""
+Transaction Packing - Plan SPL transfers into as few transactions as fit
+Pure planner: sizes legacy transactions byte-for-byte without touching the network
+"""
+import logging
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence, Set, Tuple
+
+from backend.tx_pipeline import BUDGET_CU, CREATE_ATA_CU, TRANSFER_CU, Transfer, TransferJob
+
+logger = logging.getLogger(__name__)
+
+# Solana wire limits
+PACKET_DATA_SIZE = 1232
+MAX_TX_COMPUTE_UNITS = 1_400_000
+MAX_TX_ACCOUNTS = 64
+
+SIGNATURE_SIZE = 64
+KEY_SIZE = 32
+HEADER_SIZE = 3
+BLOCKHASH_SIZE = 32
+
+# Compiled instruction sizes: program index + shortvec(accounts) + account
+# indexes + shortvec(data) + data
+TRANSFER_IX_SIZE = 1 + 1 + 3 + 1 + 9          # source, dest, authority; tag + u64
+CREATE_ATA_IX_SIZE = 1 + 1 + 6 + 1 + 1        # payer, ata, owner, mint, system, token; tag
+CU_LIMIT_IX_SIZE = 1 + 1 + 0 + 1 + 5          # tag + u32
+CU_PRICE_IX_SIZE = 1 + 1 + 0 + 1 + 9          # tag + u64
+
+# Keys every packed transaction carries: payer/authority, treasury source,
+# token program, compute budget program (plus one key per extra signer)
+_BASE_KEYS = ('payer', 'source', 'token_program', 'compute_budget')
+# Extra keys shared by all ATA creations in a transaction
+_CREATE_KEYS = ('mint', 'system_program', 'ata_program')
+
+
+class PackLimits(NamedTuple):
+    """Per-transaction budgets and per-instruction cost estimates"""
+    max_bytes: int = PACKET_DATA_SIZE
+    max_compute_units: int = MAX_TX_COMPUTE_UNITS
+    max_accounts: int = MAX_TX_ACCOUNTS
+    transfer_cu: int = TRANSFER_CU
+    create_ata_cu: int = CREATE_ATA_CU
+    budget_cu: int = BUDGET_CU
+    reserve_price_ix: bool = True   # leave room for SetComputeUnitPrice
+    open_bins: int = 4              # transactions kept open for first-fit
+    signers: int = 1                # 2 when a fee payer signs besides the treasury authority
+
+
+class _Bin:
+    __slots__ = ('keys', 'size', 'cu', 'transfers', 'created')
+
+    def __init__(self, limits: PackLimits):
+        # Each extra signer adds a signature and an account key
+        self.keys: Set = set(_BASE_KEYS) | {('signer', i) for i in range(1, limits.signers)}
+        self.size = (1 + SIGNATURE_SIZE * limits.signers + HEADER_SIZE + BLOCKHASH_SIZE + 1
+                     + KEY_SIZE * len(self.keys)
+                     + 1 + CU_LIMIT_IX_SIZE + (CU_PRICE_IX_SIZE if limits.reserve_price_ix else 0))
+        self.cu = limits.budget_cu
+        self.transfers: List[Transfer] = []
+        self.created: Set[str] = set()
+
+    def cost(self, group: Sequence[Transfer], limits: PackLimits) -> Tuple[Set, int, int, Set[str]]:
+        """(new keys, added bytes, added compute units, new ATA creations) for ``group``"""
+        new_keys, size, cu, created = set(), 0, 0, set()
+        for t in group:
+            dest = ('ata', t.owner)
+            if t.create_ata and t.owner not in self.created and t.owner not in created:
+                created.add(t.owner)
+                for k in (dest, ('owner', t.owner)) + _CREATE_KEYS:
+                    if k not in self.keys:
+                        new_keys.add(k)
+                size += CREATE_ATA_IX_SIZE
+                cu += limits.create_ata_cu
+            if dest not in self.keys:
+                new_keys.add(dest)
+            size += TRANSFER_IX_SIZE
+            cu += limits.transfer_cu
+        return new_keys, size + KEY_SIZE * len(new_keys), cu, created
+
+    def fits(self, cost, limits: PackLimits) -> bool:
+        new_keys, size, cu, _ = cost
+        return (self.size + size <= limits.max_bytes
+                and self.cu + cu <= limits.max_compute_units
+                and len(self.keys) + len(new_keys) <= limits.max_accounts)
+
+    def add(self, group: Sequence[Transfer], cost):
+        new_keys, size, cu, created = cost
+        self.keys |= new_keys
+        self.size += size
+        self.cu += cu
+        self.created |= created
+        # Only the first transfer to an owner in this tx carries the create
+        for t in group:
+            if t.create_ata and t.owner in created:
+                created.discard(t.owner)
+                self.transfers.append(t)
+            else:
+                self.transfers.append(t._replace(create_ata=False) if t.create_ata else t)
+
+
+class TransactionPacker:
+    """Incremental first-fit packer over a few open transactions
+
+    Each group (a recipient's net and referral transfers) is kept in one
+    transaction. A transfer flagged ``create_ata`` gets an idempotent ATA
+    creation in every transaction that pays that owner, so transactions stay
+    independent of each other's landing order. Deterministic for a given
+    input order; memory is bounded by ``limits.open_bins``.
+    """
+
+    def __init__(self, limits: PackLimits = PackLimits()):
+        self.limits = limits
+        self._bins: List[_Bin] = []
+        self._seq = 0
+
+    def _emit(self, b: _Bin) -> TransferJob:
+        self._seq += 1
+        return TransferJob(f'tx:{self._seq}', tuple(b.transfers), compute_units=b.cu)
+
+    def add(self, group: Sequence[Transfer]) -> List[TransferJob]:
+        """Place a group; returns transactions closed to make room (0 or 1)"""
+        if not group:
+            return []
+        limits = self.limits
+        for b in self._bins:
+            cost = b.cost(group, limits)
+            if b.fits(cost, limits):
+                b.add(group, cost)
+                return []
+
+        b = _Bin(limits)
+        cost = b.cost(group, limits)
+        if not b.fits(cost, limits):
+            raise ValueError(f'transfer group for {group[0].wallet} does not fit in one transaction')
+        b.add(group, cost)
+        closed = []
+        if len(self._bins) >= limits.open_bins:
+            # Close the fullest open transaction to make room
+            fullest = max(range(len(self._bins)), key=lambda i: self._bins[i].size)
+            closed.append(self._emit(self._bins.pop(fullest)))
+        self._bins.append(b)
+        return closed
+
+    def flush(self) -> List[TransferJob]:
+        """Close every open transaction"""
+        closed = [self._emit(b) for b in self._bins]
+        self._bins = []
+        return closed
+
+
+def plan_transactions(groups: Iterable[Sequence[Transfer]],
+                      limits: PackLimits = PackLimits()) -> Iterator[TransferJob]:
+    """Pack transfer groups into transactions (see TransactionPacker)
+
+    Yields:
+        TransferJob per transaction, keyed 'tx:<seq>', with compute_units set
+    """
+    packer = TransactionPacker(limits)
+    for group in groups:
+        yield from packer.add(group)
+    yield from packer.flush()
+
+
+class PackReport:
+    """Transaction count and fee summary for a packing plan (dry-run output)"""
+
+    BASE_FEE_LAMPORTS = 5_000
+    ATA_RENT_LAMPORTS = 2_039_280
+
+    def __init__(self):
+        self.transactions = 0
+        self.transfers = 0
+        self.ata_creates = 0
+        self.ata_owners: Set[str] = set()  # rent is paid once however often the create repeats
+        self.compute_units = 0
+        self.max_transfers = 0
+
+    def add(self, job: TransferJob):
+        self.transactions += 1
+        self.transfers += len(job.transfers)
+        for t in job.transfers:
+            if t.create_ata:
+                self.ata_creates += 1
+                self.ata_owners.add(t.owner)
+        self.compute_units += job.compute_units
+        self.max_transfers = max(self.max_transfers, len(job.transfers))
+
+    def summary(self) -> Dict:
+        unpacked_fees = self.transfers * self.BASE_FEE_LAMPORTS
+        packed_fees = self.transactions * self.BASE_FEE_LAMPORTS
+        return {
+            'transfers': self.transfers,
+            'transactions': self.transactions,
+            'reduction': round(self.transfers / self.transactions, 2) if self.transactions else 0.0,
+            'max_transfers_per_tx': self.max_transfers,
+            'ata_creates': self.ata_creates,
+            'new_atas': len(self.ata_owners),
+            'base_fees_sol': packed_fees / 1e9,
+            'unpacked_base_fees_sol': unpacked_fees / 1e9,
+            'ata_rent_sol': len(self.ata_owners) * self.ATA_RENT_LAMPORTS / 1e9,
+        }
+
+    def lines(self) -> List[str]:
+        s = self.summary()
+        return [
+            f"Packed {s['transfers']} transfers into {s['transactions']} transactions "
+            f"({s['reduction']:.1f}x fewer, up to {s['max_transfers_per_tx']} per tx)",
+            f"Base fees {s['base_fees_sol']:.6f} SOL (unpacked {s['unpacked_base_fees_sol']:.6f} SOL), "
+            f"{s['ata_creates']} ATA creations for {s['new_atas']} new accounts ({s['ata_rent_sol']:.6f} SOL rent)",
+        ]
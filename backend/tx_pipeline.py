@@ -0,0 +1,586 @@
+"""
+Transfer Pipeline - Pipelined SPL transfer submission with a bounded in-flight window
+Signing/sending and confirmation polling run as separate asyncio stages
+"""
+import asyncio
+import logging
+import time
+from typing import (AsyncIterable, Callable, Dict, Iterable, List, NamedTuple,
+                    Optional, Tuple, Union)
+
+from solana.rpc.async_api import AsyncClient
+from solana.rpc.types import TxOpts
+from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+from solders.hash import Hash
+from solders.keypair import Keypair
+from solders.pubkey import Pubkey
+from solders.transaction import Transaction
+from spl.token.constants import TOKEN_PROGRAM_ID
+from spl.token.instructions import (TransferParams, create_idempotent_associated_token_account,
+                                    get_associated_token_address, transfer)
+
+from backend.blockhash_cache import BlockhashManager
+from backend.confirmation_tracker import Confirmation, ConfirmationTracker
+from backend.rpc_pool import RpcPool, rpc_endpoints
+
+logger = logging.getLogger(__name__)
+
+# Compute unit limit given to otherwise identical transactions to make their
+# bytes (and signatures) distinct; above what a transfer plus ATA creation needs
+UNIQUE_CU_BASE = 200_000
+
+# Compute unit estimates: an SPL transfer measures ~4.6k, an idempotent create
+# of a missing ATA ~21-28k, the two compute budget instructions ~300
+TRANSFER_CU = 6_000
+CREATE_ATA_CU = 32_000
+BUDGET_CU = 300
+
+class Transfer(NamedTuple):
+    """One SPL transfer to ``owner``'s associated token account"""
+    owner: str
+    amount: int
+    kind: str = 'net'  # 'net' or 'referral'
+    wallet: str = ''   # recipient row this transfer belongs to
+    create_ata: bool = False  # create the destination ATA (idempotent) first
+    key: str = ''             # stable id across runs, e.g. '<row>:<kind>' (journal key)
+
+
+class TransferJob(NamedTuple):
+    """Transfers submitted together in one transaction"""
+    key: str
+    transfers: Tuple[Transfer, ...]
+    compute_units: int = 0  # SetComputeUnitLimit for the tx (0: runtime default)
+
+
+class TxResult(NamedTuple):
+    job: TransferJob
+    status: str  # 'confirmed', 'failed', 'unconfirmed', 'expired' or 'send_error'
+    signature: Optional[str]
+    error: Optional[str]
+    send_seconds: float
+    confirm_seconds: Optional[float]
+
+
+def transfers_for_allocation(wallet: str, net: int, referrer: Optional[str], referral_amount: int,
+                             missing_atas=frozenset(), row_key: str = '') -> Tuple[Transfer, ...]:
+    """The recipient's net transfer and, if any, the referral transfer
+
+    Owners in ``missing_atas`` get their associated token account created.
+    Transfer keys are '<row_key>:<kind>', with the wallet as the default row key.
+    """
+    prefix = row_key or wallet
+    transfers = []
+    if net > 0:
+        transfers.append(Transfer(wallet, net, 'net', wallet, wallet in missing_atas, f'{prefix}:net'))
+    if referrer and referral_amount > 0:
+        transfers.append(Transfer(referrer, referral_amount, 'referral', wallet, referrer in missing_atas,
+                                  f'{prefix}:referral'))
+    return tuple(transfers)
+
+
+def split_invalid(transfers: Iterable[Transfer]) -> Tuple[Tuple[Transfer, ...], List[str]]:
+    """Separate transfers whose owner is not a valid public key
+
+    A packed transaction fails as a whole, so bad owners are weeded out
+    before packing rather than taking other recipients' transfers down.
+
+    Returns:
+        (valid transfers, error strings for the invalid ones)
+    """
+    valid, errors = [], []
+    for t in transfers:
+        try:
+            Pubkey.from_string(t.owner)
+        except ValueError as e:
+            errors.append(f"{t.kind} invalid_owner: {str(e)[:50]}")
+            continue
+        valid.append(t)
+    return tuple(valid), errors
+
+
+def jobs_for_allocation(wallet: str, net: int, referrer: Optional[str], referral_amount: int,
+                        missing_atas=frozenset(), row_key: str = '') -> List[TransferJob]:
+    """One job per transfer (unpacked): the recipient's net and, if any, the referral"""
+    return [TransferJob(t.key, (t,)) for t in transfers_for_allocation(wallet, net, referrer, referral_amount,
+                                                                      missing_atas, row_key)]
+
+
+def pooled_async_client(rpc_url: str, max_connections: int, timeout: float = 30.0) -> AsyncClient:
+    """AsyncClient over backend.rpc_pool with ``max_connections`` keep-alive connections per endpoint
+
+    solana-py caps its pool at 10 connections, which would silently
+    serialize a pipeline running with higher concurrency. ``rpc_url`` may
+    list several comma-separated endpoints.
+    """
+    return RpcPool(rpc_endpoints(rpc_url), max_connections=max_connections, timeout=timeout).async_client()
+
+
+class LatencyHistogram:
+    """Log2-bucketed latency histogram (1 ms .. ~65 s)"""
+
+    BUCKETS_MS = [2 ** i for i in range(17)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS_MS) + 1)
+        self.samples: List[float] = []
+
+    def record(self, seconds: float):
+        ms = seconds * 1000
+        i = 0
+        while i < len(self.BUCKETS_MS) and ms > self.BUCKETS_MS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.samples.append(seconds)
+
+    @property
+    def count(self) -> int:
+        return len(self.samples)
+
+    def percentile(self, pct: float) -> float:
+        """Latency in milliseconds at ``pct`` (0-100)"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+        return ordered[idx] * 1000
+
+    def render(self, width: int = 40) -> List[str]:
+        peak = max(self.counts) or 1
+        lines = []
+        for i, n in enumerate(self.counts):
+            if not n:
+                continue
+            label = f'<= {self.BUCKETS_MS[i]:>5} ms' if i < len(self.BUCKETS_MS) else f' > {self.BUCKETS_MS[-1]:>5} ms'
+            lines.append(f'  {label} |{"#" * max(1, n * width // peak):<{width}} {n}')
+        return lines
+
+
+class PipelineStats:
+    """Counters, throughput and latency histograms for one pipeline run"""
+
+    def __init__(self):
+        self.submitted = 0
+        self.confirmed = 0
+        self.failed = 0
+        self.unconfirmed = 0
+        self.send_errors = 0
+        self.expired = 0
+        self.resigned = 0
+        self.status_calls = 0
+        self.notifications = 0
+        self.max_in_flight = 0
+        self.send_latency = LatencyHistogram()
+        self.confirm_latency = LatencyHistogram()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def tx_per_second(self) -> float:
+        return self.confirmed / self.elapsed if self.elapsed else 0.0
+
+    def summary(self) -> Dict:
+        return {
+            'submitted': self.submitted,
+            'confirmed': self.confirmed,
+            'failed': self.failed,
+            'unconfirmed': self.unconfirmed,
+            'send_errors': self.send_errors,
+            'expired': self.expired,
+            'resigned': self.resigned,
+            'status_calls': self.status_calls,
+            'notifications': self.notifications,
+            'max_in_flight': self.max_in_flight,
+            'elapsed_s': round(self.elapsed, 3),
+            'tx_per_second': round(self.tx_per_second, 1),
+            'send_p50_ms': round(self.send_latency.percentile(50), 1),
+            'send_p99_ms': round(self.send_latency.percentile(99), 1),
+            'confirm_p50_ms': round(self.confirm_latency.percentile(50), 1),
+            'confirm_p99_ms': round(self.confirm_latency.percentile(99), 1),
+        }
+
+    def report(self) -> List[str]:
+        s = self.summary()
+        lines = [
+            f"Submitted {s['submitted']} tx in {s['elapsed_s']:.1f}s: {s['confirmed']} confirmed, "
+            f"{s['failed']} failed, {s['unconfirmed']} unconfirmed, {s['send_errors']} send errors, "
+            f"{s['expired']} expired ({s['resigned']} re-signed)",
+            f"Throughput {s['tx_per_second']:.1f} tx/s (max in flight {s['max_in_flight']}, "
+            f"{s['status_calls']} status calls, {s['notifications']} websocket notifications)",
+            f"Send latency p50 {s['send_p50_ms']:.1f} ms, p99 {s['send_p99_ms']:.1f} ms",
+        ]
+        lines += self.send_latency.render()
+        lines.append(f"Confirm latency p50 {s['confirm_p50_ms']:.1f} ms, p99 {s['confirm_p99_ms']:.1f} ms")
+        lines += self.confirm_latency.render()
+        return lines
+
+
+def estimate_compute_units(job: TransferJob) -> int:
+    """Compute unit limit covering a job's transfers and ATA creations"""
+    return BUDGET_CU + sum(TRANSFER_CU + (CREATE_ATA_CU if t.create_ata else 0) for t in job.transfers)
+
+
+class SplTransferBuilder:
+    """Builds and signs a transaction carrying a job's SPL transfers"""
+
+    def __init__(self, payer: Keypair, mint: str, source: str, authority: Optional[Keypair] = None,
+                 program_id: Pubkey = TOKEN_PROGRAM_ID, fees=None):
+        """Initialize builder
+
+        Args:
+            payer: Fee payer (and default source authority)
+            mint: Token mint; destinations are the owners' associated token accounts
+            source: Treasury token account the transfers draw from
+            authority: Owner of the source account, when different from payer
+            program_id: SPL token program
+            fees: Optional PriorityFeeEstimator (backend.priority_fees) whose
+                current price is attached to every transaction built
+        """
+        self.payer = payer
+        self.authority = authority or payer
+        self.mint = Pubkey.from_string(mint) if isinstance(mint, str) else mint
+        self.source = Pubkey.from_string(source) if isinstance(source, str) else source
+        self.program_id = program_id
+        self.fees = fees
+
+    @property
+    def signer_count(self) -> int:
+        """Signatures per transaction (for sizing packed transactions)"""
+        return 1 if self.authority is self.payer else 2
+
+    def instructions(self, job: TransferJob) -> List:
+        ixs = []
+        price = self.fees.price if self.fees is not None else 0
+        if job.compute_units or price:
+            # The priority fee is price x limit: never leave the limit at the 200k-per-ix default
+            ixs.append(set_compute_unit_limit(job.compute_units or estimate_compute_units(job)))
+        if price:
+            ixs.append(set_compute_unit_price(price))
+        created = set()
+        for t in job.transfers:
+            owner = Pubkey.from_string(t.owner)
+            if t.create_ata and t.owner not in created:
+                created.add(t.owner)
+                ixs.append(create_idempotent_associated_token_account(
+                    self.payer.pubkey(), owner, self.mint, self.program_id))
+            ixs.append(transfer(TransferParams(
+                program_id=self.program_id,
+                source=self.source,
+                dest=get_associated_token_address(owner, self.mint),
+                owner=self.authority.pubkey(),
+                amount=t.amount,
+            )))
+        return ixs
+
+    def build(self, job: TransferJob, blockhash: Hash) -> Transaction:
+        signers = [self.payer] if self.authority is self.payer else [self.payer, self.authority]
+        return Transaction.new_signed_with_payer(self.instructions(job), self.payer.pubkey(), signers, blockhash)
+
+
+class _Pending(NamedTuple):
+    job: TransferJob
+    sent_at: float
+    send_seconds: float
+    attempt: int
+
+
+JobSource = Union[Iterable[TransferJob], AsyncIterable[TransferJob]]
+
+
+class TransferPipeline:
+    """Send transactions concurrently while a separate stage confirms them
+
+    At most ``concurrency`` sends are outstanding at once, and at most
+    ``window`` transactions are in flight (sent or sending but not yet
+    resolved); the job source is only pulled when a window slot is free.
+    Confirmation is left to a ConfirmationTracker (backend.confirmation_tracker),
+    which batches getSignatureStatuses and, given ``ws_url``, also listens
+    for signatureSubscribe notifications. Blockhashes come from a background-refreshed BlockhashManager
+    (backend.blockhash_cache) rather than one RPC call per transaction.
+
+    A transaction that fails to send is retried with the same bytes (and so
+    the same signature), so a send that landed but lost its response cannot
+    be paid twice. With a ``journal`` (backend.transfer_journal) every
+    signed transaction is made durable before its first send.
+
+    A transaction still unseen once the block height has passed its
+    blockhash's last valid height can never land; its job is re-signed with
+    a fresh blockhash and sent again, up to ``resign_limit`` times, and is
+    then reported expired.
+
+    Two jobs with the same transfers (say, equal referral payouts to one
+    referrer) would sign to identical bytes under one blockhash, and the
+    chain executes such a transaction only once. A job whose signature was
+    already built (or journaled) is rebuilt with a compute unit limit bumped
+    by one, which changes the bytes without changing what it does.
+    """
+
+    def __init__(self, client, builder, concurrency: int = 16, window: int = 256,
+                 confirm_interval: float = 0.5, confirm_timeout: float = 150.0,
+                 send_retries: int = 3, blockhash_ttl: float = 20.0,
+                 commitment: str = 'confirmed', journal=None,
+                 blockhashes: Optional[BlockhashManager] = None, resign_limit: int = 2,
+                 tracker: Optional[ConfirmationTracker] = None, ws_url: Optional[str] = None):
+        """Initialize pipeline
+
+        Args:
+            client: solana AsyncClient (or compatible) for the RPC endpoint
+            builder: Object with build(job, blockhash) -> signed Transaction
+            concurrency: Maximum concurrent sendTransaction requests
+            window: Maximum transactions in flight awaiting confirmation
+            confirm_interval: Seconds between status polls
+            confirm_timeout: Seconds after sending before a tx is reported unconfirmed
+                (longer than a blockhash lives, so expiry is normally detected first)
+            send_retries: Resend attempts after a failed sendTransaction
+            blockhash_ttl: Seconds a fetched blockhash is handed out
+            commitment: Confirmation level treated as success
+            journal: Optional TransferJournal recording signed/sent/resolved transactions
+            blockhashes: Shared BlockhashManager (one is run for the pipeline if omitted)
+            resign_limit: Times an expired transaction is re-signed and resent
+            tracker: Shared ConfirmationTracker (one is run for the pipeline if omitted)
+            ws_url: Websocket endpoint for signatureSubscribe in the pipeline's own tracker
+        """
+        self.client = client
+        self.builder = builder
+        self.concurrency = concurrency
+        self.window = window
+        self.confirm_interval = confirm_interval
+        self.confirm_timeout = confirm_timeout
+        self.send_retries = send_retries
+        self.commitment = commitment
+        self.journal = journal
+        self.resign_limit = resign_limit
+        self._own_blockhashes = blockhashes is None
+        self.blockhashes = blockhashes or BlockhashManager(client, max_age=blockhash_ttl)
+        self._own_tracker = tracker is None
+        self.tracker = tracker or ConfirmationTracker(
+            client, commitment=commitment, poll_interval=confirm_interval, timeout=confirm_timeout,
+            blockhashes=self.blockhashes, ws_url=ws_url)
+        self._opts = TxOpts(skip_preflight=True, skip_confirmation=True)
+
+        self.stats = PipelineStats()
+        self._window_sem: Optional[asyncio.Semaphore] = None
+        self._on_result: Optional[Callable[[TxResult], None]] = None
+        self._draining = False
+        self._in_flight = 0
+        self._settled: Optional[asyncio.Event] = None
+        self._resends = set()
+        self._tracker_base = (0, 0)
+        self._built: Dict[Hash, set] = {}  # signatures built per recent blockhash
+
+    async def run(self, jobs: JobSource, on_result: Optional[Callable[[TxResult], None]] = None) -> PipelineStats:
+        """Submit every job and wait until all are resolved
+
+        Args:
+            jobs: Sync or async iterable of TransferJob
+            on_result: Called once per job with its TxResult
+
+        Returns:
+            PipelineStats for the run
+        """
+        self.stats = PipelineStats()
+        self.stats.started_at = time.perf_counter()
+        self._on_result = on_result
+        self._draining = False
+        self._in_flight = 0
+        self._settled = asyncio.Event()
+        self._window_sem = asyncio.Semaphore(self.window)
+        self._resends = set()
+        self._built = {}
+        send_slots = asyncio.Semaphore(self.concurrency)
+        sends = set()
+
+        if self._own_blockhashes:
+            await self.blockhashes.start()
+        if self._own_tracker:
+            await self.tracker.start()
+        self._tracker_base = (self.tracker.status_calls, self.tracker.notifications)
+        try:
+            async for job in _aiter(jobs):
+                await self._window_sem.acquire()
+                await send_slots.acquire()
+                task = asyncio.create_task(self._send(job, send_slots))
+                sends.add(task)
+                task.add_done_callback(sends.discard)
+                self._in_flight += 1
+                self.stats.max_in_flight = max(self.stats.max_in_flight, self._in_flight)
+            if sends:
+                await asyncio.gather(*list(sends))
+        finally:
+            self._draining = True
+            if self._in_flight:
+                await self._settled.wait()
+            self._tracker_stats()
+            if self._own_tracker:
+                await self.tracker.stop()
+            if self._own_blockhashes:
+                await self.blockhashes.stop()
+            self.stats.finished_at = time.perf_counter()
+        return self.stats
+
+    async def _send(self, job: TransferJob, send_slots: Optional[asyncio.Semaphore] = None, attempt: int = 0):
+        signature = None
+        started = time.perf_counter()
+        try:
+            blockhash, last_valid_height = await self.blockhashes.get()
+            tx = self._build_unique(job, blockhash)
+            signature = tx.signatures[0]
+            raw = bytes(tx)
+            if self.journal is not None:
+                # Write-ahead: the signature is durable before the tx can land
+                self.journal.signed(job, str(signature), raw, last_valid_height)
+            for retry in range(self.send_retries + 1):
+                try:
+                    started = time.perf_counter()
+                    await self.client.send_raw_transaction(raw, opts=self._opts)
+                    break
+                except Exception as e:
+                    if retry == self.send_retries:
+                        raise
+                    logger.warning(f"Send of {job.key} failed (attempt {retry + 1}): {e}")
+                    await asyncio.sleep(min(2.0, 0.1 * 2 ** retry))
+        except Exception as e:
+            self.stats.send_errors += 1
+            self._resolve(TxResult(job, 'send_error', str(signature) if signature else None, str(e),
+                                   time.perf_counter() - started, None))
+            return
+        finally:
+            if send_slots is not None:
+                send_slots.release()
+
+        send_seconds = time.perf_counter() - started
+        if self.journal is not None:
+            self.journal.sent(str(signature))
+        self.stats.submitted += 1
+        self.stats.send_latency.record(send_seconds)
+        pending = _Pending(job, time.perf_counter(), send_seconds, attempt)
+        self.tracker.track(signature, last_valid_height).add_done_callback(
+            lambda future: self._confirmed(pending, future))
+
+    def _build_unique(self, job: TransferJob, blockhash: Hash) -> Transaction:
+        """Build ``job``, bumping its compute unit limit until the signature is new"""
+        built = self._built.get(blockhash)
+        if built is None:
+            # A blockhash older than the last few can no longer be handed out
+            while len(self._built) >= 3:
+                del self._built[next(iter(self._built))]
+            built = self._built[blockhash] = set()
+        variant = job
+        for bump in range(1, 9):
+            tx = self.builder.build(variant, blockhash)
+            signature = str(tx.signatures[0])
+            if signature not in built and not (self.journal is not None and self.journal.has_tx(signature)):
+                built.add(signature)
+                return tx
+            variant = job._replace(compute_units=(job.compute_units or UNIQUE_CU_BASE) + bump)
+        raise ValueError(f'could not build a distinct transaction for {job.key}')
+
+    def _resolve(self, result: TxResult):
+        self._in_flight -= 1
+        self._window_sem.release()
+        self._tracker_stats()
+        if self._draining and not self._in_flight:
+            self._settled.set()
+        if self.journal is not None:
+            try:
+                self.journal.resolved(result)
+            except Exception as e:
+                logger.error(f"Journal update failed for {result.job.key}: {e}")
+        if self._on_result is not None:
+            try:
+                self._on_result(result)
+            except Exception as e:
+                logger.error(f"Result callback failed for {result.job.key}: {e}")
+
+    def _tracker_stats(self):
+        self.stats.status_calls = self.tracker.status_calls - self._tracker_base[0]
+        self.stats.notifications = self.tracker.notifications - self._tracker_base[1]
+
+    def _confirmed(self, pending: _Pending, future: asyncio.Future):
+        """Resolve (or re-sign) a sent transaction once its tracker future settles"""
+        if future.cancelled():
+            confirmation = Confirmation('', 'unconfirmed', 'confirmation tracking stopped', None,
+                                        time.perf_counter() - pending.sent_at)
+        else:
+            confirmation = future.result()
+        sig, error = confirmation.signature or None, confirmation.error
+        if confirmation.status == 'expired':
+            self.stats.expired += 1
+            if self.journal is not None:
+                self.journal.expired(sig, error)
+            if pending.attempt < self.resign_limit:
+                self.stats.resigned += 1
+                logger.info(f"Re-signing {pending.job.key}: {error}")
+                task = asyncio.create_task(self._send(pending.job, attempt=pending.attempt + 1))
+                self._resends.add(task)
+                task.add_done_callback(self._resends.discard)
+                return
+        elif confirmation.status == 'confirmed':
+            self.stats.confirmed += 1
+            self.stats.confirm_latency.record(confirmation.seconds)
+        elif confirmation.status == 'failed':
+            self.stats.failed += 1
+        else:
+            self.stats.unconfirmed += 1
+        self._resolve(TxResult(pending.job, confirmation.status, sig, error, pending.send_seconds,
+                               confirmation.seconds if confirmation.status == 'confirmed' else None))
+
+
+class RecipientResults:
+    """Fold per-transaction results back into one output row per recipient
+
+    ``expect`` registers a recipient's row and how many transfers it has; the
+    row is handed to ``write_row`` with a final status once all of them have
+    resolved. Rows are matched by the row key of the transfer keys (the
+    wallet unless ``row_key`` was given). Only recipients with transfers in
+    flight are held in memory.
+    """
+
+    def __init__(self, write_row: Callable[[Dict], None]):
+        self.write_row = write_row
+        self._open: Dict[str, List] = {}
+        self.ok = 0
+        self.errors = 0
+
+    def expect(self, row_key: str, row: Dict, transfers: int, errors: Optional[List[str]] = None):
+        """Register a recipient; ``errors`` are failures already known (never sent)"""
+        if transfers == 0:
+            self._finish(row, errors or [])
+            return
+        self._open[row_key] = [row, transfers, list(errors or [])]
+
+    def on_result(self, result: TxResult):
+        for t in result.job.transfers:
+            row_key = t.key.rpartition(':')[0] or t.wallet
+            entry = self._open.get(row_key)
+            if entry is None:
+                continue
+            entry[1] -= 1
+            if result.status != 'confirmed':
+                entry[2].append(f"{t.kind} {result.status}: {(result.error or '')[:50]}")
+            if entry[1] == 0:
+                del self._open[row_key]
+                self._finish(entry[0], entry[2])
+
+    def _finish(self, row: Dict, errors: List[str]):
+        if errors:
+            self.errors += 1
+            row = dict(row, status='error: ' + '; '.join(errors))
+        else:
+            self.ok += 1
+            row = dict(row, status='processed')
+        self.write_row(row)
+
+
+async def _aiter(source: JobSource):
+    if hasattr(source, '__aiter__'):
+        async for item in source:
+            yield item
+    else:
+        for item in source:
+            yield item
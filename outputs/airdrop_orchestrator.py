@@ -7,15 +7,28 @@ Supports both dry-run and live modes for safety.
 
 Usage:
     python3 airdrop_orchestrator.py recipients.csv --dry-run
-    ALLOW_LIVE=1 python3 airdrop_orchestrator.py recipients.csv --yes
+    ALLOW_LIVE=1 python3 airdrop_orchestrator.py recipients.csv --yes --concurrency 32 --window 512
+    ALLOW_LIVE=1 python3 airdrop_orchestrator.py recipients.csv --yes --pack
+    ALLOW_LIVE=1 python3 airdrop_orchestrator.py recipients.csv --yes --resume   # after a crash
+    ALLOW_LIVE=1 python3 airdrop_orchestrator.py recipients.csv --coordinator --shards 16 --spawn 4
+    ALLOW_LIVE=1 python3 airdrop_orchestrator.py recipients.csv --worker --fee-payer payer2.json   # another host
+    DOJO3_TOKEN_MINT=... python3 airdrop_orchestrator.py recipients.csv --dry-run --ata-scan --ata-plan plan.csv
 """
 import os
 import csv
 import sys
+import asyncio
 import logging
 import json
-from decimal import Decimal
-from typing import List, Dict, Optional
+import hashlib
+import socket
+import subprocess
+import time
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from backend.alloc_engine import iter_allocations, iter_recipients, split_referral, sum_weights
 
 # Setup logging
 logging.basicConfig(
@@ -23,88 +36,186 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-TOTAL_SUPPLY = 850_000_000
-AIRDROP_PERCENT = 60
-AIRDROP_POOL = int(TOTAL_SUPPLY * AIRDROP_PERCENT / 100)
-REFERRAL_BPS = 2400  # 24%
+# One INFO line per RPC request drowns the progress log
+for _name in ('httpx', 'httpx2'):
+    logging.getLogger(_name).setLevel(logging.WARNING)
 
 RPC = os.environ.get("SOLANA_RPC", "https://api.mainnet-beta.solana.com")
+# Optional websocket endpoint; confirmations then arrive by signatureSubscribe
+SOLANA_WS = os.environ.get("SOLANA_WS") or None
 DOJO3_TOKEN_MINT = os.environ.get("DOJO3_TOKEN_MINT")
 # Default treasury account (use the repository's configured treasury unless overridden)
 TREASURY_TOKEN_ACCOUNT = os.environ.get("TREASURY_TOKEN_ACCOUNT", "8pSyRMP7R5qDU5BTqR93rESA1R2h5jH6hdPRjXmjnj8u")
 TREASURY_KEYPAIR_PATH = os.environ.get("TREASURY_KEYPAIR_PATH")
 
 
-def read_recipients(csv_path: str) -> List[Dict]:
-    """Read and parse recipients CSV file"""
-    rows = []
-    
-    if not os.path.exists(csv_path):
-        logger.error(f"Recipients file not found: {csv_path}")
-        raise FileNotFoundError(f"Recipients CSV not found: {csv_path}")
-    
-    try:
-        with open(csv_path, "r", newline="") as f:
-            r = csv.DictReader(f)
-            for idx, row in enumerate(r, 1):
-                try:
-                    wallet = row.get("wallet", "").strip()
-                    if not wallet:
-                        logger.warning(f"Row {idx}: Empty wallet, skipping")
-                        continue
-                    
-                    weight_str = row.get("weight", "1")
-                    weight = Decimal(weight_str)
-                    ref = row.get("referrer", "").strip() or None
-                    
-                    rows.append({
-                        "wallet": wallet,
-                        "weight": weight,
-                        "referrer": ref
-                    })
-                except (ValueError, TypeError) as e:
-                    logger.warning(f"Row {idx}: Invalid weight value '{weight_str}', using default 1")
-                    rows.append({
-                        "wallet": wallet,
-                        "weight": Decimal(1),
-                        "referrer": ref
-                    })
-        
-        logger.info(f"Loaded {len(rows)} recipients from {csv_path}")
-        return rows
-    except Exception as e:
-        logger.error(f"Error reading recipients CSV: {e}")
-        raise
-
-
-def compute_allocations(rows: List[Dict]) -> List[Dict]:
-    """Compute token allocations based on weights"""
-    if not rows:
-        logger.error("No recipients to compute allocations for")
-        return []
-    
-    total_weight = sum(r["weight"] for r in rows)
-    
-    if total_weight <= 0:
-        logger.error("Total weight is zero or negative")
-        return []
-    
-    allocations = []
-    for r in rows:
+def iter_planned(csv_path: str, total_weight: int, vectorized: bool = False, distribute_dust: bool = False):
+    """Yield (wallet, gross, referral_amount, net, referrer) for every recipient
+
+    The default path streams from the allocation engine; ``vectorized``
+    computes all rows at once with NumPy (optionally distributing dust).
+    """
+    if not vectorized:
+        for a in iter_allocations(csv_path, total=total_weight):
+            referral_amount, net = split_referral(a.amount, bool(a.referrer))
+            yield a.wallet, a.amount, referral_amount, net, a.referrer
+        return
+
+    from backend.alloc_vectorized import compute_csv
+    cols, va = compute_csv(csv_path, distribute_dust=distribute_dust)
+    if distribute_dust:
+        logger.info(f"Distributed {va.dust} units of rounding dust by largest remainder")
+    yield from zip(cols.wallets, va.gross.tolist(), va.referral.tolist(), va.net.tolist(), cols.referrers)
+
+
+async def scan_atas(planned, cache, concurrency: int):
+    """Pre-flight: check every transfer destination's ATA, filling ``cache``"""
+    from backend.ata_scan import AtaScanner
+    from backend.tx_pipeline import pooled_async_client
+
+    def owners():
+        for wallet, _, referral_amount, net, ref in planned:
+            if net > 0:
+                yield wallet
+            if ref and referral_amount > 0:
+                yield ref
+
+    logger.info(f"Scanning associated token accounts via {RPC} (cache {cache.path})")
+    async with pooled_async_client(RPC, concurrency) as client:
+        return await AtaScanner(client, cache, concurrency=concurrency).scan(owners())
+
+
+async def submit_live(indexed, recipient_count: int, builder, write_row, interactive: bool,
+                      concurrency: int, window: int, pack: bool = False, journal=None,
+                      resume: bool = False, missing_atas=frozenset(), priority_fee: Optional[float] = None,
+                      max_priority_fee: int = 50_000, progress_interval: float = 0.0) -> Dict:
+    """Send every planned transfer through the pipelined submitter
+
+    ``indexed`` yields (row index, planned row); the index keys the row's
+    transfers in the journal, so it must be the row's position in the file.
+    Rows are written as each recipient's transfers resolve. In interactive
+    mode the prompt runs on a worker thread so in-flight sends keep moving.
+    With ``pack`` recipients' transfers share transactions (see
+    backend.tx_packing); a recipient's transfers always land together.
+    With a ``journal`` every transfer is checkpointed; ``resume`` first
+    settles the previous run's in-flight transactions and then sends only
+    transfers that have not landed. Owners in ``missing_atas`` (a set or an
+    AtaCache) get their token account created alongside the transfer.
+    With ``priority_fee`` (a percentile of recent fees on the treasury
+    account, sampled in the background) every transaction pays that compute
+    unit price, capped at ``max_priority_fee`` micro-lamports.
+    With ``progress_interval`` a ``PROGRESS {json}`` line (processed /
+    succeeded / failed recipients, tx/s) is printed periodically and once at
+    the end, for the admin job runner (backend.admin_jobs) to follow.
+    """
+    from backend.priority_fees import PriorityFeeEstimator
+    from backend.tx_packing import PackLimits, PackReport, TransactionPacker
+    from backend.tx_pipeline import (RecipientResults, TransferJob, TransferPipeline, pooled_async_client,
+                                     split_invalid, transfers_for_allocation)
+
+    results = RecipientResults(write_row)
+    counts = {'distributed': 0, 'skipped': 0, 'resumed': 0}
+    packer = TransactionPacker(PackLimits(signers=builder.signer_count)) if pack else None
+    report = PackReport()
+
+    def packed(closed):
+        for job in closed:
+            report.add(job)
+            yield job
+
+    async def jobs():
+        for idx, (wallet, gross, referral_amount, net, ref) in indexed:
+            counts['distributed'] += gross
+            logger.info(f"[{idx}/{recipient_count}] {wallet[:8]}... gross={gross:,} net={net:,} ref={ref or 'None'} referral={referral_amount:,}")
+            row = {
+                "wallet": wallet,
+                "gross": gross,
+                "net": net,
+                "referrer": ref or "",
+                "referral_amount": referral_amount,
+            }
+            # Row-indexed keys stay unique (and stable across resumes) for repeated wallets
+            transfers = transfers_for_allocation(wallet, net, ref, referral_amount, missing_atas, str(idx))
+            errors = []
+            if packer is not None:
+                transfers, errors = split_invalid(transfers)
+            if journal is not None:
+                transfers, done, in_doubt = journal.plan(transfers)
+                counts['resumed'] += done
+                errors += in_doubt
+
+            if interactive and transfers:
+                resp = (await asyncio.to_thread(input, f"  Send {net:,} to {wallet}? [y/N/q]: ")).strip().lower()
+                if resp == 'q':
+                    logger.info("Quit requested by user")
+                    break
+                if resp not in ("y", "yes"):
+                    logger.info("  Skipped by user")
+                    counts['skipped'] += 1
+                    counts['distributed'] -= gross
+                    write_row(dict(row, status="skipped"))
+                    continue
+
+            results.expect(str(idx), row, len(transfers), errors)
+            if packer is not None:
+                for job in packed(packer.add(transfers)):
+                    yield job
+                continue
+            for t in transfers:
+                yield TransferJob(t.key, (t,))
+        if packer is not None:
+            for job in packed(packer.flush()):
+                yield job
+
+    def progress(stats):
+        print('PROGRESS ' + json.dumps({
+            'processed': results.ok + results.errors,
+            'succeeded': results.ok,
+            'failed': results.errors,
+            'submitted': stats.submitted,
+            'confirmed': stats.confirmed,
+            'tx_per_second': round(stats.tx_per_second, 1),
+            'time': time.time(),
+        }), flush=True)
+
+    async def report_progress(pipeline):
+        while True:
+            await asyncio.sleep(progress_interval)
+            progress(pipeline.stats)
+
+    logger.info(f"Connecting to RPC: {RPC} (concurrency {concurrency}, window {window})")
+    async with pooled_async_client(RPC, concurrency) as client:
+        if resume:
+            await journal.reconcile(client)
+        if priority_fee is not None:
+            builder.fees = PriorityFeeEstimator(client, [builder.source], percentile=priority_fee,
+                                                max_price=max_priority_fee)
+            await builder.fees.start()
+            logger.info(f"Priority fee: p{priority_fee:g} of recent fees = {builder.fees.price} micro-lamports/CU")
+        pipeline = TransferPipeline(client, builder, concurrency=concurrency, window=window, journal=journal,
+                                    ws_url=SOLANA_WS)
+        reporter = asyncio.create_task(report_progress(pipeline)) if progress_interval > 0 else None
         try:
-            share = r["weight"] / total_weight
-            amount = int(Decimal(AIRDROP_POOL) * share)
-            allocations.append({
-                "wallet": r["wallet"],
-                "amount": amount,
-                "referrer": r["referrer"]
-            })
-        except Exception as e:
-            logger.error(f"Error computing allocation for {r['wallet']}: {e}")
-    
-    logger.info(f"Computed allocations for {len(allocations)} recipients")
-    return allocations
+            stats = await pipeline.run(jobs(), on_result=results.on_result)
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+            if builder.fees is not None:
+                await builder.fees.stop()
+    if progress_interval > 0:
+        progress(stats)
+    if pack:
+        for line in report.lines():
+            logger.info(line)
+    return {'ok': results.ok, 'errors': results.errors, 'stats': stats, **counts}
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
 
 
 def load_keypair(path: str) -> Dict:
@@ -124,6 +235,212 @@ def load_keypair(path: str) -> Dict:
         raise
 
 
+def run_meta(args, vectorized: bool) -> Dict:
+    """Parameters a journal or shard directory is tied to"""
+    return {
+        'recipients_sha256': file_sha256(args.recipients_csv),
+        'mint': DOJO3_TOKEN_MINT,
+        'source': TREASURY_TOKEN_ACCOUNT,
+        'vectorized': vectorized,
+        'distribute_dust': args.distribute_dust,
+    }
+
+
+def shard_dir_for(args) -> str:
+    return args.shard_dir or os.path.splitext(args.output)[0] + '.shards'
+
+
+async def hold_lease(leases, lease, ttl: float, work):
+    """Await ``work`` while renewing ``lease`` every third of its TTL"""
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(ttl / 3)
+            if not leases.renew(lease, ttl):
+                logger.error(f"Lost the lease on shard {lease.shard}; its journal now refuses our sends")
+                return
+
+    beat = asyncio.create_task(heartbeat())
+    try:
+        return await work
+    finally:
+        beat.cancel()
+
+
+def run_worker(args, builder, total_weight: int, recipient_count: int, vectorized: bool) -> int:
+    """Lease shards from the coordinator's directory and send them until all are done
+
+    Each shard has its own journal. Taking one over (after its worker died)
+    claims the journal and reconciles it first, so transfers that landed
+    or may still land are never sent again.
+
+    Returns:
+        Process exit code
+    """
+    from backend.airdrop_shards import DONE, ShardLeases, journal_path, shard_rows
+    from backend.transfer_journal import JournalClaimed, JournalMismatch, TransferJournal
+
+    shard_dir = shard_dir_for(args)
+    leases = ShardLeases(os.path.join(shard_dir, 'leases.sqlite'))
+    recorded = leases.meta()
+    if 'shards' not in recorded:
+        logger.error(f"No coordinator has set up {shard_dir}")
+        return 2
+    meta = run_meta(args, vectorized)
+    for key, value in meta.items():
+        if recorded.get(key) != str(value):
+            logger.error(f"Shard directory {shard_dir} has {key}={recorded.get(key)!r}, this worker {value!r}")
+            return 2
+    shards = int(recorded['shards'])
+    worker = args.worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+    ata_cache = None
+    if args.ata_scan:
+        from backend.ata_scan import AtaCache
+        ata_cache = AtaCache(args.ata_cache, DOJO3_TOKEN_MINT, max_age=args.ata_max_age * 3600)
+
+    processed = 0
+    while True:
+        lease = leases.acquire(worker, args.lease_ttl)
+        if lease is None:
+            if all(s['state'] == DONE for s in leases.status()):
+                break
+            # Others hold the rest; stay around to take over any whose worker dies
+            time.sleep(min(5.0, args.lease_ttl / 3))
+            continue
+        logger.info(f"Worker {worker}: shard {lease.shard} of {shards} (attempt {lease.attempt})")
+
+        def rows():
+            planned = iter_planned(args.recipients_csv, total_weight, vectorized, args.distribute_dust)
+            return shard_rows(enumerate(planned, 1), lease.shard, shards)
+
+        journal = TransferJournal(journal_path(shard_dir, lease.shard))
+        try:
+            journal.claim(worker)
+            journal.check_meta(dict(meta, shard=lease.shard, shards=shards))
+
+            async def send_shard():
+                # Under the lease heartbeat from the start: on a large shard the ATA
+                # scan alone can outlast the TTL and let another worker take the shard
+                missing_atas = frozenset()
+                if ata_cache is not None:
+                    await scan_atas((row for _, row in rows()), ata_cache, args.ata_concurrency)
+                    missing_atas = ata_cache
+                return await submit_live(
+                    rows(), recipient_count, builder, lambda row: None, interactive=False,
+                    concurrency=args.concurrency, window=args.window, pack=args.pack, journal=journal,
+                    resume=True, missing_atas=missing_atas, priority_fee=args.priority_fee,
+                    max_priority_fee=args.max_priority_fee)
+
+            run = asyncio.run(hold_lease(leases, lease, args.lease_ttl, send_shard()))
+        except JournalClaimed as e:
+            logger.error(f"Shard {lease.shard} was taken over by another worker: {e}")
+            continue
+        except JournalMismatch as e:
+            logger.error(f"Shard {lease.shard} journal does not match this run: {e}")
+            leases.release(lease, str(e))
+            return 2
+        except Exception as e:
+            logger.error(f"Shard {lease.shard} failed, handing it back: {e}")
+            leases.release(lease, str(e))
+            return 1
+        finally:
+            journal.close()
+
+        for line in run['stats'].report()[:2]:
+            logger.info(f"Shard {lease.shard}: {line}")
+        if leases.complete(lease, run['ok'] + run['errors'], run['ok'], run['errors']):
+            processed += 1
+        else:
+            logger.error(f"Shard {lease.shard}: lease lost before it could be marked done")
+    logger.info(f"Worker {worker}: no shards left ({processed} processed here)")
+    leases.close()
+    if ata_cache is not None:
+        ata_cache.close()
+    return 0
+
+
+def worker_command(argv: List[str]) -> List[str]:
+    """This command line turned into a worker's (coordinator-only options dropped)"""
+    with_value = {'--shards', '--spawn'}
+    flags = {'--coordinator', '--resume'}
+    out, args = [], iter(argv)
+    for arg in args:
+        name = arg.split('=', 1)[0]
+        if name in with_value and '=' not in arg:
+            next(args, None)
+        if name in with_value or name in flags:
+            continue
+        out.append(arg)
+    return [sys.executable, os.path.abspath(__file__)] + out + ['--worker', '--yes']
+
+
+def coordinate(args, total_weight: int, vectorized: bool, write_row) -> Optional[Dict]:
+    """Set up the shards, wait for workers to finish them and merge their journals
+
+    With ``--spawn N`` the coordinator starts N local workers itself;
+    otherwise workers are started separately (on any host sharing the
+    shard directory) with --worker.
+
+    Returns:
+        Counts like submit_live's, or None if the shards were not all finished
+    """
+    from backend.airdrop_shards import (DONE, ShardLeases, ShardMismatch, describe, journal_path,
+                                        merged_rows)
+    from backend.transfer_journal import TransferJournal
+
+    shard_dir = shard_dir_for(args)
+    leases = ShardLeases(os.path.join(shard_dir, 'leases.sqlite'))
+    if leases.meta() and not args.resume:
+        logger.error(f"{shard_dir} already holds a sharded run")
+        logger.error("Pass --resume to continue it, or move the directory away to start over")
+        sys.exit(2)
+    try:
+        leases.create(args.shards, run_meta(args, vectorized))
+    except ShardMismatch as e:
+        logger.error(f"Cannot resume from {shard_dir}: {e}")
+        sys.exit(2)
+    shards = int(leases.meta()['shards'])
+    if args.resume:
+        reopened = leases.reopen()
+        if reopened:
+            logger.info(f"Reopened {reopened} shards that finished with errors")
+    logger.info(f"Coordinating {shards} shards in {shard_dir}")
+
+    workers = [subprocess.Popen(worker_command(sys.argv[1:])) for _ in range(args.spawn)]
+    if workers:
+        logger.info(f"Spawned {len(workers)} local workers")
+    last = None
+    while True:
+        status = leases.status()
+        line = describe(status)
+        if line != last:
+            logger.info(line)
+            last = line
+        if all(s['state'] == DONE for s in status):
+            break
+        if workers and all(w.poll() is not None for w in workers):
+            if all(s['state'] == DONE for s in leases.status()):
+                break
+            logger.error("All workers exited with shards unfinished; rerun with --resume")
+            return None
+        time.sleep(args.poll_interval)
+    for w in workers:
+        w.wait()
+    leases.close()
+
+    logger.info(f"Merging {shards} shard journals")
+    journals = {shard: TransferJournal(journal_path(shard_dir, shard)) for shard in range(shards)}
+    counts = {'ok': 0, 'errors': 0, 'skipped': 0, 'distributed': 0, 'resumed': 0}
+    planned = iter_planned(args.recipients_csv, total_weight, vectorized, args.distribute_dust)
+    for row in merged_rows(enumerate(planned, 1), journals, shards):
+        counts['distributed'] += row['gross']
+        counts['ok' if row['status'] == 'processed' else 'errors'] += 1
+        write_row(row)
+    for journal in journals.values():
+        journal.close()
+    return counts
+
+
 def main():
     import argparse
     p = argparse.ArgumentParser(
@@ -139,29 +456,88 @@ Examples:
   
   # Live mode without confirmations (batch)
   ALLOW_LIVE=1 python3 airdrop_orchestrator.py recipients.csv --yes
+
+  # Resume an interrupted live run from its journal
+  ALLOW_LIVE=1 python3 airdrop_orchestrator.py recipients.csv --yes --resume
+
+  # Sharded: a coordinator plus workers (here, or on hosts sharing --shard-dir)
+  ALLOW_LIVE=1 python3 airdrop_orchestrator.py recipients.csv --coordinator --shards 16 --spawn 4
+  ALLOW_LIVE=1 python3 airdrop_orchestrator.py recipients.csv --worker --fee-payer payer2.json
         """
     )
     p.add_argument("recipients_csv", help="Path to recipients CSV file")
     p.add_argument("--dry-run", action="store_true", help="Do not send transactions (test mode)")
     p.add_argument("--yes", action="store_true", help="Skip confirmation prompts (batch mode)")
     p.add_argument("--output", default="outputs/allocations_live.csv", help="Output CSV file")
+    p.add_argument("--vectorized", action="store_true", help="Compute allocations with NumPy in one shot")
+    p.add_argument("--distribute-dust", action="store_true",
+                   help="Hand out rounding dust by largest remainder so the pool sums exactly (implies --vectorized)")
+    p.add_argument("--concurrency", type=int, default=16, help="Maximum concurrent sendTransaction requests")
+    p.add_argument("--window", type=int, default=256, help="Maximum transactions awaiting confirmation")
+    p.add_argument("--pack", action="store_true",
+                   help="Pack several recipients' transfers into each transaction (dry run reports the tx count)")
+    p.add_argument("--journal", help="Checkpoint journal for live runs (default: <output>.journal.sqlite)")
+    p.add_argument("--resume", action="store_true",
+                   help="Continue a live run from its journal, reconciling in-flight transactions first")
+    p.add_argument("--ata-scan", action="store_true",
+                   help="Check recipients' token accounts first; missing ones are created with the transfer")
+    p.add_argument("--ata-cache", default="outputs/ata_cache.sqlite", help="ATA scan cache (reused across runs)")
+    p.add_argument("--ata-max-age", type=float, default=24.0, help="Hours a cached ATA scan result stays valid")
+    p.add_argument("--ata-concurrency", type=int, default=8, help="Concurrent getMultipleAccounts calls")
+    p.add_argument("--ata-plan", help="Dry run: write each transfer's action (transfer / create+transfer) here")
+    p.add_argument("--priority-fee", type=float, metavar="PCT",
+                   help="Pay this percentile (0-100) of recent priority fees on the treasury account")
+    p.add_argument("--max-priority-fee", type=int, default=50_000,
+                   help="Cap on the priority fee in micro-lamports per compute unit")
+    p.add_argument("--fee-payer", help="Keypair paying transaction fees (default: the treasury keypair)")
+    p.add_argument("--coordinator", action="store_true",
+                   help="Split the run into shards for --worker processes and merge their journals into --output")
+    p.add_argument("--worker", action="store_true", help="Send shards leased from a coordinator's --shard-dir")
+    p.add_argument("--shards", type=int, default=16, help="Coordinator: number of shards (by wallet hash)")
+    p.add_argument("--spawn", type=int, default=0, help="Coordinator: start this many local workers")
+    p.add_argument("--shard-dir", help="Shard leases and journals, shared by coordinator and workers "
+                                       "(default: <output>.shards)")
+    p.add_argument("--worker-id", help="Worker name in the lease table (default: host:pid)")
+    p.add_argument("--lease-ttl", type=float, default=60.0,
+                   help="Seconds without a heartbeat before a worker's shard is handed to another")
+    p.add_argument("--poll-interval", type=float, default=2.0, help="Coordinator: seconds between progress checks")
+    p.add_argument("--progress-interval", type=float, default=0.0,
+                   help="Seconds between PROGRESS {json} lines on stdout (0: none)")
     
     args = p.parse_args()
+    if args.coordinator and args.worker:
+        p.error("--coordinator and --worker are exclusive")
+    if (args.coordinator or args.worker) and args.dry_run:
+        p.error("sharded runs are live runs; use a plain --dry-run to check the plan")
+    if args.coordinator and args.shards < 1:
+        p.error("--shards must be at least 1")
 
     logger.info("=" * 60)
     logger.info("Dojo3 Airdrop Orchestrator")
     logger.info("=" * 60)
 
-    # Read and compute allocations
+    # Pass one over the recipients: total weight and row count
     try:
-        rows = read_recipients(args.recipients_csv)
-        allocations = compute_allocations(rows)
-        
-        if not allocations:
+        if not os.path.exists(args.recipients_csv):
+            raise FileNotFoundError(f"Recipients CSV not found: {args.recipients_csv}")
+        total_weight, recipient_count = sum_weights(iter_recipients(args.recipients_csv))
+
+        if recipient_count == 0 or total_weight <= 0:
             logger.error("No allocations computed, aborting")
             sys.exit(1)
-        
-        logger.info(f"Total DOJO to distribute: {sum(a['amount'] for a in allocations):,}")
+
+        logger.info(f"Loaded {recipient_count} recipients from {args.recipients_csv}")
+
+        vectorized = args.vectorized or args.distribute_dust
+        if vectorized:
+            try:
+                import numpy  # noqa: F401
+            except ImportError:
+                logger.error("--vectorized requires numpy. Install with: pip install numpy")
+                sys.exit(2)
+            from backend.alloc_vectorized import MAX_WEIGHT, load_columns
+            if total_weight > MAX_WEIGHT:
+                load_columns(args.recipients_csv)  # raises if any single weight overflows int64
     except Exception as e:
         logger.error(f"Failed to prepare allocations: {e}")
         sys.exit(1)
@@ -180,17 +556,13 @@ Examples:
         logger.info("DRY RUN MODE - No transactions will be sent")
 
     # Initialize Solana in live mode
-    token = None
-    treasury_kp = None
-    
+    builder = None
+    journal = None
+
     if not args.dry_run:
         try:
-            from solana.rpc.api import Client
-            from solana.rpc.core import RPCException
             from solders.keypair import Keypair
-            from solders.pubkey import Pubkey as PublicKey
-            from spl.token.client import Token
-            from spl.token.constants import TOKEN_PROGRAM_ID
+            from backend.tx_pipeline import SplTransferBuilder
             logger.info("Solana libraries imported successfully")
         except ImportError as e:
             logger.error(f"Failed to import Solana libraries: {e}")
@@ -209,26 +581,81 @@ Examples:
             sys.exit(2)
 
         try:
-            logger.info(f"Connecting to RPC: {RPC}")
-            client = Client(RPC)
-            
             logger.info(f"Loading treasury keypair: {TREASURY_KEYPAIR_PATH}")
             treasury_secret = load_keypair(TREASURY_KEYPAIR_PATH)
-            treasury_kp = Keypair.from_json(treasury_secret)
-            
-            token = Token(
-                client,
-                PublicKey(DOJO3_TOKEN_MINT),
-                TOKEN_PROGRAM_ID,
-                treasury_kp
-            )
-            logger.info("Solana client initialized")
+            treasury_kp = Keypair.from_json(json.dumps(treasury_secret))
+            payer_kp = treasury_kp
+            if args.fee_payer:
+                payer_kp = Keypair.from_json(json.dumps(load_keypair(args.fee_payer)))
+                logger.info(f"Fee payer: {payer_kp.pubkey()}")
+            builder = SplTransferBuilder(payer_kp, DOJO3_TOKEN_MINT, TREASURY_TOKEN_ACCOUNT, authority=treasury_kp)
+            logger.info("Solana transfer builder initialized")
         except Exception as e:
             logger.error(f"Failed to initialize Solana: {e}")
             sys.exit(2)
 
-    # Process allocations
-    out_rows = []
+        if args.worker:
+            sys.exit(run_worker(args, builder, total_weight, recipient_count, vectorized))
+
+    if not args.dry_run and not args.coordinator:
+        # Checkpoint journal: a fresh run refuses a used journal, a resume must match it
+        from backend.transfer_journal import JournalMismatch, TransferJournal
+        journal_path = args.journal or os.path.splitext(args.output)[0] + '.journal.sqlite'
+        try:
+            journal = TransferJournal(journal_path)
+            if not args.resume and journal.transfer_count():
+                logger.error(f"Journal {journal_path} already records {journal.transfer_count()} transfers")
+                logger.error("Pass --resume to continue that run, or move the journal away to start over")
+                sys.exit(2)
+            journal.check_meta(run_meta(args, vectorized))
+        except JournalMismatch as e:
+            logger.error(f"Cannot resume from {journal_path}: {e}")
+            sys.exit(2)
+        logger.info(f"Checkpoint journal: {journal_path}" + (" (resuming)" if args.resume else ""))
+    elif args.dry_run and args.resume:
+        logger.error("--resume only applies to live runs")
+        sys.exit(2)
+
+    # Pre-flight ATA scan (its own pass over the recipients; results live in the cache).
+    # Sharded workers scan their own shards.
+    ata_cache = None
+    if args.ata_scan and not args.coordinator:
+        if not DOJO3_TOKEN_MINT:
+            logger.error("--ata-scan needs DOJO3_TOKEN_MINT")
+            sys.exit(2)
+        from backend.ata_scan import AtaCache
+        ata_cache = AtaCache(args.ata_cache, DOJO3_TOKEN_MINT, max_age=args.ata_max_age * 3600)
+        try:
+            scan = asyncio.run(scan_atas(iter_planned(args.recipients_csv, total_weight, vectorized,
+                                                      args.distribute_dust),
+                                         ata_cache, args.ata_concurrency))
+        except Exception as e:
+            logger.error(f"ATA scan failed: {e}")
+            sys.exit(1)
+        for line in scan.lines():
+            logger.info(line)
+    elif args.ata_plan:
+        logger.error("--ata-plan needs --ata-scan")
+        sys.exit(2)
+    missing_atas = ata_cache if ata_cache is not None else frozenset()
+
+    # Process allocations (pass two streams from the engine; rows are written as they complete).
+    # Rows go to <output>.partial, moved onto --output only once the run finishes: the
+    # allocation index serves eligibility from the output and must never see a partial run
+    partial_path = args.output + '.partial'
+    try:
+        output_dir = os.path.dirname(args.output)
+        if output_dir and not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        out_f = open(partial_path, 'w', newline='')
+    except Exception as e:
+        logger.error(f"Failed to open output file: {e}")
+        sys.exit(1)
+    out_writer = csv.DictWriter(
+        out_f,
+        fieldnames=["wallet", "gross", "net", "referrer", "referral_amount", "status"]
+    )
+    out_writer.writeheader()
     success_count = 0
     error_count = 0
     skipped_count = 0
@@ -237,131 +664,86 @@ Examples:
     logger.info("Processing allocations...")
     logger.info("=" * 60)
 
-    for idx, a in enumerate(allocations, 1):
-        wallet = a['wallet']
-        gross = a['amount']
-        ref = a['referrer']
-        referral_amount = (gross * REFERRAL_BPS) // 10000 if ref else 0
-        net = gross - referral_amount
-
-        logger.info(f"[{idx}/{len(allocations)}] {wallet[:8]}... gross={gross:,} net={net:,} ref={ref or 'None'} referral={referral_amount:,}")
-
-        if not args.dry_run:
-            try:
-                from solders.pubkey import Pubkey as PublicKey
-                from spl.token.instructions import get_associated_token_address
-                
-                # Compute recipient ATA
-                recipient_ata = get_associated_token_address(
-                    PublicKey(wallet),
-                    PublicKey(DOJO3_TOKEN_MINT)
-                )
-                
-                # Send to recipient
-                if net > 0:
-                    if not args.yes:
-                        resp = input(f"  Send {net:,} to {wallet}? [y/N/q]: ").strip().lower()
-                        if resp == 'q':
-                            logger.info("Quit requested by user")
-                            break
-                        if resp not in ("y", "yes"):
-                            logger.info(f"  Skipped by user")
-                            skipped_count += 1
-                            out_rows.append({
-                                "wallet": wallet,
-                                "gross": gross,
-                                "net": net,
-                                "referrer": ref or "",
-                                "referral_amount": referral_amount,
-                                "status": "skipped"
-                            })
-                            continue
-                    
-                    try:
-                        logger.info(f"  Transferring {net:,} to recipient...")
-                        tx_sig = token.transfer(
-                            treasury_kp,
-                            TREASURY_TOKEN_ACCOUNT,
-                            str(recipient_ata),
-                            net
-                        )
-                        logger.info(f"  ✓ TX: {tx_sig}")
-                        success_count += 1
-                    except Exception as e:
-                        logger.error(f"  ✗ Transfer failed: {e}")
-                        error_count += 1
-                        out_rows.append({
-                            "wallet": wallet,
-                            "gross": gross,
-                            "net": net,
-                            "referrer": ref or "",
-                            "referral_amount": referral_amount,
-                            "status": f"error: {str(e)[:50]}"
-                        })
-                        continue
-
-                # Send referral bonus
-                if referral_amount > 0 and ref:
-                    ref_ata = get_associated_token_address(
-                        PublicKey(ref),
-                        PublicKey(DOJO3_TOKEN_MINT)
-                    )
-                    try:
-                        logger.info(f"  Transferring {referral_amount:,} to referrer...")
-                        tx_sig = token.transfer(
-                            treasury_kp,
-                            TREASURY_TOKEN_ACCOUNT,
-                            str(ref_ata),
-                            referral_amount
-                        )
-                        logger.info(f"  ✓ TX: {tx_sig}")
-                    except Exception as e:
-                        logger.error(f"  ✗ Referral transfer failed: {e}")
-                        error_count += 1
-
-            except Exception as e:
-                logger.error(f"  ✗ Processing error: {e}")
-                error_count += 1
-        else:
+    planned = iter_planned(args.recipients_csv, total_weight, vectorized, args.distribute_dust)
+    if args.dry_run:
+        total_distributed = 0
+        pack_report = plan_f = plan_writer = None
+        from backend.tx_pipeline import split_invalid, transfers_for_allocation
+        if args.pack:
+            from backend.tx_packing import PackLimits, PackReport, TransactionPacker
+            packer, pack_report = TransactionPacker(PackLimits(signers=2 if args.fee_payer else 1)), PackReport()
+        if args.ata_plan:
+            plan_f = open(args.ata_plan, 'w', newline='')
+            plan_writer = csv.writer(plan_f)
+            plan_writer.writerow(["wallet", "kind", "owner", "amount", "action"])
+        for idx, (wallet, gross, referral_amount, net, ref) in enumerate(planned, 1):
+            total_distributed += gross
+            logger.info(f"[{idx}/{recipient_count}] {wallet[:8]}... gross={gross:,} net={net:,} ref={ref or 'None'} referral={referral_amount:,}")
             success_count += 1
-
-        out_rows.append({
-            "wallet": wallet,
-            "gross": gross,
-            "net": net,
-            "referrer": ref or "",
-            "referral_amount": referral_amount,
-            "status": "processed"
-        })
-
-    # Write output
-    try:
-        output_dir = os.path.dirname(args.output)
-        if output_dir and not os.path.exists(output_dir):
-            os.makedirs(output_dir)
-        
-        with open(args.output, 'w', newline='') as f:
-            w = csv.DictWriter(
-                f,
-                fieldnames=["wallet", "gross", "net", "referrer", "referral_amount", "status"]
-            )
-            w.writeheader()
-            for r in out_rows:
-                w.writerow(r)
-        
-        logger.info(f"✓ Wrote results to {args.output}")
-    except Exception as e:
-        logger.error(f"Failed to write output file: {e}")
+            out_writer.writerow({
+                "wallet": wallet,
+                "gross": gross,
+                "net": net,
+                "referrer": ref or "",
+                "referral_amount": referral_amount,
+                "status": "processed"
+            })
+            if pack_report is None and plan_writer is None:
+                continue
+            transfers = transfers_for_allocation(wallet, net, ref, referral_amount, missing_atas, str(idx))
+            if plan_writer is not None:
+                for t in transfers:
+                    plan_writer.writerow([wallet, t.kind, t.owner, t.amount,
+                                          "create+transfer" if t.create_ata else "transfer"])
+            if pack_report is not None:
+                group, _ = split_invalid(transfers)
+                for job in packer.add(group):
+                    pack_report.add(job)
+        if plan_f is not None:
+            plan_f.close()
+            logger.info(f"✓ Wrote ATA plan to {args.ata_plan}")
+        if pack_report is not None:
+            for job in packer.flush():
+                pack_report.add(job)
+            for line in pack_report.lines():
+                logger.info(line)
+    elif args.coordinator:
+        run = coordinate(args, total_weight, vectorized, out_writer.writerow)
+        if run is None:
+            out_f.close()
+            sys.exit(1)
+        total_distributed = run['distributed']
+        success_count, error_count, skipped_count = run['ok'], run['errors'], run['skipped']
+    else:
+        run = asyncio.run(submit_live(enumerate(planned, 1), recipient_count, builder, out_writer.writerow,
+                                      interactive=not args.yes, concurrency=args.concurrency,
+                                      window=args.window, pack=args.pack, journal=journal,
+                                      resume=args.resume, missing_atas=missing_atas,
+                                      priority_fee=args.priority_fee, max_priority_fee=args.max_priority_fee,
+                                      progress_interval=args.progress_interval))
+        journal.close()
+        total_distributed = run['distributed']
+        success_count, error_count, skipped_count = run['ok'], run['errors'], run['skipped']
+        for line in run['stats'].report():
+            logger.info(line)
+        if run['resumed']:
+            logger.info(f"Resumed: {run['resumed']} transfers had already landed and were not resent")
+
+    out_f.close()
+    os.replace(partial_path, args.output)
+    if ata_cache is not None:
+        ata_cache.close()
+    logger.info(f"✓ Wrote results to {args.output}")
 
     # Summary
     logger.info("=" * 60)
     logger.info("SUMMARY")
     logger.info("=" * 60)
-    logger.info(f"Total allocations: {len(allocations)}")
+    logger.info(f"Total allocations: {recipient_count}")
     logger.info(f"Successful: {success_count}")
     logger.info(f"Errors: {error_count}")
     logger.info(f"Skipped: {skipped_count}")
-    logger.info(f"Total DOJO distributed: {sum(a['amount'] for a in allocations):,}")
+    logger.info(f"Total DOJO distributed: {total_distributed:,}")
     logger.info("=" * 60)
 
     if error_count > 0:
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Benchmark the streaming allocation engine against the legacy Decimal path
+
+Generates synthetic recipients CSVs (default 1M and 10M rows), then runs each
+mode in a fresh child process so peak RSS is measured per mode. The streaming
+engine writes every allocation through a csv writer, as the orchestrators do.
+
+Usage:
+    python3 scripts/bench_alloc_engine.py                  # 1M and 10M rows
+    python3 scripts/bench_alloc_engine.py --rows 1000000 --legacy
+    python3 scripts/bench_alloc_engine.py --keep-dir /tmp/alloc_bench
+"""
+import argparse
+import csv
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from backend.alloc_engine import AIRDROP_POOL, iter_allocations, iter_recipients, split_referral, sum_weights
+
+B58 = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+
+def generate(path, rows, seed=7):
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['wallet', 'weight', 'referrer'])
+        for i in range(rows):
+            wallet = ''.join(rng.choice(B58) for _ in range(12)) + f'{i:032d}'
+            r = rng.random()
+            weight = str(rng.randint(1, 1000)) if r < 0.8 else f'{rng.uniform(0.1, 50):.4f}'
+            ref = wallet[:20] + 'ref' if rng.random() < 0.3 else ''
+            w.writerow([wallet, weight, ref])
+
+
+def run_stream(path):
+    total, count = sum_weights(iter_recipients(path))
+    distributed = 0
+    with open(os.devnull, 'w', newline='') as out:
+        w = csv.writer(out)
+        for a in iter_allocations(path, total=total):
+            referral, net = split_referral(a.amount, bool(a.referrer))
+            w.writerow((a.wallet, a.amount, net, a.referrer or '', referral))
+            distributed += a.amount
+    return count, distributed
+
+
+def run_legacy(path):
+    # The pre-engine implementation: list of dicts, one Decimal division per row
+    from decimal import Decimal
+    rows = []
+    with open(path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            rows.append({'wallet': row['wallet'].strip(), 'weight': Decimal(row.get('weight', '1')),
+                         'referrer': row.get('referrer', '').strip() or None})
+    total_weight = sum(r['weight'] for r in rows)
+    allocations = []
+    for r in rows:
+        share = (r['weight'] / total_weight) if total_weight > 0 else Decimal(0)
+        allocations.append({'wallet': r['wallet'], 'amount': int(Decimal(AIRDROP_POOL) * share),
+                            'referrer': r['referrer']})
+    distributed = 0
+    with open(os.devnull, 'w', newline='') as out:
+        w = csv.writer(out)
+        for a in allocations:
+            referral = (a['amount'] * 2400) // 10000 if a['referrer'] else 0
+            w.writerow((a['wallet'], a['amount'], a['amount'] - referral, a['referrer'] or '', referral))
+            distributed += a['amount']
+    return len(allocations), distributed
+
+
+def child(mode, path):
+    started = time.perf_counter()
+    count, distributed = (run_stream if mode == 'stream' else run_legacy)(path)
+    elapsed = time.perf_counter() - started
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f'{count} {distributed} {elapsed:.6f} {peak_kb}')
+
+
+def measure(mode, path):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, path],
+                         check=True, capture_output=True, text=True).stdout.split()
+    count, distributed, elapsed, peak_kb = int(out[0]), int(out[1]), float(out[2]), int(out[3])
+    return count, distributed, elapsed, peak_kb / 1024
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark the allocation engine")
+    p.add_argument('--rows', type=int, action='append', help='Row count (repeatable; default 1M and 10M)')
+    p.add_argument('--legacy', action='store_true', help='Also run the legacy Decimal list implementation')
+    p.add_argument('--keep-dir', help='Write generated CSVs here and reuse them across runs')
+    p.add_argument('--child', nargs=2, metavar=('MODE', 'PATH'), help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    if args.child:
+        child(*args.child)
+        return
+
+    sizes = args.rows or [1_000_000, 10_000_000]
+    modes = ['stream'] + (['legacy'] if args.legacy else [])
+    workdir = args.keep_dir or tempfile.mkdtemp(prefix='alloc_bench_')
+    os.makedirs(workdir, exist_ok=True)
+
+    print(f"{'rows':>11} {'mode':<7} {'seconds':>8} {'rows/s':>11} {'peak MB':>8} {'distributed':>12}")
+    try:
+        for rows in sizes:
+            path = os.path.join(workdir, f'recipients_{rows}.csv')
+            if not os.path.exists(path):
+                print(f"Generating {rows:,} rows -> {path}", file=sys.stderr)
+                generate(path, rows)
+            for mode in modes:
+                try:
+                    count, distributed, elapsed, peak_mb = measure(mode, path)
+                except subprocess.CalledProcessError as e:
+                    # e.g. the legacy path being OOM-killed at 10M rows
+                    print(f"{rows:>11,} {mode:<7} failed (exit {e.returncode})")
+                    continue
+                print(f"{count:>11,} {mode:<7} {elapsed:>8.2f} {count / elapsed:>11,.0f} "
+                      f"{peak_mb:>8.1f} {distributed:>12,}")
+    finally:
+        if not args.keep_dir:
+            for name in os.listdir(workdir):
+                os.remove(os.path.join(workdir, name))
+            os.rmdir(workdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""Microbenchmark of rate_limit decorator overhead per call
+
+Compares an undecorated endpoint with the GCRA limiter on the memory and
+SQLite backends, across a configurable number of distinct client IPs.
+
+Usage: python3 scripts/bench_rate_limit.py --calls 200000 --clients 10000
+"""
+import os
+import sys
+import argparse
+import logging
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from starlette.requests import Request
+
+from backend.rate_limiter import RateLimiter, MemoryBackend, SQLiteBackend
+
+
+def make_requests(n_clients):
+    return [
+        Request({'type': 'http', 'client': (f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}', 0), 'headers': []})
+        for i in range(n_clients)
+    ]
+
+
+def endpoint(request: Request):
+    return None
+
+
+def bench(label, func, requests, calls):
+    n = len(requests)
+    start = time.perf_counter()
+    for i in range(calls):
+        try:
+            func(request=requests[i % n])
+        except Exception:
+            pass
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {calls / elapsed:>12,.0f} calls/s  {elapsed / calls * 1e6:>8.2f} us/call")
+    return elapsed / calls
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark rate limiter overhead")
+    p.add_argument('--calls', type=int, default=200_000)
+    p.add_argument('--clients', type=int, default=10_000)
+    p.add_argument('--max-requests', type=int, default=30)
+    p.add_argument('--window', type=float, default=60)
+    args = p.parse_args()
+
+    # Rejections log a warning each; keep them out of the timing
+    logging.getLogger('backend.rate_limiter').setLevel(logging.ERROR)
+
+    requests = make_requests(args.clients)
+    base = bench('baseline', endpoint, requests, args.calls)
+
+    mem = RateLimiter(MemoryBackend())
+    t = bench('memory', mem.limit(args.max_requests, args.window)(endpoint), requests, args.calls)
+    print(f"{'':<10} overhead {(t - base) * 1e6:.2f} us/call, keys={mem.backend.size()}")
+
+    with tempfile.TemporaryDirectory() as d:
+        sq = RateLimiter(SQLiteBackend(os.path.join(d, 'rl.sqlite')))
+        calls = min(args.calls, 50_000)
+        t = bench('sqlite', sq.limit(args.max_requests, args.window)(endpoint), requests, calls)
+        print(f"{'':<10} overhead {(t - base) * 1e6:.2f} us/call, keys={sq.backend.size()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""Benchmark the RPC pool against degraded fake RPC replicas
+
+Starts three in-process replicas of one fake chain (scripts/fake_rpc.py):
+one with a slow tail, one rate-limited that also answers some requests
+with HTTP 503, and one healthy. Concurrent workers then issue reads, first
+against a single degraded endpoint with the plain solana-py client and then
+through backend.rpc_pool over all three, reporting throughput, latency
+percentiles and errors.
+
+Usage:
+    python3 scripts/bench_rpc_pool.py --requests 2000 --workers 16
+    python3 scripts/bench_rpc_pool.py --rpc https://a.example,https://b.example   # real endpoints, pool only
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from solana.rpc.async_api import AsyncClient
+from solders.pubkey import Pubkey
+
+from backend.rpc_pool import RpcPool, rpc_endpoints
+from backend.tx_pipeline import LatencyHistogram
+import fake_rpc
+
+
+async def drive(client, requests, workers):
+    latency = LatencyHistogram()
+    errors = 0
+    remaining = iter(range(requests))
+    owner = Pubkey.default()
+
+    async def worker():
+        nonlocal errors
+        for i in remaining:
+            started = time.perf_counter()
+            try:
+                if i % 3 == 0:
+                    await client.get_latest_blockhash()
+                elif i % 3 == 1:
+                    await client.get_balance(owner)
+                else:
+                    await client.get_slot()
+            except Exception:
+                errors += 1
+                continue
+            latency.record(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(workers)])
+    return time.perf_counter() - started, latency, errors
+
+
+def report(label, elapsed, latency, errors):
+    print(f"{label}: {latency.count} ok, {errors} errors in {elapsed:.2f}s "
+          f"({latency.count / elapsed:.0f} req/s), p50 {latency.percentile(50):.1f} ms, "
+          f"p99 {latency.percentile(99):.1f} ms, max {latency.percentile(100):.1f} ms")
+
+
+async def run(urls, single_url, requests, workers, rate_limit):
+    if single_url:
+        async with AsyncClient(single_url) as client:
+            report(f"single endpoint {single_url}", *await drive(client, requests, workers))
+    pool = RpcPool(urls, rate_limit=rate_limit)
+    async with pool.async_client() as client:
+        report(f"pool of {len(urls)}", *await drive(client, requests, workers))
+    return pool
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark the adaptive RPC pool")
+    p.add_argument('--rpc', help='Comma-separated RPC URLs (default: start degraded fake replicas)')
+    p.add_argument('--requests', type=int, default=2000)
+    p.add_argument('--workers', type=int, default=16)
+    p.add_argument('--rate-limit', type=float, default=0.0, help='Known requests/second per endpoint')
+    p.add_argument('--latency', type=float, default=5.0, help='Fake replica base latency (ms)')
+    p.add_argument('--slow-rate', type=float, default=0.05, help='Fraction of slow requests on the slow replica')
+    p.add_argument('--slow-latency', type=float, default=800.0, help='Slow request latency (ms)')
+    p.add_argument('--throttle', type=float, default=100.0, help='Requests/second before 429 on the limited replica')
+    p.add_argument('--metrics', action='store_true', help='Print the pool metrics as JSON')
+    args = p.parse_args()
+
+    single_url = None
+    if args.rpc:
+        urls = rpc_endpoints(args.rpc)
+    else:
+        latency = args.latency / 1000
+        slow = fake_rpc.serve(faults=fake_rpc.EndpointFaults(
+            latency=latency, slow_rate=args.slow_rate, slow_latency=args.slow_latency / 1000, seed=1))
+        limited = fake_rpc.serve(chain=slow.chain, faults=fake_rpc.EndpointFaults(
+            latency=latency, rate_limit=args.throttle, http_error_rate=0.02, seed=2))
+        healthy = fake_rpc.serve(chain=slow.chain, faults=fake_rpc.EndpointFaults(latency=latency, seed=3))
+        urls = [f'http://127.0.0.1:{s.server_address[1]}' for s in (slow, limited, healthy)]
+        single_url = urls[0]
+        print(f"Replicas: slow tail {urls[0]}, rate-limited {urls[1]}, healthy {urls[2]}")
+
+    pool = asyncio.run(run(urls, single_url, args.requests, args.workers, args.rate_limit))
+    if args.metrics:
+        print(json.dumps(pool.metrics(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
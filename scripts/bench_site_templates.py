@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Benchmark of SiteGenerator renders per second, per template
+
+Each template is rendered with a handful of repeated site colors (palette
+cache hits, the common case) and with a distinct color per render (every
+palette lookup a miss). Files are not written; see --generate for the
+full generate() path including index.html/metadata.json writes.
+
+Usage: python3 scripts/bench_site_templates.py --renders 20000 [--generate 2000]
+"""
+import os
+import sys
+import argparse
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from backend.site_generator import COMPILED, SiteGenerator, palette
+
+
+def sites(template, n, distinct_colors):
+    colors = ['#4ECDC4', '#FF6B9D', '#00FF41', '#FFD166']
+    return [(f'user{i:06d}', {
+        'name': f'Site {i}',
+        'description': f'Description of site {i}',
+        'template': template,
+        'color': f'#{i * 2654435761 % (1 << 24):06x}' if distinct_colors else colors[i % len(colors)],
+    }) for i in range(n)]
+
+
+def bench_render(gen, template, batch):
+    palette.cache_clear()
+    render = getattr(gen, gen.TEMPLATES[template])
+    start = time.perf_counter()
+    for username, data in batch:
+        render(username, data)
+    return len(batch) / (time.perf_counter() - start)
+
+
+def main():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument('--renders', type=int, default=20000, help='renders per template and color mode')
+    p.add_argument('--generate', type=int, default=0, help='also time generate() for this many sites')
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gen = SiteGenerator(os.path.join(tmp, 'sites'), manifest_path=os.path.join(tmp, 'manifest.sqlite'))
+        print(f"{'template':<10} {'KiB':>6} {'slots':>6} {'renders/s (cached colors)':>27} {'renders/s (distinct colors)':>29}")
+        for template, compiled in COMPILED.items():
+            size = len(gen.render_template(template, 'user', {})) / 1024
+            warm = bench_render(gen, template, sites(template, args.renders, False))
+            cold = bench_render(gen, template, sites(template, args.renders, True))
+            print(f"{template:<10} {size:>6.1f} {len(compiled.slots):>6} {warm:>27,.0f} {cold:>29,.0f}")
+
+        if args.generate:
+            batch = [site for template in COMPILED for site in sites(template, args.generate // len(COMPILED), False)]
+            start = time.perf_counter()
+            for username, data in batch:
+                gen.generate(username, data)
+            elapsed = time.perf_counter() - start
+            print(f"generate(): {len(batch)} sites in {elapsed:.2f}s ({len(batch) / elapsed:,.0f} sites/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Benchmark the transfer pipeline against a local fake RPC
+
+Signs real SPL transfer transactions for random recipients and pushes them
+through backend.tx_pipeline, reporting tx/s and latency histograms. By
+default a fake RPC (scripts/fake_rpc.py) is started in-process; pass --rpc
+to target a running one.
+
+Usage:
+    python3 scripts/bench_tx_pipeline.py --transfers 2000 --concurrency 32 --window 512
+    python3 scripts/bench_tx_pipeline.py --transfers 200 --sequential   # one-at-a-time baseline
+    python3 scripts/bench_tx_pipeline.py --transfers 20000 --pack       # many transfers per tx
+    python3 scripts/bench_tx_pipeline.py --journal /tmp/bench.sqlite    # with write-ahead checkpoints
+    python3 scripts/bench_tx_pipeline.py --ws                           # signatureSubscribe confirmations
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from solders.keypair import Keypair
+
+from backend.priority_fees import PriorityFeeEstimator
+from backend.tx_packing import plan_transactions
+from backend.tx_pipeline import (SplTransferBuilder, TransferJob, TransferPipeline, pooled_async_client,
+                                 transfers_for_allocation)
+from backend.transfer_journal import TransferJournal
+import fake_rpc
+
+
+def make_groups(count):
+    # Recipient owners are random; every third recipient has a referrer
+    groups, total = [], 0
+    while total < count:
+        wallet = str(Keypair().pubkey())
+        ref = str(Keypair().pubkey()) if len(groups) % 3 == 0 else None
+        group = transfers_for_allocation(wallet, 1000, ref, 240)[:count - total]
+        groups.append(group)
+        total += len(group)
+    return groups
+
+
+def make_jobs(count, pack=False):
+    groups = make_groups(count)
+    if pack:
+        return list(plan_transactions(groups))
+    return [TransferJob(t.key, (t,)) for group in groups for t in group]
+
+
+async def run(rpc_url, jobs, concurrency, window, confirm_interval, journal=None, priority_fee=None,
+              ws_url=None):
+    payer = Keypair()
+    builder = SplTransferBuilder(payer, str(Keypair().pubkey()), str(Keypair().pubkey()))
+    if journal is not None:
+        for job in jobs:
+            journal.plan(job.transfers)
+    async with pooled_async_client(rpc_url, concurrency) as client:
+        if priority_fee is not None:
+            builder.fees = PriorityFeeEstimator(client, [builder.source], percentile=priority_fee)
+            await builder.fees.start()
+        pipeline = TransferPipeline(client, builder, concurrency=concurrency, window=window,
+                                    confirm_interval=confirm_interval, journal=journal, ws_url=ws_url)
+        stats = await pipeline.run(jobs)
+        if builder.fees is not None:
+            await builder.fees.stop()
+            print(f"Priority fee {builder.fees.price} micro-lamports/CU ({builder.fees.samples} samples)")
+        print(f"Blockhash cache: {pipeline.blockhashes.metrics()}")
+        print(f"Confirmation tracker: {pipeline.tracker.metrics()}")
+        return stats
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark the transfer submission pipeline")
+    p.add_argument('--rpc', help='RPC URL (default: start an in-process fake RPC)')
+    p.add_argument('--ws', nargs='?', const='', metavar='URL',
+                   help='Confirm by signatureSubscribe (the fake RPC websocket, or this URL)')
+    p.add_argument('--transfers', type=int, default=2000)
+    p.add_argument('--concurrency', type=int, default=32)
+    p.add_argument('--window', type=int, default=512)
+    p.add_argument('--confirm-interval', type=float, default=0.25)
+    p.add_argument('--sequential', action='store_true', help='Concurrency 1, window 1 (the old loop)')
+    p.add_argument('--pack', action='store_true', help='Pack transfers into shared transactions')
+    p.add_argument('--journal', help='Checkpoint to this (new) journal file while sending')
+    p.add_argument('--priority-fee', type=float, metavar='PCT', help='Pay this percentile of recent priority fees')
+    p.add_argument('--send-latency', type=float, default=20.0, help='Fake RPC send latency (ms)')
+    p.add_argument('--drop-rate', type=float, default=0.0, help='Fake RPC fraction of sends that never land')
+    p.add_argument('--confirm-delay', type=float, default=0.8, help='Fake RPC confirmation delay (s)')
+    args = p.parse_args()
+
+    rpc_url = args.rpc
+    if not rpc_url:
+        server = fake_rpc.serve(send_latency=args.send_latency / 1000, confirm_delay=args.confirm_delay,
+                                drop_rate=args.drop_rate, priority_fee=5_000,
+                                ws_port=0 if args.ws is not None else None)
+        rpc_url = f'http://127.0.0.1:{server.server_address[1]}'
+        if server.ws_address:
+            args.ws = args.ws or f'ws://127.0.0.1:{server.ws_address[1]}'
+
+    concurrency, window = (1, 1) if args.sequential else (args.concurrency, args.window)
+    jobs = make_jobs(args.transfers, args.pack)
+    print(f"Sending {args.transfers} transfers in {len(jobs)} transactions to {rpc_url} "
+          f"(concurrency {concurrency}, window {window})")
+    journal = None
+    if args.journal:
+        if os.path.exists(args.journal):
+            p.error(f'{args.journal} already exists')
+        journal = TransferJournal(args.journal)
+    stats = asyncio.run(run(rpc_url, jobs, concurrency, window, args.confirm_interval, journal, args.priority_fee,
+                            args.ws or None))
+    if journal is not None:
+        print(f"Journal states: {journal.summary()}")
+        journal.close()
+    for line in stats.report():
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
+import asyncio
 import os
-import time
+import sys
 import json
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey as PublicKey
-from solana.rpc.api import Client
 from spl.token.client import Token
 from spl.token.constants import TOKEN_PROGRAM_ID
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from backend.confirmation_tracker import ConfirmationTracker
+from backend.rpc_pool import RpcPool, rpc_endpoints
+
 RPC = os.environ.get("SOLANA_RPC", "https://api.devnet.solana.com")
-client = Client(RPC)
+# devnet is flaky and its faucet rate-limits hard: retry with long, jittered backoff
+rpc_pool = RpcPool(rpc_endpoints(RPC), retries=6, backoff_base=1.0, backoff_max=10.0, timeout=30.0)
+client = rpc_pool.client()
+# Optional websocket endpoint (e.g. wss://api.devnet.solana.com) for signatureSubscribe
+WS = os.environ.get("SOLANA_WS") or None
 
 KEYPATH = os.path.join(os.getcwd(), "outputs", "dev_treasury_keypair.json")
 
@@ -20,13 +29,16 @@ def save_keypair(kp: Keypair, path: str):
     print("Saved keypair to", path)
 
 
-def wait_for_confirm(sig):
-    for _ in range(30):
-        res = client.get_confirmed_transaction(sig)
-        if res['result']:
-            return True
-        time.sleep(1)
-    return False
+def wait_for_confirm(sig, timeout: float = 30.0) -> bool:
+    async def wait():
+        async with rpc_pool.async_client() as aclient:
+            async with ConfirmationTracker(aclient, poll_interval=1.0, timeout=timeout, ws_url=WS) as tracker:
+                return await tracker.wait(sig)
+
+    confirmation = asyncio.run(wait())
+    if confirmation.status != 'confirmed':
+        print(f"Transaction {sig} {confirmation.status}: {confirmation.error}")
+    return confirmation.status == 'confirmed'
 
 
 def main():
@@ -38,21 +50,17 @@ def main():
     # fund with devnet airdrop
     lamports = 2_000_000_000  # 2 SOL
     print("Requesting airdrop of 2 SOL to", kp.pubkey())
-    # retry airdrop a few times (devnet can be flaky)
-    sig = None
-    for attempt in range(6):
-        try:
-            resp = client.request_airdrop(kp.pubkey(), lamports)
-            sig = resp['result']
-            print("Airdrop tx sig:", sig)
-            print("Waiting for confirmation...")
-            if wait_for_confirm(sig):
-                break
-        except Exception as e:
-            print("Airdrop attempt", attempt+1, "failed:", e)
-        time.sleep(2)
-
-    if not sig:
+    # transport errors and 429s are retried by the RPC pool; a request the
+    # faucet may have processed is not repeated
+    try:
+        sig = client.request_airdrop(kp.pubkey(), lamports).value
+        print("Airdrop tx sig:", sig)
+        print("Waiting for confirmation...")
+        confirmed = wait_for_confirm(sig)
+    except Exception as e:
+        print("Airdrop failed:", e)
+        confirmed = False
+    if not confirmed:
         print("Airdrop failed after retries, aborting")
         return
     print("Airdrop confirmed")
@@ -78,6 +86,8 @@ def main():
     # set env vars for orchestrator
     os.environ['ALLOW_LIVE'] = '1'
     os.environ['SOLANA_RPC'] = RPC
+    if WS:
+        os.environ['SOLANA_WS'] = WS
     os.environ['DOJO3_TOKEN_MINT'] = str(mint_pubkey)
     os.environ['TREASURY_TOKEN_ACCOUNT'] = str(treasury_ata)
     os.environ['TREASURY_KEYPAIR_PATH'] = KEYPATH
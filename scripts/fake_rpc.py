@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""Local fake Solana JSON-RPC server for exercising the transfer pipeline
+
+Accepts real signed transactions, remembers their signatures and reports
+them confirmed after a configurable delay; transactions whose blockhash has
+expired are silently dropped, as on a real cluster. getMultipleAccounts reports a
+stable, configurable fraction of accounts as existing token accounts. Latency, send failures, dropped
+transactions and on-chain errors can be injected, as can endpoint-level
+faults (429 rate limiting, slow responses, HTTP 503s). Several replicas can
+serve one chain, like a pool of RPC providers. With --ws-port a websocket
+endpoint answers signatureSubscribe and pushes signatureNotification once
+the transaction confirms. Call counters are served as JSON on GET /stats and
+the signatures that landed on GET /signatures.
+
+Usage:
+    python3 scripts/fake_rpc.py --port 8899 --send-latency 20 --confirm-delay 0.8
+    python3 scripts/fake_rpc.py --port 8899 --replicas 3 --rate-limit 50 --slow-rate 0.05
+    python3 scripts/fake_rpc.py --port 8899 --ws-port 8900
+    SOLANA_RPC=http://127.0.0.1:8899 python3 outputs/airdrop_orchestrator.py ...
+
+Importable: ``serve(port=0, ...)`` starts the server on a daemon thread and
+returns it (``server.server_address`` holds the bound port, and
+``server.ws_address`` the websocket one when ``ws_port`` is given); pass
+``chain=other.chain`` to start a replica of another server.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from solders.hash import Hash
+from solders.transaction import Transaction
+from spl.token.constants import TOKEN_PROGRAM_ID
+
+SLOT_SECONDS = 0.4
+BLOCKHASH_VALID_BLOCKS = 150
+TOKEN_ACCOUNT_RENT = 2_039_280
+
+
+class FakeChain:
+    """In-memory chain state shared by all handler threads"""
+
+    def __init__(self, send_latency: float = 0.0, confirm_delay: float = 0.5,
+                 fail_rate: float = 0.0, drop_rate: float = 0.0, error_rate: float = 0.0,
+                 account_rate: float = 1.0, priority_fee: int = 0, seed: int = 0):
+        self.send_latency = send_latency
+        self.confirm_delay = confirm_delay
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.error_rate = error_rate
+        self.account_rate = account_rate
+        self.priority_fee = priority_fee
+        self.started = time.monotonic()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.sent = {}  # signature -> (sent_at, slot, error or None, dropped)
+        self.blockhashes = {}  # blockhash handed out -> its slot
+        self.calls = Counter()
+
+    def slot(self) -> int:
+        return int((time.monotonic() - self.started) / SLOT_SECONDS) + 1000
+
+    def blockhash(self, slot: int) -> str:
+        return str(Hash.hash(slot.to_bytes(8, 'little')))
+
+    # JSON-RPC methods -------------------------------------------------------
+
+    def getHealth(self, params):
+        return 'ok'
+
+    def getSlot(self, params):
+        return self.slot()
+
+    def getBlockHeight(self, params):
+        return self.slot()
+
+    def getBalance(self, params):
+        return {'context': {'slot': self.slot()}, 'value': 10 ** 12}
+
+    def getLatestBlockhash(self, params):
+        slot = self.slot()
+        blockhash = self.blockhash(slot)
+        with self.lock:
+            self.blockhashes[blockhash] = slot
+        return {
+            'context': {'slot': slot},
+            'value': {'blockhash': blockhash, 'lastValidBlockHeight': slot + BLOCKHASH_VALID_BLOCKS},
+        }
+
+    def account_exists(self, address: str) -> bool:
+        # Stable per address, so repeated scans agree
+        digest = hashlib.sha256(address.encode()).digest()
+        return int.from_bytes(digest[:8], 'little') < self.account_rate * 2 ** 64
+
+    def getMultipleAccounts(self, params):
+        if len(params[0]) > 100:
+            raise RpcError(-32602, 'Too many inputs provided; max 100')
+        value = [
+            {'lamports': TOKEN_ACCOUNT_RENT, 'owner': str(TOKEN_PROGRAM_ID), 'data': ['', 'base64'],
+             'executable': False, 'rentEpoch': 0, 'space': 165}
+            if self.account_exists(address) else None
+            for address in params[0]
+        ]
+        return {'context': {'slot': self.slot()}, 'value': value}
+
+    def sendTransaction(self, params):
+        if self.send_latency:
+            time.sleep(self.send_latency)
+        with self.lock:
+            roll_fail, roll_drop, roll_err = self.rng.random(), self.rng.random(), self.rng.random()
+        if roll_fail < self.fail_rate:
+            raise RpcError(-32005, 'Node is behind (injected failure)', {'numSlotsBehind': 42})
+        tx = Transaction.from_bytes(base64.b64decode(params[0]))
+        sig = str(tx.signatures[0])
+        slot = self.slot()
+        with self.lock:
+            issued = self.blockhashes.get(str(tx.message.recent_blockhash))
+            expired = issued is None or slot > issued + BLOCKHASH_VALID_BLOCKS
+            if sig not in self.sent:
+                err = {'InstructionError': [0, {'Custom': 1}]} if roll_err < self.error_rate else None
+                self.sent[sig] = (time.monotonic(), slot, err, expired or roll_drop < self.drop_rate)
+        return sig
+
+    def getRecentPrioritizationFees(self, params):
+        # Per-slot fees over the last 150 slots: idle slots pay nothing, the
+        # rest scatter around --priority-fee
+        slot = self.slot()
+        out = []
+        for s in range(slot - 149, slot + 1):
+            roll = random.Random(s)
+            fee = 0 if roll.random() < 0.4 else int(self.priority_fee * roll.lognormvariate(0, 0.75))
+            out.append({'slot': s, 'prioritizationFee': fee})
+        return out
+
+    def status(self, sig: str, now: float):
+        """Signature status as getSignatureStatuses reports it, or None; call with the lock held"""
+        entry = self.sent.get(sig)
+        if entry is None or entry[3] or now - entry[0] < self.confirm_delay:
+            return None
+        sent_at, slot, err, _ = entry
+        return {
+            'slot': slot,
+            'confirmations': None,
+            'err': err,
+            'status': {'Err': err} if err else {'Ok': None},
+            'confirmationStatus': 'finalized' if now - sent_at > self.confirm_delay + 12.8 else 'confirmed',
+        }
+
+    def getSignatureStatuses(self, params):
+        now = time.monotonic()
+        with self.lock:
+            out = [self.status(sig, now) for sig in params[0]]
+        return {'context': {'slot': self.slot()}, 'value': out}
+
+    def landed(self) -> dict:
+        """signature -> error (None on success) for every tx that will confirm"""
+        with self.lock:
+            return {sig: err for sig, (_, _, err, dropped) in self.sent.items() if not dropped}
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {'calls': dict(self.calls), 'transactions': len(self.sent)}
+
+
+class EndpointFaults:
+    """Per-server transport faults, applied before a request reaches the chain"""
+
+    def __init__(self, rate_limit: float = 0.0, latency: float = 0.0, slow_rate: float = 0.0,
+                 slow_latency: float = 1.0, http_error_rate: float = 0.0, seed: int = 0):
+        self.rate_limit = rate_limit
+        self.latency = latency
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.http_error_rate = http_error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window = (0.0, 0)  # (second, requests in it)
+        self.counts = Counter()
+
+    def admit(self):
+        """(HTTP status, Retry-After) to fail this request with, or None; sleeps injected latency"""
+        now = time.monotonic()
+        with self.lock:
+            second, count = self.window
+            self.window = (second, count + 1) if int(now) == second else (int(now), 1)
+            roll_slow, roll_err = self.rng.random(), self.rng.random()
+            if self.rate_limit and self.window[1] > self.rate_limit:
+                self.counts['throttled'] += 1
+                return 429, 1  # the window resets within a second
+            if roll_err < self.http_error_rate:
+                self.counts['http_errors'] += 1
+                return 503, None
+            if roll_slow < self.slow_rate:
+                self.counts['slow'] += 1
+        delay = self.latency + (self.slow_latency if roll_slow < self.slow_rate else 0.0)
+        if delay:
+            time.sleep(delay)
+        return None
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str, data=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+def make_handler(chain: FakeChain, faults: EndpointFaults, quiet: bool):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+        def handle(self):
+            try:
+                super().handle()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # the client gave up on the request, e.g. a losing hedge
+
+        def _reply(self, status: int, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/stats':
+                with faults.lock:
+                    counts = dict(faults.counts)
+                self._reply(200, dict(chain.stats(), faults=counts))
+            elif self.path == '/signatures':
+                self._reply(200, chain.landed())
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            req = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            fault = faults.admit()
+            if fault is not None:
+                status, retry_after = fault
+                data = b'{"error": "injected"}'
+                self.send_response(status)
+                if retry_after is not None:
+                    self.send_header('Retry-After', str(retry_after))
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+                return
+            batch = isinstance(req, list)
+            replies = [self._call(r) for r in (req if batch else [req])]
+            self._reply(200, replies if batch else replies[0])
+
+        def _call(self, req: dict) -> dict:
+            method = req.get('method', '')
+            with chain.lock:
+                chain.calls[method] += 1
+            handler = getattr(chain, method, None) if method[:1].islower() else None
+            if handler is None:
+                return {'jsonrpc': '2.0', 'id': req.get('id'),
+                        'error': {'code': -32601, 'message': f'Method not found: {method}'}}
+            try:
+                return {'jsonrpc': '2.0', 'id': req.get('id'), 'result': handler(req.get('params') or [])}
+            except RpcError as e:
+                # solders cannot parse a sendTransaction error without ``data``
+                error = {'code': e.code, 'message': e.message, 'data': e.data}
+                return {'jsonrpc': '2.0', 'id': req.get('id'), 'error': error}
+
+        def log_message(self, fmt, *args):
+            if not quiet:
+                print(f"[fake-rpc] {self.address_string()} {fmt % args}")
+
+    return Handler
+
+
+def serve_ws(chain: FakeChain, host: str = '127.0.0.1', port: int = 0, poll_interval: float = 0.05) -> tuple:
+    """Start the signatureSubscribe websocket on a daemon thread; returns its bound address
+
+    Each subscription is notified once, when the transaction reaches the
+    status getSignatureStatuses would report, and then removed, as
+    signatureSubscribe does on a real node.
+    """
+    from websockets.asyncio.server import serve as ws_serve
+
+    bound = []
+    ready = threading.Event()
+
+    async def session(ws):
+        subscriptions = {}  # subscription id -> signature
+        next_id = iter(range(1, 2 ** 31))
+
+        async def notify():
+            while True:
+                await asyncio.sleep(poll_interval)
+                now = time.monotonic()
+                with chain.lock:
+                    done = [(sub, chain.status(sig, now)) for sub, sig in subscriptions.items()]
+                for sub, st in done:
+                    if st is None:
+                        continue
+                    del subscriptions[sub]
+                    with chain.lock:
+                        chain.calls['signatureNotification'] += 1
+                    await ws.send(json.dumps({
+                        'jsonrpc': '2.0', 'method': 'signatureNotification',
+                        'params': {'result': {'context': {'slot': st['slot']}, 'value': {'err': st['err']}},
+                                   'subscription': sub},
+                    }))
+
+        notifier = asyncio.create_task(notify())
+        try:
+            async for message in ws:
+                msg = json.loads(message)
+                replies = []
+                for req in (msg if isinstance(msg, list) else [msg]):
+                    method = req.get('method', '')
+                    with chain.lock:
+                        chain.calls[method] += 1
+                    if method == 'signatureSubscribe':
+                        sub = next(next_id)
+                        subscriptions[sub] = req['params'][0]
+                        replies.append({'jsonrpc': '2.0', 'id': req.get('id'), 'result': sub})
+                    elif method == 'signatureUnsubscribe':
+                        found = subscriptions.pop(req['params'][0], None) is not None
+                        replies.append({'jsonrpc': '2.0', 'id': req.get('id'), 'result': found})
+                    else:
+                        replies.append({'jsonrpc': '2.0', 'id': req.get('id'),
+                                        'error': {'code': -32601, 'message': f'Method not found: {method}'}})
+                await ws.send(json.dumps(replies if isinstance(msg, list) else replies[0]))
+        except Exception:
+            pass  # the client went away
+        finally:
+            notifier.cancel()
+
+    async def main():
+        async with ws_serve(session, host, port) as server:
+            bound.append(next(iter(server.sockets)).getsockname()[:2])
+            ready.set()
+            await asyncio.Future()
+
+    threading.Thread(target=asyncio.run, args=(main(),), name='fake-rpc-ws', daemon=True).start()
+    ready.wait()
+    return bound[0]
+
+
+def serve(host: str = '127.0.0.1', port: int = 0, quiet: bool = True, chain: FakeChain = None,
+          faults: EndpointFaults = None, ws_port: int = None, **chain_opts) -> ThreadingHTTPServer:
+    """Start a fake RPC server on a daemon thread; ``server.chain`` is its state"""
+    chain = chain or FakeChain(**chain_opts)
+    faults = faults or EndpointFaults()
+    server = ThreadingHTTPServer((host, port), make_handler(chain, faults, quiet))
+    server.daemon_threads = True
+    server.chain = chain
+    server.faults = faults
+    server.ws_address = serve_ws(chain, host, ws_port) if ws_port is not None else None
+    threading.Thread(target=server.serve_forever, name='fake-rpc', daemon=True).start()
+    return server
+
+
+def main():
+    p = argparse.ArgumentParser(description="Serve a fake Solana JSON-RPC endpoint")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8899)
+    p.add_argument('--send-latency', type=float, default=0.0, help='Milliseconds added to each sendTransaction')
+    p.add_argument('--confirm-delay', type=float, default=0.5, help='Seconds until a sent tx reports confirmed')
+    p.add_argument('--fail-rate', type=float, default=0.0, help='Fraction of sends answered with an RPC error')
+    p.add_argument('--drop-rate', type=float, default=0.0, help='Fraction of accepted sends that never confirm')
+    p.add_argument('--error-rate', type=float, default=0.0, help='Fraction of transactions that fail on chain')
+    p.add_argument('--account-rate', type=float, default=1.0,
+                   help='Fraction of accounts getMultipleAccounts reports as existing')
+    p.add_argument('--priority-fee', type=int, default=0,
+                   help='Typical recent prioritization fee (micro-lamports per CU)')
+    p.add_argument('--replicas', type=int, default=1, help='Serve the chain on this many consecutive ports')
+    p.add_argument('--rate-limit', type=float, default=0.0, help='Requests/second per replica before HTTP 429')
+    p.add_argument('--latency', type=float, default=0.0, help='Milliseconds added to every request')
+    p.add_argument('--slow-rate', type=float, default=0.0, help='Fraction of requests delayed by --slow-latency')
+    p.add_argument('--slow-latency', type=float, default=1000.0, help='Milliseconds of a slow request')
+    p.add_argument('--http-error-rate', type=float, default=0.0, help='Fraction of requests answered HTTP 503')
+    p.add_argument('--ws-port', type=int, help='Also serve signatureSubscribe on this websocket port')
+    p.add_argument('--verbose', action='store_true', help='Log every request')
+    args = p.parse_args()
+
+    chain = FakeChain(send_latency=args.send_latency / 1000, confirm_delay=args.confirm_delay,
+                      fail_rate=args.fail_rate, drop_rate=args.drop_rate, error_rate=args.error_rate,
+                      account_rate=args.account_rate, priority_fee=args.priority_fee)
+    servers = []
+    for i in range(args.replicas):
+        faults = EndpointFaults(rate_limit=args.rate_limit, latency=args.latency / 1000, slow_rate=args.slow_rate,
+                                slow_latency=args.slow_latency / 1000, http_error_rate=args.http_error_rate, seed=i)
+        servers.append(serve(args.host, args.port + i if args.port else 0, quiet=not args.verbose,
+                             chain=chain, faults=faults, ws_port=args.ws_port if i == 0 else None))
+    urls = ','.join(f'http://{args.host}:{s.server_address[1]}' for s in servers)
+    print(f"Fake Solana RPC listening on {urls}")
+    if servers[0].ws_address:
+        print(f"Signature websocket on ws://{args.host}:{servers[0].ws_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""HTTP load-test harness reporting RPS and latency percentiles per target
+
+Runs a fixed-concurrency closed loop against one or more running backends,
+so a baseline build and a candidate build can be compared side by side.
+Start the servers with RATE_LIMIT_BACKEND=off so the limiter does not
+dominate the numbers.
+
+Usage:
+    python3 scripts/load_test.py --target after=http://127.0.0.1:8000 \\
+        --path "/api/eligibility?wallet=4fv7DcHEAKFMkNr8cdPH7c1z7mFGdUVKLVyMJ3UDvKa9" \\
+        --concurrency 64 --duration 20
+
+    # Compare two builds (e.g. baseline checked out and served on :8001)
+    python3 scripts/load_test.py --target before=http://127.0.0.1:8001 \\
+        --target after=http://127.0.0.1:8000 --path /api/status
+"""
+import argparse
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+async def run_target(base_url, paths, concurrency, duration, timeout):
+    latencies = []
+    statuses = Counter()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(n):
+            i = n
+            while time.perf_counter() < deadline:
+                path = paths[i % len(paths)]
+                i += concurrency
+                start = time.perf_counter()
+                try:
+                    r = await client.get(path)
+                    statuses[r.status_code] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': (latencies[-1] * 1000) if latencies else 0.0,
+        'statuses': dict(statuses),
+    }
+
+
+def main():
+    p = argparse.ArgumentParser(description="Load-test the Dojo3 API")
+    p.add_argument('--target', action='append', required=True, metavar='LABEL=URL',
+                   help='Backend to test (repeatable)')
+    p.add_argument('--path', action='append', default=[],
+                   help='Request path, cycled across requests (repeatable; default /health)')
+    p.add_argument('--concurrency', type=int, default=32)
+    p.add_argument('--duration', type=float, default=10.0, help='Seconds per target')
+    p.add_argument('--timeout', type=float, default=30.0)
+    args = p.parse_args()
+
+    paths = args.path or ['/health']
+    results = []
+    for item in args.target:
+        label, sep, url = item.partition('=')
+        if not sep:
+            label, url = item, item
+        print(f"Running {label} ({url}) for {args.duration:.0f}s at concurrency {args.concurrency}...")
+        res = asyncio.run(run_target(url, paths, args.concurrency, args.duration, args.timeout))
+        results.append((label, res))
+
+    print()
+    print(f"{'target':<12} {'requests':>9} {'rps':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}  statuses")
+    for label, r in results:
+        print(f"{label:<12} {r['requests']:>9} {r['rps']:>9.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['max_ms']:>8.1f}  {r['statuses']}")
+
+    if len(results) >= 2:
+        (base_label, base), (cand_label, cand) = results[0], results[-1]
+        if base['rps'] and cand['p99_ms']:
+            print(f"\n{cand_label} vs {base_label}: {cand['rps'] / base['rps']:.2f}x RPS, "
+                  f"p99 {base['p99_ms'] / cand['p99_ms']:.2f}x lower")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""Import the old JSON site databases into the SQLite site store
+
+outputs/sites.json (sites by id) goes into the ``sites`` table and
+config/sites_db.json (user sites by username) into ``user_sites``. Sites
+already in the store are kept unless --overwrite is given, so the import
+can be re-run after the JSON files changed. The API imports a JSON file on
+its own only while the matching table is empty.
+
+Usage:
+    python3 scripts/migrate_sites.py [--db outputs/sites.sqlite] [--overwrite]
+"""
+import argparse
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from backend.site_store import SiteStore
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument('--db', default=os.environ.get('SITE_STORE_DB', os.path.join(ROOT, 'outputs', 'sites.sqlite')))
+    p.add_argument('--sites-json', default=os.path.join(ROOT, 'outputs', 'sites.json'))
+    p.add_argument('--user-sites-json', default=os.path.join(ROOT, 'config', 'sites_db.json'))
+    p.add_argument('--overwrite', action='store_true', help='replace sites already in the store')
+    args = p.parse_args(argv)
+
+    for table, json_path in (('sites', args.sites_json), ('user_sites', args.user_sites_json)):
+        store = SiteStore(args.db, table)
+        if not os.path.exists(json_path):
+            print(f"{table}: {json_path} not found, skipped")
+            continue
+        written = store.import_json(json_path, overwrite=args.overwrite)
+        print(f"{table}: {written} sites imported from {json_path} "
+              f"({store.count(active=None)} in store, {store.count()} active)")
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Local stand-in for the CoinGecko /simple/price endpoint
+
+Serves deterministic USD prices so the backend price oracle can be exercised
+without network access. Point the backend at it with COINGECKO_API_URL.
+
+Usage:
+    python3 scripts/mock_coingecko.py --port 8787 --price bonk=0.00002 --price sol=150
+    COINGECKO_API_URL=http://127.0.0.1:8787/api/v3 uvicorn backend.app:app
+"""
+import argparse
+import json
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def make_handler(prices: dict, fail: bool = False, known_only: bool = False):
+    class Handler(BaseHTTPRequestHandler):
+        requests_served = 0
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if not url.path.endswith('/simple/price'):
+                self.send_error(404)
+                return
+            if fail:
+                self.send_error(503, 'Mock outage')
+                return
+
+            Handler.requests_served += 1
+            qs = parse_qs(url.query)
+            ids = [i for i in ','.join(qs.get('ids', [])).split(',') if i]
+            body = {}
+            for cg in ids:
+                if known_only and cg not in prices:
+                    continue  # as CoinGecko does for ids it does not list
+                # Unknown ids get a stable pseudo-price derived from the id
+                usd = prices.get(cg, (zlib.crc32(cg.encode()) % 100_000) / 100)
+                body[cg] = {'usd': usd}
+
+            data = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, fmt, *args):
+            print(f"[mock-coingecko] {self.address_string()} {fmt % args}")
+
+    return Handler
+
+
+def main():
+    p = argparse.ArgumentParser(description="Serve mock CoinGecko prices")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8787)
+    p.add_argument('--price', action='append', default=[], metavar='ID=USD',
+                   help='Fixed price for a coingecko id (repeatable)')
+    p.add_argument('--fail', action='store_true', help='Answer every request with 503')
+    p.add_argument('--known-only', action='store_true', help='Omit ids without a --price from responses')
+    args = p.parse_args()
+
+    prices = {}
+    for item in args.price:
+        cg, _, usd = item.partition('=')
+        prices[cg] = float(usd)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(prices, args.fail, args.known_only))
+    print(f"Mock CoinGecko listening on http://{args.host}:{args.port}/api/v3")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
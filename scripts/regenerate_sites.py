@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Re-render every user site after a template change, across a process pool
+
+Reads the active user sites from the site store and builds them into
+public/sites/<username>/ with SiteGenerator.build: a site whose inputs and
+template version match its build manifest entry is skipped, so only the
+sites of a changed template are rendered, and only files whose content
+changed are replaced (atomically). Sites are sent to the workers in
+chunks, with a bounded number of chunks in flight.
+
+--changed-files writes the paths (relative to the sites directory) this
+run wrote, one per line, e.g. for ``rsync --files-from``.
+
+Usage:
+    python3 scripts/regenerate_sites.py [--workers 8] [--template modern] [--force] [--changed-files FILE]
+"""
+import os
+import sys
+import argparse
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from backend.build_manifest import WRITE, BuildManifest
+from backend.site_generator import SiteGenerator
+from backend.site_store import SiteStore
+
+logger = logging.getLogger('regenerate_sites')
+
+_generator = None
+
+
+def _init_worker(sites_dir, manifest):
+    global _generator
+    _generator = SiteGenerator(sites_dir, manifest_path=manifest)
+
+
+def _render_chunk(chunk, force):
+    """Build one chunk of (username, site) in a worker: (changed, unchanged, failures)"""
+    changed = unchanged = 0
+    failures = []
+    for username, site in chunk:
+        try:
+            if _generator.build(username, site, force=force):
+                changed += 1
+            else:
+                unchanged += 1
+        except Exception as e:
+            failures.append((username, f'{type(e).__name__}: {e}'))
+    return changed, unchanged, failures
+
+
+def chunks(items, size):
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument('--db', default=os.environ.get('SITE_STORE_DB', os.path.join(ROOT, 'outputs', 'sites.sqlite')))
+    p.add_argument('--sites-dir', default=os.path.join(ROOT, 'public', 'sites'))
+    p.add_argument('--manifest', default=os.environ.get('SITE_MANIFEST',
+                                                        os.path.join(ROOT, 'outputs', 'site_manifest.sqlite')))
+    p.add_argument('--template', help='only sites of this template')
+    p.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    p.add_argument('--chunk', type=int, default=256, help='sites per task sent to a worker')
+    p.add_argument('--force', action='store_true',
+                   help='render every site and compare with the files on disk rather than the manifest')
+    p.add_argument('--changed-files', help='write the paths written by this run to this file')
+    p.add_argument('--progress-interval', type=float, default=5.0)
+    args = p.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    store = SiteStore(args.db, 'user_sites')
+    total = store.count(active=True, template=args.template)
+    logger.info(f"Regenerating {total} sites into {args.sites_dir} with {args.workers} workers")
+
+    manifest = BuildManifest(args.manifest)
+    first_seq = manifest.last_seq()
+    changed = unchanged = 0
+    failures = []
+    start = last_report = time.monotonic()
+    sites = store.items(active=True, template=args.template)
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(args.sites_dir, args.manifest)) as pool:
+        pending = set()
+        for chunk in chunks(sites, args.chunk):
+            pending.add(pool.submit(_render_chunk, chunk, args.force))
+            if len(pending) < args.workers * 2:
+                continue
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                c, u, f = future.result()
+                changed, unchanged = changed + c, unchanged + u
+                failures.extend(f)
+            if time.monotonic() - last_report >= args.progress_interval:
+                last_report = time.monotonic()
+                done_count = changed + unchanged + len(failures)
+                logger.info(f"{done_count}/{total} sites ({done_count / (last_report - start):,.0f} sites/s)")
+        for future in pending:
+            c, u, f = future.result()
+            changed, unchanged = changed + c, unchanged + u
+            failures.extend(f)
+
+    elapsed = time.monotonic() - start
+    processed = changed + unchanged + len(failures)
+    for username, error in failures[:20]:
+        logger.error(f"Site {username}: {error}")
+    written, last_seq = manifest.changes(since=first_seq)
+    written = sorted(path for path, action in written.items() if action == WRITE)
+    if args.changed_files:
+        with open(args.changed_files, 'w') as f:
+            f.writelines(f'{path}\n' for path in written)
+    print(f"{processed} sites in {elapsed:.1f}s ({processed / elapsed if elapsed else 0:,.0f} sites/s): "
+          f"{changed} changed, {unchanged} unchanged, {len(failures)} failed; "
+          f"{len(written)} files written (manifest seq {first_seq} -> {last_seq})")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,26 +1,29 @@
 #!/usr/bin/env python3
 """Run the airdrop allocations and transfers in-process using solana-py + spl.token
 
+Transfers go through the pipelined submitter (backend.tx_pipeline). With
+--progress-interval a ``PROGRESS {json}`` line (processed / succeeded /
+failed recipients, tx/s) is printed periodically and once at the end.
+Keeps no journal, so an interrupted run must not simply be restarted; the
+admin job runner uses outputs/airdrop_orchestrator.py --resume instead.
+
 Usage: python3 scripts/run_inproc_orchestrator.py --mint MINT --treasury-ata ATA outputs/recipients_full_sample.csv --yes
 """
 import os
 import sys
 import csv
 import argparse
+import asyncio
 import json
-from decimal import Decimal
+import time
 
-from solana.rpc.api import Client
 from solders.keypair import Keypair
-from solders.pubkey import Pubkey
-from spl.token.client import Token
-from spl.token.instructions import get_associated_token_address
-from spl.token.constants import TOKEN_PROGRAM_ID
 
-TOTAL_SUPPLY = 850_000_000
-AIRDROP_PERCENT = 60
-AIRDROP_POOL = int(TOTAL_SUPPLY * AIRDROP_PERCENT / 100)
-REFERRAL_BPS = 2400
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from backend.alloc_engine import iter_allocations, split_referral
+from backend.rpc_pool import RpcPool, rpc_endpoints
+from backend.tx_pipeline import RecipientResults, SplTransferBuilder, TransferPipeline, jobs_for_allocation
 
 
 def load_keypair(path: str) -> Keypair:
@@ -43,39 +46,26 @@ def load_keypair(path: str) -> Keypair:
         raise ValueError('Unexpected key length: ' + str(len(b)))
 
 
-def read_recipients(path):
-    rows = []
-    with open(path, 'r', newline='') as f:
-        r = csv.DictReader(f)
-        for row in r:
-            wallet = row['wallet'].strip()
-            weight = Decimal(row.get('weight', '1'))
-            ref = row.get('referrer', '').strip() or None
-            rows.append({'wallet': wallet, 'weight': weight, 'referrer': ref})
-    return rows
-
-
-def compute_allocations(rows):
-    total_weight = sum(r['weight'] for r in rows)
-    allocations = []
-    for r in rows:
-        share = (r['weight'] / total_weight) if total_weight > 0 else Decimal(0)
-        amount = int(Decimal(AIRDROP_POOL) * share)
-        allocations.append({'wallet': r['wallet'], 'amount': amount, 'referrer': r['referrer']})
-    return allocations
-
-
 def main():
     p = argparse.ArgumentParser()
     p.add_argument('recipients_csv')
     p.add_argument('--mint', required=True)
     p.add_argument('--treasury-ata', required=True)
     p.add_argument('--keypair', default='outputs/dev_treasury_keypair.json')
-    p.add_argument('--rpc', default=os.environ.get('SOLANA_RPC', 'https://api.mainnet-beta.solana.com'))
+    p.add_argument('--rpc', default=os.environ.get('SOLANA_RPC', 'https://api.mainnet-beta.solana.com'),
+                   help='RPC URL, or several comma-separated')
+    p.add_argument('--ws', default=os.environ.get('SOLANA_WS'),
+                   help='Websocket URL for signatureSubscribe confirmations (default: poll only)')
     p.add_argument('--yes', action='store_true')
+    p.add_argument('--concurrency', type=int, default=16, help='Maximum concurrent sends')
+    p.add_argument('--window', type=int, default=256, help='Maximum transactions awaiting confirmation')
+    p.add_argument('--output', default='outputs/allocations_live.csv')
+    p.add_argument('--progress-interval', type=float, default=0.0,
+                   help='Seconds between PROGRESS lines (0: none)')
     args = p.parse_args()
 
-    client = Client(args.rpc)
+    pool = RpcPool(rpc_endpoints(args.rpc), max_connections=args.concurrency)
+    client = pool.client()
     kp = load_keypair(args.keypair)
     print('Using pubkey:', kp.pubkey())
     bal = client.get_balance(kp.pubkey())
@@ -85,58 +75,79 @@ def main():
         print('Treasury key has no SOL; aborting.')
         sys.exit(2)
 
-    mint_pub = Pubkey.from_string(args.mint)
-    token = Token(client, mint_pub, TOKEN_PROGRAM_ID, kp)
+    builder = SplTransferBuilder(kp, args.mint, args.treasury_ata)
 
-    rows = read_recipients(args.recipients_csv)
-    allocs = compute_allocations(rows)
+    # Written to <output>.partial and moved into place when the run finishes, so the
+    # allocation index never serves eligibility from a partial run
+    partial_file = args.output + '.partial'
+    out_f = open(partial_file, 'w', newline='')
+    w = csv.DictWriter(out_f, fieldnames=['wallet', 'gross', 'net', 'referrer', 'referral_amount', 'status'])
+    w.writeheader()
+    results = RecipientResults(w.writerow)
 
-    out = []
-    for a in allocs:
-        wallet = a['wallet']
-        gross = a['amount']
-        ref = a['referrer']
-        referral_amount = (gross * REFERRAL_BPS) // 10000 if ref else 0
-        net = gross - referral_amount
+    async def jobs():
+        for idx, a in enumerate(iter_allocations(args.recipients_csv), 1):
+            wallet = a.wallet
+            gross = a.amount
+            ref = a.referrer
+            referral_amount, net = split_referral(gross, bool(ref))
 
-        print(f'Wallet {wallet}: gross={gross} net={net} ref={ref} referral={referral_amount}')
+            print(f'Wallet {wallet}: gross={gross} net={net} ref={ref} referral={referral_amount}')
+            row = {'wallet': wallet, 'gross': gross, 'net': net, 'referrer': ref or '', 'referral_amount': referral_amount}
 
-        if net > 0:
-            if not args.yes:
-                resp = input(f'Send {net} to {wallet}? [y/N]: ')
+            if net > 0 and not args.yes:
+                resp = await asyncio.to_thread(input, f'Send {net} to {wallet}? [y/N]: ')
                 if resp.strip().lower() not in ('y', 'yes'):
                     print('Skipped by user')
                     continue
-            # compute ATA and transfer
-            try:
-                recipient_ata = get_associated_token_address(Pubkey.from_string(wallet), Pubkey.from_string(args.mint))
-            except Exception as e:
-                print('Invalid recipient pubkey, skipping:', wallet, e)
-                continue
-            tx = token.transfer(args.treasury_ata, str(recipient_ata), kp, net)
-            print('Sent net tx:', tx)
-
-        if referral_amount > 0:
+
+            # Keyed by row, not wallet: a wallet listed twice gets two rows and two sets of transfers
+            row_key = str(idx)
+            recipient_jobs = jobs_for_allocation(wallet, net, ref, referral_amount, row_key=row_key)
+            results.expect(row_key, row, sum(len(j.transfers) for j in recipient_jobs))
+            for job in recipient_jobs:
+                yield job
+
+    def on_result(result):
+        print(f'{result.job.key}: {result.status} {result.signature or ""} {result.error or ""}'.rstrip())
+        results.on_result(result)
+
+    def progress(stats):
+        print('PROGRESS ' + json.dumps({
+            'processed': results.ok + results.errors,
+            'succeeded': results.ok,
+            'failed': results.errors,
+            'submitted': stats.submitted,
+            'confirmed': stats.confirmed,
+            'tx_per_second': round(stats.tx_per_second, 1),
+            'time': time.time(),
+        }), flush=True)
+
+    async def report_progress(pipeline):
+        while True:
+            await asyncio.sleep(args.progress_interval)
+            progress(pipeline.stats)
+
+    async def submit():
+        async with pool.async_client() as aclient:
+            pipeline = TransferPipeline(aclient, builder, concurrency=args.concurrency, window=args.window,
+                                        ws_url=args.ws)
+            reporter = asyncio.create_task(report_progress(pipeline)) if args.progress_interval > 0 else None
             try:
-                ref_ata = get_associated_token_address(Pubkey.from_string(ref), Pubkey.from_string(args.mint))
-            except Exception as e:
-                print('Invalid ref pubkey, skipping referral for', wallet, ref, e)
-                ref_ata = None
-            if ref_ata:
-                tx = token.transfer(args.treasury_ata, str(ref_ata), kp, referral_amount)
-                print('Sent referral tx:', tx)
-            print('Sent referral tx:', tx)
-
-        out.append({'wallet': wallet, 'gross': gross, 'net': net, 'referrer': ref or '', 'referral_amount': referral_amount})
-
-    out_file = 'outputs/allocations_live.csv'
-    with open(out_file, 'w', newline='') as f:
-        w = csv.DictWriter(f, fieldnames=['wallet', 'gross', 'net', 'referrer', 'referral_amount'])
-        w.writeheader()
-        for r in out:
-            w.writerow(r)
-
-    print('Wrote allocations to', out_file)
+                return await pipeline.run(jobs(), on_result=on_result)
+            finally:
+                if reporter is not None:
+                    reporter.cancel()
+
+    stats = asyncio.run(submit())
+    out_f.close()
+    os.replace(partial_file, args.output)
+    if args.progress_interval > 0:
+        progress(stats)
+
+    for line in stats.report():
+        print(line)
+    print('Wrote allocations to', args.output)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Print the site files changed since a deploy, from the build manifest log
+
+Written paths go to stdout one per line (relative to the sites directory,
+ready for ``rsync --files-from``); with --deleted, the deleted paths are
+printed instead. The last sequence number goes to stderr: pass it as
+--since on the next deploy. Paths changed again later are listed once,
+with their latest action.
+
+Usage:
+    python3 scripts/site_changes.py --since 1200 > changed.txt 2> seq.txt
+    python3 scripts/site_changes.py --prune 1200    # after every target synced up to 1200
+"""
+import os
+import sys
+import argparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from backend.build_manifest import DELETE, WRITE, BuildManifest
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument('--manifest', default=os.environ.get('SITE_MANIFEST',
+                                                        os.path.join(ROOT, 'outputs', 'site_manifest.sqlite')))
+    p.add_argument('--since', type=int, default=0, help='last sequence number already deployed')
+    p.add_argument('--deleted', action='store_true', help='print deleted paths instead of written ones')
+    p.add_argument('--prune', type=int, metavar='SEQ', help='drop log entries up to SEQ and exit')
+    args = p.parse_args(argv)
+
+    manifest = BuildManifest(args.manifest)
+    if args.prune is not None:
+        print(f"pruned {manifest.prune(args.prune)} entries", file=sys.stderr)
+        return
+    changed, last_seq = manifest.changes(since=args.since)
+    wanted = DELETE if args.deleted else WRITE
+    for path in sorted(path for path, action in changed.items() if action == wanted):
+        print(path)
+    print(last_seq, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
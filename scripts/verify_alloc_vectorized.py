@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Check the NumPy allocation mode against the Decimal path on a test corpus
+
+The generated corpora cover fractional weights (up to 9 decimals), zeros,
+very large and very small weights, whole-number weights with many ties, and
+weights whose shares divide the pool exactly. Recipients CSVs given on the
+command line are checked as well. floor_shares is also checked directly
+against Python integers for pools far above the airdrop pool, where the
+int64 path's float estimate is no longer within one unit.
+
+For every row the vectorized gross, referral and net must equal the Decimal
+reference, floor(Decimal(pool) * weight / total), bit for bit. The legacy
+28-digit expression int(Decimal(pool) * (weight / total)) is also compared;
+it may only differ on shares that divide exactly, where its rounded
+quotient lands one unit short. With --distribute-dust the grosses must sum
+to the pool and differ from the floors by at most one.
+
+The same checks run on smaller corpora in tests/test_alloc_vectorized.py;
+this script is for full-size corpora and real recipients files.
+
+Usage:
+    python3 scripts/verify_alloc_vectorized.py [--rows 200000] [recipients.csv ...]
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+from decimal import Decimal, localcontext
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from backend.alloc_engine import AIRDROP_POOL, REFERRAL_BPS
+from backend.alloc_vectorized import compute_csv, exact_total, floor_shares
+
+
+def write_corpus(path, weights, seed=11):
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['wallet', 'weight', 'referrer'])
+        for i, weight in enumerate(weights):
+            ref = f'ref{rng.randint(0, 999)}' if rng.random() < 0.3 else ''
+            w.writerow([f'w{i}', weight, ref])
+
+
+def mixed_weights(rows, seed=11):
+    # Fractional and extreme weights: large fixed-point totals (float path)
+    rng = random.Random(seed)
+    for _ in range(rows):
+        r = rng.random()
+        if r < 0.5:
+            weight = str(rng.randint(1, 10_000))
+        elif r < 0.8:
+            weight = f'{rng.uniform(0, 100):.{rng.randint(1, 9)}f}'
+        elif r < 0.9:
+            weight = '0'
+        elif r < 0.95:
+            weight = str(rng.randint(1_000_000, 9_000_000))
+        else:
+            weight = '0.000000001'
+        yield weight
+
+
+def integer_weights(rows, seed=12):
+    # Whole-number weights: gcd-reduced totals fit the exact int64 path
+    rng = random.Random(seed)
+    for _ in range(rows):
+        yield str(rng.choice([1, 1, 1, rng.randint(1, 10_000)]))
+
+
+# Total 51 divides the pool, so every share is exact while w / 51 does not
+# terminate: the legacy 28-digit quotient for 9 / 51 lands one unit below
+EXACT_WEIGHTS = ['9', '40', '2']
+
+
+# (weights, pool): a pool above 2**53 once made the int64 path a few units
+# short on the large weight (...6239 instead of ...6292)
+LARGE_POOL_CASES = [
+    ([1, 3, 2**61 - 5], 2**61 + 12345),
+    ([2**51 - 1, 2**50 + 7, 12345], 2**51 - 1),
+    ([2**62 - 2, 1], 2**62 + 3),
+]
+
+
+def large_pool_cases(count=200, seed=13):
+    rng = random.Random(seed)
+    cases = list(LARGE_POOL_CASES)
+    for _ in range(count):
+        weights = [rng.randint(0, 2**rng.randint(1, 62)) for _ in range(rng.randint(1, 20))]
+        weights.append(rng.randint(1, 2**61))
+        cases.append((weights, rng.randint(1, 2**rng.randint(40, 63))))
+    return cases
+
+
+def verify_floor_shares():
+    failures = 0
+    cases = large_pool_cases()
+    for weights, pool in cases:
+        arr = np.array(weights, dtype=np.int64)
+        total = exact_total(arr)
+        exact = [pool * w // total for w in weights]
+        gross, _ = floor_shares(arr, pool, total)
+        dusted, _ = floor_shares(arr, pool, total, distribute_dust=True)
+        step = [d - g for d, g in zip(dusted.tolist(), exact)]
+        if gross.tolist() != exact or sum(dusted.tolist()) != pool or min(step) < 0 or max(step) > 1:
+            failures += 1
+            if failures <= 5:
+                print(f"  MISMATCH pool={pool} weights={weights}: vectorized={gross.tolist()} exact={exact}")
+    print(f"floor_shares: {len(cases)} large-pool cases, {failures} mismatches vs Python integers")
+    return failures == 0
+
+
+def decimal_reference(path):
+    rows = []
+    with open(path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            wallet = row['wallet'].strip()
+            if wallet:
+                rows.append((Decimal((row.get('weight') or '1').strip() or '1'), bool((row.get('referrer') or '').strip())))
+    total = sum(w for w, _ in rows)
+    exact, legacy = [], []
+    with localcontext() as ctx:
+        ctx.prec = 100
+        for weight, _ in rows:
+            exact.append(int((Decimal(AIRDROP_POOL) * weight) // total))
+    for weight, _ in rows:
+        legacy.append(int(Decimal(AIRDROP_POOL) * (weight / total)))
+    return rows, exact, legacy
+
+
+def verify(path):
+    rows, exact, legacy = decimal_reference(path)
+    cols, va = compute_csv(path)
+    gross = va.gross.tolist()
+    referral = va.referral.tolist()
+    net = va.net.tolist()
+    failures = 0
+    for i, ((_, has_ref), g) in enumerate(zip(rows, exact)):
+        ref_amount = (g * REFERRAL_BPS) // 10000 if has_ref else 0
+        if (gross[i], referral[i], net[i]) != (g, ref_amount, g - ref_amount):
+            failures += 1
+            if failures <= 5:
+                print(f"  MISMATCH row {i} {cols.wallets[i]}: vectorized={(gross[i], referral[i], net[i])} "
+                      f"decimal={(g, ref_amount, g - ref_amount)}")
+    legacy_diffs = [i for i, (g, l) in enumerate(zip(exact, legacy)) if g != l]
+    legacy_unexplained = [i for i in legacy_diffs if legacy[i] != exact[i] - 1]
+
+    _, dusted = compute_csv(path, distribute_dust=True)
+    dust_ok = int(dusted.gross.sum()) == AIRDROP_POOL or sum(w for w, _ in rows) == 0
+    step = (dusted.gross - va.gross)
+    dust_ok = dust_ok and int(step.min(initial=0)) >= 0 and int(step.max(initial=0)) <= 1
+
+    print(f"{path}: {len(rows)} rows, {failures} mismatches vs Decimal reference, "
+          f"{len(legacy_diffs)} legacy exact-share differences "
+          f"({len(legacy_unexplained)} unexplained), dust {dusted.dust} -> sum "
+          f"{int(dusted.gross.sum())} {'ok' if dust_ok else 'FAILED'}")
+    return failures == 0 and not legacy_unexplained and dust_ok
+
+
+def main():
+    p = argparse.ArgumentParser(description="Verify vectorized allocations against the Decimal path")
+    p.add_argument('csv', nargs='*', help='Additional recipients CSVs to check')
+    p.add_argument('--rows', type=int, default=200_000, help='Generated corpus size')
+    args = p.parse_args()
+
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp:
+        corpora = {
+            'mixed.csv': mixed_weights(args.rows),
+            'integer.csv': integer_weights(args.rows),
+            'exact.csv': EXACT_WEIGHTS,
+        }
+        for name, weights in corpora.items():
+            path = os.path.join(tmp, name)
+            write_corpus(path, weights)
+            ok &= verify(path)
+    for path in args.csv:
+        ok &= verify(path)
+    ok &= verify_floor_shares()
+    print('PASS' if ok else 'FAIL')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Admin job runner: jobs outlive the API process and never overlap"""
+import asyncio
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+import pytest
+
+from backend.admin_jobs import CANCELLED, FAILED, RUNNING, SUCCEEDED, JobConflict, JobManager
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def _script(body: str):
+    return [sys.executable, '-c', textwrap.dedent(body)]
+
+
+def _wait(manager, job_id, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job['state'] not in (RUNNING, 'queued'):
+            return job
+        time.sleep(0.1)
+    raise AssertionError(f'job {job_id} still running')
+
+
+def test_progress_and_exit_status(tmp_path):
+    manager = JobManager(str(tmp_path), flush_interval=0)
+    job = manager.submit(_script('''
+        import json, time
+        for i in range(3):
+            print('PROGRESS ' + json.dumps({'processed': i + 1}), flush=True)
+            time.sleep(0.1)
+        print('done')
+    '''))
+    job = _wait(manager, job['id'])
+    assert job['state'] == SUCCEEDED and job['returncode'] == 0
+    assert job['progress'] == {'processed': 3}
+    assert manager.log_tail(job['id'])[-1] == 'done'
+
+    failed = _wait(manager, manager.submit(_script('import sys; sys.exit(3)'))['id'])
+    assert failed['state'] == FAILED and failed['returncode'] == 3
+
+
+def test_job_survives_api_restart(tmp_path):
+    # The submitting "API process" exits at once; the job keeps printing to its log
+    submit = f'''
+        import sys
+        sys.path.insert(0, {ROOT!r})
+        from backend.admin_jobs import JobManager
+        m = JobManager({str(tmp_path)!r})
+        job = m.submit([sys.executable, '-c', "import json, time\\n"
+                        "for i in range(10):\\n"
+                        "    print('PROGRESS ' + json.dumps({{'processed': i + 1}}), flush=True)\\n"
+                        "    time.sleep(0.1)\\n"])
+        m.shutdown()
+        print(job['id'])
+    '''
+    job_id = subprocess.run(_script(submit), capture_output=True, text=True, check=True).stdout.split()[-1]
+
+    manager = JobManager(str(tmp_path))
+    assert manager.active()['id'] == job_id
+    with pytest.raises(JobConflict):
+        manager.submit(_script('pass'))
+    job = _wait(manager, job_id)
+    assert job['state'] == SUCCEEDED and job['returncode'] == 0
+    assert job['progress'] == {'processed': 10}
+    assert manager.active() is None
+
+
+def test_cancel_blocks_new_runs_until_the_job_exits(tmp_path):
+    manager = JobManager(str(tmp_path), kill_grace=1.0)
+    job = manager.submit(_script('''
+        import signal, time
+        signal.signal(signal.SIGTERM, lambda *a: None)  # slow to stop: only SIGKILL ends it
+        print('started', flush=True)
+        time.sleep(60)
+    '''))
+    time.sleep(0.5)
+    manager.cancel(job['id'])
+    with pytest.raises(JobConflict):
+        manager.submit(_script('pass'))
+    job = _wait(manager, job['id'])
+    assert job['state'] == CANCELLED
+    manager.submit(_script('pass'))
+
+
+def test_timeout(tmp_path):
+    manager = JobManager(str(tmp_path), timeout=0.5, kill_grace=1.0)
+    job = _wait(manager, manager.submit(_script('import time; time.sleep(60)'))['id'])
+    assert job['state'] == FAILED and job['error'].startswith('timed out')
+
+
+def test_log_rotation(tmp_path):
+    manager = JobManager(str(tmp_path), log_max_bytes=2000, log_backups=2, flush_interval=0)
+    job = manager.submit(_script('''
+        import json, time
+        for i in range(40):
+            print('x' * 100, flush=True)
+            if i % 10 == 9:
+                print('PROGRESS ' + json.dumps({'processed': i + 1}), flush=True)
+                time.sleep(0.6)
+    '''))
+    job = _wait(manager, job['id'])
+    assert job['state'] == SUCCEEDED and job['progress'] == {'processed': 40}
+    assert os.path.exists(manager.log_path(job['id']) + '.1')
+    assert os.path.getsize(manager.log_path(job['id'])) < 4000
+
+
+def test_events_stream_until_finished_or_disconnected(tmp_path):
+    manager = JobManager(str(tmp_path), flush_interval=0)
+    job = manager.submit(_script('import time; time.sleep(1)'))
+
+    async def collect(disconnect_after=None):
+        seen = []
+
+        async def disconnected():
+            return disconnect_after is not None and len(seen) >= disconnect_after
+
+        async for state in manager.events(job['id'], interval=0.1, disconnected=disconnected):
+            seen.append(state)
+        return seen
+
+    assert len(asyncio.run(collect(disconnect_after=2))) == 2
+    states = [s['state'] for s in asyncio.run(collect()) if s is not None]
+    assert states[0] == RUNNING and states[-1] == SUCCEEDED
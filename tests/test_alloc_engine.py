@@ -0,0 +1,24 @@
+"""CSV weight parsing into fixed-point units"""
+import pytest
+
+from backend.alloc_engine import WEIGHT_SCALE, parse_weight
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('3', 3 * WEIGHT_SCALE),
+    (' 2.5 ', 2_500_000_000),
+    ('1e2', 100 * WEIGHT_SCALE),
+    ('', WEIGHT_SCALE),
+    (None, WEIGHT_SCALE),
+    ('-4', 0),
+    ('abc', WEIGHT_SCALE),
+    ('inf', WEIGHT_SCALE),
+])
+def test_parse_weight(raw, expected):
+    assert parse_weight(raw) == expected
+
+
+@pytest.mark.parametrize('raw', ['²', '٣', '1²', '٣.5', '１２'])
+def test_non_ascii_digits_count_as_invalid(raw):
+    # '²'.isdigit() is True and Decimal('٣') == 3; neither may become a weight
+    assert parse_weight(raw) == WEIGHT_SCALE
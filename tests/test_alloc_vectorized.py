@@ -0,0 +1,127 @@
+"""NumPy allocations must equal the exact integer floors of the streaming engine"""
+import csv
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from backend import alloc_vectorized  # noqa: E402
+from backend.alloc_engine import AIRDROP_POOL, REFERRAL_BPS, iter_allocations  # noqa: E402
+from backend.alloc_vectorized import (MAX_TOTAL, MAX_WEIGHT, compute_csv, exact_total, floor_shares,  # noqa: E402
+                                      load_columns)
+
+
+def _write(path, weights, seed=11):
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(['wallet', 'weight', 'referrer'])
+        for i, weight in enumerate(weights):
+            w.writerow([f'w{i}', weight, f'ref{i}' if rng.random() < 0.3 else ''])
+    return str(path)
+
+
+def _only_path(monkeypatch, used):
+    # Fail loudly if floor_shares takes the other path
+    other = '_floor_float' if used == '_floor_int64' else '_floor_int64'
+
+    def refuse(*args):
+        raise AssertionError(f'{other} used')
+    monkeypatch.setattr(alloc_vectorized, other, refuse)
+
+
+def _check_against_engine(path):
+    cols, va = compute_csv(path)
+    expected = list(iter_allocations(path))
+    assert cols.wallets == [a.wallet for a in expected]
+    assert va.gross.tolist() == [a.amount for a in expected]
+    referral = [a.amount * REFERRAL_BPS // 10000 if a.referrer else 0 for a in expected]
+    assert va.referral.tolist() == referral
+    assert va.net.tolist() == [a.amount - r for a, r in zip(expected, referral)]
+
+    _, dusted = compute_csv(path, distribute_dust=True)
+    assert int(dusted.gross.sum()) == AIRDROP_POOL
+    step = dusted.gross - va.gross
+    assert step.min() >= 0 and step.max() <= 1 and int(step.sum()) == dusted.dust
+
+
+def test_int64_path(tmp_path, monkeypatch):
+    # Whole-number weights: the gcd-reduced total fits the exact int64 path
+    rng = random.Random(12)
+    weights = [str(rng.choice([1, 1, 1, rng.randint(1, 10_000)])) for _ in range(20_000)]
+    _only_path(monkeypatch, '_floor_int64')
+    _check_against_engine(_write(tmp_path / 'integer.csv', weights))
+
+
+def test_float_path(tmp_path, monkeypatch):
+    # Fractional, zero and extreme weights: the fixed-point total exceeds MAX_TOTAL
+    rng = random.Random(11)
+    weights = []
+    for _ in range(20_000):
+        r = rng.random()
+        if r < 0.5:
+            weights.append(str(rng.randint(1, 10_000)))
+        elif r < 0.8:
+            weights.append(f'{rng.uniform(0, 100):.{rng.randint(1, 9)}f}')
+        elif r < 0.9:
+            weights.append('0')
+        else:
+            weights.append(rng.choice(['0.000000001', str(rng.randint(1_000_000, 9_000_000))]))
+    weights += ['9223372036', '0.000000007']  # the largest weights push the total past 2**62
+    path = _write(tmp_path / 'mixed.csv', weights)
+    assert exact_total(load_columns(path).weights) >= MAX_TOTAL
+    _only_path(monkeypatch, '_floor_float')
+    _check_against_engine(path)
+
+
+@pytest.mark.parametrize('weights, pool', [
+    ([1, 3, 2**61 - 5], 2**61 + 12345),  # a pool above 2**53 once left the large share a few units short
+    ([2**51 - 1, 2**50 + 7, 12345], 2**51 - 1),
+    ([2**62 - 2, 1], 2**62 + 3),
+])
+def test_large_pools_match_python_integers(weights, pool):
+    arr = np.array(weights, dtype=np.int64)
+    total = exact_total(arr)
+    gross, _ = floor_shares(arr, pool, total)
+    assert gross.tolist() == [pool * w // total for w in weights]
+    dusted, _ = floor_shares(arr, pool, total, distribute_dust=True)
+    assert int(dusted.sum()) == pool
+
+
+def test_exact_shares(tmp_path):
+    # Total 51 divides the pool while w / 51 does not terminate
+    _check_against_engine(_write(tmp_path / 'exact.csv', ['9', '40', '2']))
+
+
+@pytest.mark.parametrize('scale', [1, 2**60], ids=['int64', 'float'])
+def test_dust_ties_go_to_the_earlier_row(scale):
+    # Equal remainders: the dust goes to rows in file order
+    weights = np.array([scale, 2 * scale, scale, scale, 2 * scale], dtype=np.int64) + np.int64(scale > 1)
+    total = exact_total(weights)
+    pool = 10 if scale == 1 else 2**52 + 10
+    floors = [pool * w // total for w in weights.tolist()]
+    gross, dust = floor_shares(weights, pool, total, distribute_dust=True)
+    assert dust == pool - sum(floors) > 0
+    rems = [pool * w % total for w in weights.tolist()]
+    ranked = sorted(range(len(rems)), key=lambda i: (-rems[i], i))[:dust]
+    assert [i for i, (g, f) in enumerate(zip(gross.tolist(), floors)) if g > f] == sorted(ranked)
+
+
+def test_dust_tie_break_int64_simple():
+    gross, dust = floor_shares(np.array([1, 1, 1], dtype=np.int64), 10, 3, distribute_dust=True)
+    assert dust == 1 and gross.tolist() == [4, 3, 3]
+
+
+def test_overflow_boundary(tmp_path):
+    # MAX_WEIGHT at 9 decimals is 9223372036.854775807
+    fits = _write(tmp_path / 'fits.csv', ['9223372036.854775807', '1'])
+    cols = load_columns(fits)
+    assert cols.weights.tolist() == [MAX_WEIGHT, 10**9]
+    _check_against_engine(fits)
+
+    over = _write(tmp_path / 'over.csv', ['9223372036.854775808', '1'])
+    with pytest.raises(ValueError, match='streaming allocation engine'):
+        load_columns(over)
+    # The streaming engine still handles it
+    assert sum(a.amount for a in iter_allocations(over)) <= AIRDROP_POOL
@@ -0,0 +1,83 @@
+"""Claims ledger: a claim is indexed only once it is durable"""
+import os
+import threading
+
+import pytest
+
+from backend import claims_store
+from backend.claims_store import AlreadyClaimed, ClaimsStore
+
+WALLET = '9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin'
+
+
+def _claim(wallet=WALLET, amount=100):
+    return {'wallet': wallet, 'amount': amount, 'ts': 0}
+
+
+def test_record_and_replay(tmp_path):
+    store = ClaimsStore(str(tmp_path / 'claims.jsonl'), commit_delay=0)
+    store.record(_claim())
+    with pytest.raises(AlreadyClaimed):
+        store.record(_claim())
+    store.close()
+    replayed = ClaimsStore(str(tmp_path / 'claims.jsonl'))
+    assert replayed.has_claimed(WALLET) and replayed.totals() == {'claims': 1, 'total_claimed': 100}
+
+
+def test_failed_fsync_does_not_index_the_claim(tmp_path, monkeypatch):
+    store = ClaimsStore(str(tmp_path / 'claims.jsonl'), commit_delay=0)
+
+    def failing_fsync(fd):
+        raise OSError('EIO')
+    monkeypatch.setattr(claims_store.os, 'fsync', failing_fsync)
+    with pytest.raises(OSError):
+        store.record(_claim())
+    assert not store.has_claimed(WALLET)
+    assert store.totals() == {'claims': 0, 'total_claimed': 0}
+
+    monkeypatch.undo()
+    store.record(_claim())
+    assert store.has_claimed(WALLET) and store.totals()['claims'] == 1
+
+
+def test_failed_write_leaves_no_partial_line(tmp_path):
+    path = str(tmp_path / 'claims.jsonl')
+    store = ClaimsStore(path, commit_delay=0)
+    store.record(_claim('a'))
+    size = os.path.getsize(path)
+
+    class ShortWrite:
+        def __init__(self, fh):
+            self.fh = fh
+
+        def write(self, data):
+            return self.fh.write(data[:5])
+
+        def __getattr__(self, name):
+            return getattr(self.fh, name)
+    store._fh = ShortWrite(store._fh)
+    with pytest.raises(OSError):
+        store.record(_claim('b'))
+    assert os.path.getsize(path) == size and not store.has_claimed('b')
+
+
+def test_duplicate_refused_while_first_claim_is_in_flight(tmp_path, monkeypatch):
+    store = ClaimsStore(str(tmp_path / 'claims.jsonl'), commit_delay=0)
+    entered, release = threading.Event(), threading.Event()
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        entered.set()
+        release.wait(5)
+        real_fsync(fd)
+    monkeypatch.setattr(claims_store.os, 'fsync', slow_fsync)
+
+    first = threading.Thread(target=store.record, args=(_claim(),))
+    first.start()
+    assert entered.wait(5)
+    assert not store.has_claimed(WALLET)  # written but not yet durable
+    with pytest.raises(AlreadyClaimed):
+        store.record(_claim())
+    release.set()
+    first.join(5)
+    assert store.has_claimed(WALLET) and store.totals()['claims'] == 1
@@ -0,0 +1,31 @@
+"""Price map validation: bad entries are dropped, the rest of the file is kept"""
+import json
+from decimal import Decimal
+
+import pytest
+
+from backend.config_registry import ConfigError, parse_price_map
+
+GOOD = 'So11111111111111111111111111111111111111112'
+
+
+def test_malformed_entry_keeps_valid_entries():
+    prices = parse_price_map({GOOD: '1.5', 'bad': 'abc', 'obj': {'usd': 1}, 'flag': True})
+    assert dict(prices) == {GOOD: Decimal('1.5')}
+
+
+@pytest.mark.parametrize('value', ['NaN', 'nan', 'Infinity', '-inf', 'sNaN', float('nan'), float('inf'), -1, '-0.5', 0])
+def test_non_finite_or_non_positive_prices_rejected(value):
+    prices = parse_price_map({GOOD: 2, 'bad': value})
+    assert dict(prices) == {GOOD: Decimal('2')}
+
+
+def test_nan_from_json_file_rejected():
+    # json.loads accepts the non-standard NaN/Infinity literals
+    prices = parse_price_map(json.loads('{"a": NaN, "b": Infinity, "c": 0.25}'))
+    assert dict(prices) == {'c': Decimal('0.25')}
+
+
+def test_non_object_rejected():
+    with pytest.raises(ConfigError):
+        parse_price_map([1, 2])
@@ -0,0 +1,84 @@
+"""Price oracle against the local CoinGecko stub (scripts/mock_coingecko.py)"""
+import threading
+from decimal import Decimal
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from backend import price_oracle
+from backend.price_oracle import PriceOracle
+from scripts.mock_coingecko import make_handler
+
+PRICES = {'bonk': 0.00002, 'sol': 150, 'usdc': 1}
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(prices=PRICES, fail=False, known_only=False):
+        handler = make_handler(dict(prices), fail, known_only)
+        handler.log_message = lambda *args: None
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f'http://127.0.0.1:{server.server_address[1]}/api/v3', handler
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _oracle(url, ids=('bonk', 'sol', 'usdc'), **kwargs):
+    return PriceOracle(lambda: ids, api_url=url, timeout=2, **kwargs)
+
+
+def test_successful_refresh_batches_ids(serve):
+    url, handler = serve()
+    oracle = _oracle(url, batch_size=2)
+    assert oracle.refresh() == 3
+    assert handler.requests_served == 2  # three ids in batches of two
+    assert oracle.get('bonk') == Decimal('2e-05') and oracle.get('sol') == Decimal('150')
+    assert oracle.metrics()['refresh_count'] == 1 and oracle.last_refresh_at is not None
+
+
+def test_partial_batch_updates_the_ids_returned(serve):
+    url, _ = serve(known_only=True)
+    oracle = _oracle(url, ids=('bonk', 'delisted', 'sol'))
+    assert oracle.refresh() == 2
+    assert oracle.get('delisted') is None and oracle.get('sol') == Decimal('150')
+    assert (oracle.refresh_count, oracle.failed_refresh_count) == (1, 0)
+
+
+def test_http_error_keeps_last_prices(serve):
+    url, _ = serve()
+    oracle = _oracle(url)
+    oracle.refresh()
+
+    oracle.api_url, _ = serve(fail=True)
+    assert oracle.refresh() == 0
+    assert oracle.failed_refresh_count == 1 and oracle.failure_count == 1
+    assert oracle.get('sol') == Decimal('150')
+    assert oracle.metrics()['tracked'] == 3
+
+
+def test_staleness_grows_until_a_refresh_succeeds(serve, monkeypatch):
+    now = [1_000.0]
+    monkeypatch.setattr(price_oracle.time, 'time', lambda: now[0])
+    url, _ = serve()
+    oracle = _oracle(url)
+    assert oracle.age('sol') is None
+    oracle.refresh()
+    assert oracle.age('sol') == 0
+
+    good_url = oracle.api_url
+    oracle.api_url, _ = serve(fail=True)
+    now[0] += 300
+    oracle.refresh()
+    assert oracle.age('sol') == 300 and oracle.last_refresh_at == 1_000.0
+
+    oracle.api_url = good_url
+    now[0] += 60
+    oracle.refresh()
+    assert oracle.age('sol') == 0 and oracle.last_refresh_at == 1_360.0
@@ -0,0 +1,81 @@
+"""Transfer journal reconciliation: never expire a transaction that may have landed"""
+import asyncio
+from types import SimpleNamespace
+
+from solders.signature import Signature
+from solders.transaction_status import TransactionConfirmationStatus
+
+from backend.blockhash_cache import EXPIRY_MARGIN_BLOCKS
+from backend.transfer_journal import CONFIRMED, EXPIRED, SENT, TransferJournal
+from backend.tx_pipeline import Transfer, TransferJob
+
+LAST_VALID = 1_000
+OWNER = '9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin'
+
+
+class FakeClient:
+    """Status lookups answer from ``statuses`` (one list of found signatures per call)"""
+
+    def __init__(self, heights, statuses):
+        self.heights = list(heights)
+        self.statuses = list(statuses)
+        self.status_calls = 0
+        self.rebroadcasts = 0
+
+    async def get_signature_statuses(self, sigs, search_transaction_history=False):
+        assert search_transaction_history
+        found = self.statuses[min(self.status_calls, len(self.statuses) - 1)]
+        self.status_calls += 1
+        landed = SimpleNamespace(err=None, confirmation_status=TransactionConfirmationStatus.Finalized)
+        return SimpleNamespace(value=[landed if str(s) in found else None for s in sigs])
+
+    async def get_block_height(self):
+        return SimpleNamespace(value=self.heights.pop(0) if len(self.heights) > 1 else self.heights[0])
+
+    async def send_raw_transaction(self, raw, opts=None):
+        self.rebroadcasts += 1
+
+
+def _journal(tmp_path):
+    journal = TransferJournal(str(tmp_path / 'journal.sqlite'))
+    transfer = Transfer(OWNER, 10, 'net', OWNER, False, 'row1:net')
+    journal.plan([transfer])
+    sig = str(Signature.new_unique())
+    journal.signed(TransferJob('row1:net', (transfer,)), sig, b'raw', LAST_VALID)
+    journal.sent(sig)
+    return journal, sig
+
+
+def test_status_arriving_after_height_passed_is_not_expired(tmp_path):
+    # First lookup (lagging status node) misses it; the height node is already far past
+    journal, sig = _journal(tmp_path)
+    client = FakeClient([LAST_VALID + EXPIRY_MARGIN_BLOCKS + 100], [set(), {sig}])
+    counts = asyncio.run(journal.reconcile(client, poll_interval=0))
+    assert counts[CONFIRMED] == 1 and counts[EXPIRED] == 0
+    assert journal.transfer_state('row1:net')[0] == CONFIRMED
+    assert client.status_calls == 2
+
+
+def test_not_expired_within_margin(tmp_path):
+    journal, sig = _journal(tmp_path)
+    client = FakeClient([LAST_VALID + 1, LAST_VALID + EXPIRY_MARGIN_BLOCKS, LAST_VALID + EXPIRY_MARGIN_BLOCKS],
+                        [set(), set(), set(), {sig}])
+    counts = asyncio.run(journal.reconcile(client, poll_interval=0))
+    assert counts == {CONFIRMED: 1, 'failed': 0, EXPIRED: 0}
+    assert client.rebroadcasts == 1
+
+
+def test_expired_when_still_missing_past_margin(tmp_path):
+    journal, sig = _journal(tmp_path)
+    client = FakeClient([LAST_VALID + EXPIRY_MARGIN_BLOCKS + 1], [set()])
+    counts = asyncio.run(journal.reconcile(client, poll_interval=0))
+    assert counts[EXPIRED] == 1
+    assert journal.transfer_state('row1:net')[0] == EXPIRED
+    assert client.status_calls == 2  # re-checked before expiring
+    assert journal.in_doubt() == []
+
+
+def test_sent_transfer_is_in_doubt(tmp_path):
+    journal, sig = _journal(tmp_path)
+    assert journal.transfer_state('row1:net')[0] == SENT
+    assert [s for s, _, _ in journal.in_doubt()] == [sig]
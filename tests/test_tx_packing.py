@@ -0,0 +1,128 @@
+"""Transaction packer: plans must serialize within Solana's wire limits"""
+import pytest
+from solders.hash import Hash
+from solders.keypair import Keypair
+
+from backend.tx_packing import (CREATE_ATA_IX_SIZE, KEY_SIZE, MAX_TX_ACCOUNTS, PACKET_DATA_SIZE, TRANSFER_IX_SIZE,
+                                PackLimits, PackReport, TransactionPacker, plan_transactions)
+from backend.tx_pipeline import BUDGET_CU, CREATE_ATA_CU, TRANSFER_CU, SplTransferBuilder, transfers_for_allocation
+
+MINT = '9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin'
+
+
+class _Fees:
+    price = 1_000  # with a price the builder adds SetComputeUnitPrice, as the packer reserves
+
+
+def _key(i: int) -> str:
+    return str(Keypair.from_seed(i.to_bytes(32, 'little')).pubkey())
+
+
+def _groups(n: int, referrals: bool = True, create_ata: bool = False):
+    groups = []
+    for i in range(n):
+        wallet, referrer = _key(2 * i + 1), _key(2 * i + 2)
+        missing = {wallet, referrer} if create_ata else set()
+        groups.append(transfers_for_allocation(wallet, 1_000 + i, referrer if referrals else None, 10 + i, missing))
+    return groups
+
+
+def _builder(fee_payer: bool = False) -> SplTransferBuilder:
+    payer = Keypair.from_seed(b'\x01' * 32)
+    authority = Keypair.from_seed(b'\x02' * 32) if fee_payer else None
+    return SplTransferBuilder(payer, MINT, _key(10**6), authority=authority, fees=_Fees())
+
+
+def _wire(builder, jobs):
+    return [builder.build(job, Hash.default()) for job in jobs]
+
+
+@pytest.mark.parametrize('create_ata', [False, True])
+@pytest.mark.parametrize('fee_payer', [False, True])
+def test_transactions_fit_packet_size(create_ata, fee_payer):
+    builder = _builder(fee_payer)
+    jobs = list(plan_transactions(_groups(300, create_ata=create_ata), PackLimits(signers=builder.signer_count)))
+    sizes = [len(bytes(tx)) for tx in _wire(builder, jobs)]
+    assert max(sizes) <= PACKET_DATA_SIZE
+    # Packed tightly: the fullest transaction has no room for another recipient's pair
+    pair = 2 * (TRANSFER_IX_SIZE + KEY_SIZE) + (2 * (CREATE_ATA_IX_SIZE + 2 * KEY_SIZE) if create_ata else 0)
+    assert max(sizes) > PACKET_DATA_SIZE - pair
+
+
+def test_fee_payer_adds_a_signature_and_key():
+    builder = _builder(fee_payer=True)
+    jobs = list(plan_transactions(_groups(300), PackLimits(signers=2)))
+    txs = _wire(builder, jobs)
+    assert all(len(tx.signatures) == 2 for tx in txs)
+    assert max(len(bytes(tx)) for tx in txs) <= PACKET_DATA_SIZE
+    # Sizing the same transactions for a single signer would overflow
+    single = _wire(builder, plan_transactions(_groups(300), PackLimits()))
+    assert max(len(bytes(tx)) for tx in single) > PACKET_DATA_SIZE
+
+
+def test_account_limit():
+    # With bytes and compute out of the way the 64-account limit is what closes transactions
+    limits = PackLimits(max_bytes=10**6, max_compute_units=10**9)
+    builder = _builder()
+    jobs = list(plan_transactions(_groups(200, create_ata=True), limits))
+    accounts = [len(tx.message.account_keys) for tx in _wire(builder, jobs)]
+    assert max(accounts) <= MAX_TX_ACCOUNTS
+    assert max(accounts) > MAX_TX_ACCOUNTS - 4  # a recipient pair with ATA creation adds 4 keys
+
+
+def test_compute_unit_cap():
+    cap = BUDGET_CU + 5 * TRANSFER_CU
+    jobs = list(plan_transactions(_groups(50), PackLimits(max_compute_units=cap)))
+    assert all(job.compute_units <= cap for job in jobs)
+    assert max(len(job.transfers) for job in jobs) == 4  # pairs are never split to fill the fifth slot
+    assert all(job.compute_units == BUDGET_CU + len(job.transfers) * TRANSFER_CU for job in jobs)
+
+
+def test_net_and_referral_paired_in_one_transaction():
+    groups = _groups(500, create_ata=True)
+    tx_of = {t.key: job.key for job in plan_transactions(groups) for t in job.transfers}
+    assert len(tx_of) == 1000
+    for net, referral in groups:
+        assert tx_of[net.key] == tx_of[referral.key]
+
+
+def test_ata_creation_costs_size_and_compute():
+    plain = list(plan_transactions(_groups(300)))
+    created = list(plan_transactions(_groups(300, create_ata=True)))
+    assert len(created) > len(plain)
+    for job in created:
+        creates = sum(t.create_ata for t in job.transfers)
+        assert creates == len(job.transfers)  # every owner here is distinct and missing its ATA
+        assert job.compute_units == BUDGET_CU + len(job.transfers) * TRANSFER_CU + creates * CREATE_ATA_CU
+    # The builder emits one create per flagged transfer
+    builder = _builder()
+    for job, tx in zip(created, _wire(builder, created)):
+        assert len(tx.message.instructions) == 2 + 2 * len(job.transfers)
+
+
+def test_repeated_owner_created_once_per_transaction():
+    wallet, referrer = _key(1), _key(2)
+    groups = [transfers_for_allocation(wallet, 100, referrer, 5, {referrer}, row_key=f'row{i}') for i in range(3)]
+    jobs = list(plan_transactions(groups))
+    assert len(jobs) == 1
+    assert [t.create_ata for t in jobs[0].transfers] == [False, True, False, False, False, False]
+
+
+def test_oversized_group_rejected():
+    with pytest.raises(ValueError):
+        TransactionPacker(PackLimits(max_compute_units=BUDGET_CU + TRANSFER_CU)).add(_groups(1)[0])
+
+
+def test_incremental_packer_matches_plan():
+    groups = _groups(120, create_ata=True)
+    packer, jobs = TransactionPacker(), []
+    for group in groups:
+        jobs += packer.add(group)
+    jobs += packer.flush()
+    assert jobs == list(plan_transactions(groups))
+    report = PackReport()
+    for job in jobs:
+        report.add(job)
+    summary = report.summary()
+    assert summary['transfers'] == 240 and summary['transactions'] == len(jobs)
+    assert summary['new_atas'] == 240
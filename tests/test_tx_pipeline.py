@@ -0,0 +1,22 @@
+"""Per-recipient result rows from per-transaction results"""
+from backend.tx_pipeline import RecipientResults, TxResult, jobs_for_allocation
+
+WALLET = '9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin'
+REFERRER = 'So11111111111111111111111111111111111111112'
+
+
+def test_repeated_wallet_keeps_one_row_per_csv_row():
+    rows = []
+    results = RecipientResults(rows.append)
+    jobs = []
+    for idx, net in ((1, 100), (2, 200)):
+        row_jobs = jobs_for_allocation(WALLET, net, REFERRER, 5, row_key=str(idx))
+        results.expect(str(idx), {'wallet': WALLET, 'net': net}, len(row_jobs))
+        jobs += row_jobs
+    assert [j.key for j in jobs] == ['1:net', '1:referral', '2:net', '2:referral']
+
+    for job in jobs:
+        status = 'failed' if job.key == '2:referral' else 'confirmed'
+        results.on_result(TxResult(job, status, 'sig', None, 0.0, None))
+    assert [(r['net'], r['status'].split(':')[0]) for r in rows] == [(100, 'processed'), (200, 'error')]
+    assert (results.ok, results.errors) == (1, 1)